@@ -0,0 +1,57 @@
+"""Filtres django-filter des ViewSets"""
+from django.db.models import Q
+from django_filters import rest_framework as filters
+
+from api.models import ColisModel, DestinataireModel, ExpediteurModel, FactureModel
+
+
+class ColisFilter(filters.FilterSet):
+    """Filtres de /api/colis/, tous appuyés sur un index.
+
+    Les filtres multiples s'écrivent ?statut=EN_ATTENTE&statut=EN_TRANSIT et
+    les plages ?date_creation_after=...&date_creation_before=...
+    """
+
+    statut = filters.MultipleChoiceFilter(choices=ColisModel.STATUT_CHOICES)
+    priorite = filters.MultipleChoiceFilter(choices=ColisModel.PRIORITE_CHOICES)
+    type_colis = filters.MultipleChoiceFilter(choices=ColisModel.TYPE_CHOICES)
+    date_creation = filters.IsoDateTimeFromToRangeFilter()
+    date_livraison_prevue = filters.IsoDateTimeFromToRangeFilter()
+    expediteur_ville = filters.CharFilter(field_name='expediteur__ville', lookup_expr='iexact')
+    destinataire_ville = filters.CharFilter(field_name='destinataire__ville', lookup_expr='iexact')
+    utilisateur = filters.NumberFilter(field_name='utilisateur_id')
+    numero_suivi = filters.CharFilter(method='filtrer_numero_suivi', help_text="Numéro de suivi exact")
+    numero_suivi_prefixe = filters.CharFilter(method='filtrer_numero_suivi_prefixe',
+                                              help_text="Préfixe du numéro de suivi")
+    telephone = filters.CharFilter(method='filtrer_telephone',
+                                   help_text="Préfixe du téléphone de l'expéditeur ou du destinataire")
+
+    class Meta:
+        model = ColisModel
+        fields = []
+
+    def filtrer_numero_suivi(self, queryset, name, value):
+        return queryset.filter(numero_suivi=value.strip().upper())
+
+    def filtrer_numero_suivi_prefixe(self, queryset, name, value):
+        return queryset.filter(numero_suivi__startswith=value.strip().upper())
+
+    def filtrer_telephone(self, queryset, name, value):
+        # Sous-requêtes indexées plutôt qu'un OR sur deux jointures
+        value = value.strip()
+        return queryset.filter(
+            Q(expediteur_id__in=ExpediteurModel.objects.filter(telephone__startswith=value).values('id'))
+            | Q(destinataire_id__in=DestinataireModel.objects.filter(telephone__startswith=value).values('id'))
+        )
+
+
+class FactureFilter(filters.FilterSet):
+    """Filtres des exports de factures"""
+
+    statut = filters.MultipleChoiceFilter(choices=FactureModel.STATUT_CHOICES)
+    mode_paiement = filters.MultipleChoiceFilter(choices=FactureModel.MODE_PAIEMENT_CHOICES)
+    date_emission = filters.IsoDateTimeFromToRangeFilter()
+
+    class Meta:
+        model = FactureModel
+        fields = []
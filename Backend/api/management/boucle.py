@@ -0,0 +1,41 @@
+"""Base des commandes de type worker (boucle de traitement par lots)"""
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+
+class CommandeBoucle(BaseCommand):
+    """Appelle traiter_lot() en continu jusqu'à SIGTERM.
+
+    Les sous-classes définissent traiter_lot(taille), qui retourne le nombre
+    d'éléments traités; la commande se met en pause quand il n'y a rien à faire.
+    """
+
+    libelle = 'élément(s) traité(s)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lot', type=int, default=100, help="Nombre d'éléments réclamés par lot")
+        parser.add_argument('--pause', type=float, default=2.0,
+                            help="Attente en secondes lorsqu'il n'y a rien à traiter")
+        parser.add_argument('--une-fois', action='store_true', help="Vide la file puis s'arrête")
+
+    def traiter_lot(self, taille):
+        raise NotImplementedError
+
+    def handle(self, *args, **options):
+        self.arret = False
+        signal.signal(signal.SIGTERM, self._arreter)
+        total = 0
+        while not self.arret:
+            traites = self.traiter_lot(options['lot'])
+            total += traites
+            if traites:
+                continue
+            if options['une_fois']:
+                break
+            time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(f"{total} {self.libelle}"))
+
+    def _arreter(self, *args):
+        self.arret = True
@@ -0,0 +1,23 @@
+"""Fusion des expéditeurs et destinataires en double"""
+from django.core.management.base import BaseCommand
+
+from api.models import DestinataireModel, ExpediteurModel
+from api.services.clients import dedupliquer
+
+
+class Command(BaseCommand):
+    help = "Fusionne les expéditeurs/destinataires de même téléphone et de nom proche, et repointe leurs colis"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lot', type=int, default=1000, help="Nombre de colis repointés par transaction")
+        parser.add_argument('--simulation', action='store_true', help="Compte les doublons sans rien modifier")
+
+    def handle(self, *args, **options):
+        for modele, champ_colis in ((ExpediteurModel, 'expediteur'), (DestinataireModel, 'destinataire')):
+            rapport = dedupliquer(modele, champ_colis, options['lot'], options['simulation'])
+            self.stdout.write(
+                f"{modele._meta.verbose_name_plural}: {rapport['groupes']} groupe(s), "
+                f"{rapport['fusionnes']} fiche(s) fusionnée(s), {rapport['colis_repointes']} colis repointé(s)"
+            )
+        if options['simulation']:
+            self.stdout.write(self.style.WARNING("Simulation: aucune modification enregistrée"))
@@ -0,0 +1,13 @@
+"""Worker d'envoi des notifications en attente"""
+from api.management.boucle import CommandeBoucle
+from api.services.notifications import DispatcheurNotifications
+
+
+class Command(CommandeBoucle):
+    help = "Envoie en continu les notifications EN_ATTENTE (plusieurs répliques possibles)"
+    libelle = 'notification(s) traitée(s)'
+
+    def traiter_lot(self, taille):
+        if not hasattr(self, 'dispatcheur'):
+            self.dispatcheur = DispatcheurNotifications()
+        return self.dispatcheur.traiter_lot(taille)
@@ -0,0 +1,39 @@
+"""Maintenance de la table des positions GPS des livreurs"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.services.positions import creer_partitions, purger, sous_echantillonner
+
+
+class Command(BaseCommand):
+    help = (
+        "Crée les partitions journalières à venir, sous-échantillonne les jours anciens et supprime "
+        "ceux qui dépassent la rétention (à planifier chaque jour: sans partition, les points "
+        "tombent dans la partition par défaut et sont déplacés dans la leur à l'exécution suivante)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--avance', type=int, default=14, help="Jours de partitions à créer à l'avance")
+        parser.add_argument('--retention', type=int, default=settings.POSITIONS_RETENTION_JOURS,
+                            help="Jours de positions conservés")
+        parser.add_argument('--sous-echantillonnage', type=int, default=settings.POSITIONS_SOUS_ECHANTILLONNAGE_JOURS,
+                            help="Âge (jours) à partir duquel un jour est sous-échantillonné")
+        parser.add_argument('--pas', type=int, default=60, help="Un point par livreur et par tranche de N secondes")
+        parser.add_argument('--rattrapage', type=int, default=1,
+                            help="Nombre de jours sous-échantillonnés (exécutions manquées)")
+
+    def handle(self, *args, **options):
+        aujourd_hui = timezone.localdate()
+        creees = creer_partitions(aujourd_hui, options['avance'])
+        supprimees = 0
+        for decalage in range(options['rattrapage']):
+            jour = aujourd_hui - timedelta(days=options['sous_echantillonnage'] + decalage)
+            supprimees += sous_echantillonner(jour, options['pas'])
+        purgees = purger(aujourd_hui - timedelta(days=options['retention']))
+        self.stdout.write(self.style.SUCCESS(
+            f"{creees} partition(s) créée(s), {supprimees} point(s) sous-échantillonné(s), "
+            f"{purgees} partition(s) ou point(s) purgé(s)"
+        ))
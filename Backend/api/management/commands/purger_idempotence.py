@@ -0,0 +1,20 @@
+"""Purge des clés d'idempotence expirées"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.services.synchro_livreur import purger_idempotence
+
+
+class Command(BaseCommand):
+    help = "Supprime les clés d'idempotence plus anciennes que la durée de renvoi possible (à planifier chaque jour)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--heures', type=int, default=settings.IDEMPOTENCE_RETENTION_HEURES,
+                            help="Âge au-delà duquel une clé est supprimée")
+
+    def handle(self, *args, **options):
+        supprimees = purger_idempotence(timezone.now() - timedelta(hours=options['heures']))
+        self.stdout.write(self.style.SUCCESS(f"{supprimees} clé(s) supprimée(s)"))
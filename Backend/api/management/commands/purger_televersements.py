@@ -0,0 +1,20 @@
+"""Purge des téléversements abandonnés"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.services.televersements import purger_televersements
+
+
+class Command(BaseCommand):
+    help = "Supprime les téléversements inachevés ou jamais rattachés à une livraison, et leurs fichiers"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--heures', type=int, default=settings.TELEVERSEMENT_RETENTION_HEURES,
+                            help="Inactivité au-delà de laquelle un téléversement est supprimé")
+
+    def handle(self, *args, **options):
+        supprimes = purger_televersements(timezone.now() - timedelta(hours=options['heures']))
+        self.stdout.write(self.style.SUCCESS(f"{supprimes} téléversement(s) supprimé(s)"))
@@ -0,0 +1,27 @@
+"""Import d'un relevé de paiements et rapprochement avec les factures"""
+from django.core.management.base import BaseCommand
+
+from api.services.rapprochement import TAILLE_LOT, lire_releve, rapprocher
+
+
+class Command(BaseCommand):
+    help = ("Applique les paiements d'un relevé CSV "
+            "(numero_facture, montant[, reference, mode_paiement, date_paiement]) aux factures")
+
+    def add_arguments(self, parser):
+        parser.add_argument('fichier', help="Chemin du relevé CSV")
+        parser.add_argument('--lot', type=int, default=TAILLE_LOT, help="Nombre de lignes traitées par lot")
+        parser.add_argument('--simulation', action='store_true', help="Rapproche sans rien enregistrer")
+
+    def handle(self, *args, **options):
+        with open(options['fichier'], encoding='utf-8-sig', newline='') as flux:
+            rapport = rapprocher(lire_releve(flux), options['lot'], options['simulation'])
+        for rejet in rapport['non_rapprochees']:
+            self.stdout.write(f"Ligne {rejet['ligne']} ({rejet['numero_facture'] or '-'}): {rejet['motif']}")
+        self.stdout.write(
+            f"{rapport['lignes']} ligne(s), {rapport['rapprochees']} rapprochée(s), "
+            f"{len(rapport['non_rapprochees'])} non rapprochée(s), "
+            f"{rapport['factures_mises_a_jour']} facture(s) mise(s) à jour"
+        )
+        if options['simulation']:
+            self.stdout.write(self.style.WARNING("Simulation: aucune modification enregistrée"))
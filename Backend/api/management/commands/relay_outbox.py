@@ -0,0 +1,20 @@
+"""Relais de l'outbox transactionnelle"""
+from api.management.boucle import CommandeBoucle
+from api.services.outbox import RelaisOutbox
+
+
+class Command(CommandeBoucle):
+    help = "Matérialise en continu les événements de l'outbox (plusieurs répliques possibles)"
+    libelle = 'événement(s) traité(s)'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--lents', action='store_true',
+                            help="Traite seulement les événements lents (géocodage, photos), hors transaction")
+
+    def handle(self, *args, **options):
+        self.relais = RelaisOutbox(lents=options['lents'])
+        super().handle(*args, **options)
+
+    def traiter_lot(self, taille):
+        return self.relais.traiter_lot(taille)
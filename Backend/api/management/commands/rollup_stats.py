@@ -0,0 +1,24 @@
+"""Mise à jour des agrégats du tableau de bord"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.services.statistiques import jours_modifies, recalculer_jours, tous_les_jours
+
+
+class Command(BaseCommand):
+    help = "Recalcule les statistiques journalières des jours modifiés récemment (à planifier périodiquement)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fenetre', type=int, default=90,
+                            help="Minutes à couvrir: doit dépasser l'intervalle entre deux exécutions")
+        parser.add_argument('--reconstruire', action='store_true', help="Recalcule tous les jours")
+
+    def handle(self, *args, **options):
+        if options['reconstruire']:
+            jours = tous_les_jours()
+        else:
+            jours = jours_modifies(timezone.now() - timedelta(minutes=options['fenetre']))
+        nombre = recalculer_jours(jours)
+        self.stdout.write(self.style.SUCCESS(f"{nombre} jour(s) recalculé(s)"))
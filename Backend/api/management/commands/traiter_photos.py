@@ -0,0 +1,19 @@
+"""Rendus des photos de livraison déjà enregistrées"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.services.photos import a_traiter, demander_traitement
+
+
+class Command(BaseCommand):
+    help = "Publie le traitement (EXIF retiré, rendus WebP) des photos qui n'ont pas encore de miniature"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--taille', type=int, default=50, help="Photos par événement de l'outbox")
+
+    def handle(self, *args, **options):
+        ids = list(a_traiter().order_by('id').values_list('id', flat=True))
+        with transaction.atomic():
+            for debut in range(0, len(ids), options['taille']):
+                demander_traitement(ids[debut:debut + options['taille']])
+        self.stdout.write(self.style.SUCCESS(f"{len(ids)} photo(s) à traiter par relay_outbox --lents"))
@@ -0,0 +1,26 @@
+# Generated by Django 5.0 on 2026-10-18 09:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_colismodel_frais_envoi'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SequenceModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom', models.CharField(max_length=100, unique=True)),
+                ('valeur', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Séquence',
+                'verbose_name_plural': 'Séquences',
+                'db_table': 'sequence_numerotation',
+            },
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.0 on 2026-10-18 09:31
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class AjouterIndexConcurrent(AddIndexConcurrently):
+    """CREATE INDEX CONCURRENTLY sous PostgreSQL: les tables restent accessibles en écriture
+    pendant la construction. Index ordinaire sur les autres bases."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY est refusé dans une transaction
+    atomic = False
+
+    dependencies = [
+        ('api', '0009_sequencemodel'),
+    ]
+
+    operations = [
+        AjouterIndexConcurrent(
+            model_name='colismodel',
+            index=models.Index(fields=['-date_creation', '-id'], name='colis_date_creation_idx'),
+        ),
+        AjouterIndexConcurrent(
+            model_name='colismodel',
+            index=models.Index(fields=['statut', '-date_creation'], name='colis_statut_date_idx'),
+        ),
+        AjouterIndexConcurrent(
+            model_name='colismodel',
+            index=models.Index(condition=models.Q(('statut__in', ['LIVRE', 'ANNULE']), _negated=True), fields=['-date_creation'], name='colis_non_livres_idx'),
+        ),
+        AjouterIndexConcurrent(
+            model_name='facturemodel',
+            index=models.Index(fields=['-date_emission', '-id'], name='facture_date_emission_idx'),
+        ),
+        AjouterIndexConcurrent(
+            model_name='livraisonmodel',
+            index=models.Index(fields=['livreur', 'statut'], name='livraison_livreur_statut_idx'),
+        ),
+        AjouterIndexConcurrent(
+            model_name='livraisonmodel',
+            index=models.Index(fields=['-date_assignation', '-id'], name='livraison_date_assign_idx'),
+        ),
+        AjouterIndexConcurrent(
+            model_name='notificationmodel',
+            index=models.Index(fields=['statut', '-date_envoi'], name='notif_statut_date_idx'),
+        ),
+        AjouterIndexConcurrent(
+            model_name='notificationmodel',
+            index=models.Index(condition=models.Q(('statut', 'EN_ATTENTE')), fields=['id'], name='notif_en_attente_idx'),
+        ),
+        AjouterIndexConcurrent(
+            model_name='suivimodel',
+            index=models.Index(fields=['colis', '-date_creation'], name='suivi_colis_date_idx'),
+        ),
+        AjouterIndexConcurrent(
+            model_name='suivimodel',
+            index=models.Index(fields=['-date_creation', '-id'], name='suivi_date_creation_idx'),
+        ),
+        AjouterIndexConcurrent(
+            model_name='tarifmodel',
+            index=models.Index(condition=models.Q(('actif', True)), fields=['type_service', 'poids_min', 'poids_max'], name='tarif_service_poids_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0 on 2026-10-18 09:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_index_acces'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationmodel',
+            name='derniere_erreur',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='notificationmodel',
+            name='prochaine_tentative',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='notificationmodel',
+            name='tentatives',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0 on 2026-10-18 09:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_notification_envoi'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EvenementOutboxModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type_evenement', models.CharField(max_length=50)),
+                ('payload', models.JSONField(default=dict)),
+                ('statut', models.CharField(choices=[('EN_ATTENTE', 'En attente'), ('TRAITE', 'Traité'), ('ECHOUE', 'Échoué')], default='EN_ATTENTE', max_length=20)),
+                ('tentatives', models.PositiveSmallIntegerField(default=0)),
+                ('derniere_erreur', models.TextField(blank=True, null=True)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('date_traitement', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Événement outbox',
+                'verbose_name_plural': 'Événements outbox',
+                'db_table': 'outbox',
+                'ordering': ['id'],
+                'indexes': [models.Index(condition=models.Q(('statut', 'EN_ATTENTE')), fields=['id'], name='outbox_en_attente_idx')],
+            },
+        ),
+    ]
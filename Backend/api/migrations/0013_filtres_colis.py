@@ -0,0 +1,42 @@
+# Generated by Django 5.0 on 2026-10-18 09:34
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_outbox'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='colismodel',
+            index=models.Index(fields=['priorite', '-date_creation'], name='colis_priorite_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='colismodel',
+            index=models.Index(fields=['type_colis', '-date_creation'], name='colis_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='colismodel',
+            index=models.Index(fields=['date_livraison_prevue'], name='colis_livraison_prevue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='destinatairemodel',
+            index=models.Index(fields=['telephone'], name='destinataire_telephone_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='destinatairemodel',
+            index=models.Index(django.db.models.functions.text.Upper('ville'), name='destinataire_ville_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expediteurmodel',
+            index=models.Index(fields=['telephone'], name='expediteur_telephone_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='expediteurmodel',
+            index=models.Index(django.db.models.functions.text.Upper('ville'), name='expediteur_ville_idx'),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.0 on 2026-10-18 09:35
+
+import re
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+INDICATIF_PAYS = '225'
+
+
+def normaliser_telephone(telephone):
+    # Copie figée de api.services.telephone.normaliser_telephone: la migration
+    # ne doit pas changer de résultat si le service évolue
+    chiffres = re.sub(r'\D', '', telephone or '')
+    if chiffres.startswith('00' + INDICATIF_PAYS):
+        chiffres = chiffres[2 + len(INDICATIF_PAYS):]
+    elif chiffres.startswith(INDICATIF_PAYS) and len(chiffres) > 10:
+        chiffres = chiffres[len(INDICATIF_PAYS):]
+    return chiffres
+
+
+def remplir_telephone_normalise(apps, schema_editor):
+    for nom_modele in ('ExpediteurModel', 'DestinataireModel'):
+        modele = apps.get_model('api', nom_modele)
+        a_jour = []
+        for client in modele.objects.only('id', 'telephone').iterator(chunk_size=2000):
+            client.telephone_normalise = normaliser_telephone(client.telephone)
+            a_jour.append(client)
+            if len(a_jour) == 2000:
+                modele.objects.bulk_update(a_jour, ['telephone_normalise'])
+                a_jour = []
+        modele.objects.bulk_update(a_jour, ['telephone_normalise'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_filtres_colis'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='destinatairemodel',
+            name='telephone_normalise',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='expediteurmodel',
+            name='telephone_normalise',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20),
+        ),
+        migrations.RunPython(remplir_telephone_normalise, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='destinatairemodel',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['nom_complet'], name='destinataire_nom_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='destinatairemodel',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['telephone'], name='destinataire_tel_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='destinatairemodel',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['quartier'], name='destinataire_quartier_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='expediteurmodel',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['nom_complet'], name='expediteur_nom_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='expediteurmodel',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['telephone'], name='expediteur_tel_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='expediteurmodel',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['quartier'], name='expediteur_quartier_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
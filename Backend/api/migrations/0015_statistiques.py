@@ -0,0 +1,80 @@
+# Generated by Django 5.0 on 2026-10-18 09:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_recherche_clients'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatColisJourModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jour', models.DateField()),
+                ('statut', models.CharField(max_length=20)),
+                ('ville', models.CharField(max_length=100)),
+                ('nombre', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Statistique colis',
+                'verbose_name_plural': 'Statistiques colis',
+                'db_table': 'stat_colis_jour',
+                'ordering': ['jour', 'statut', 'ville'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StatLivraisonJourModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jour', models.DateField()),
+                ('nombre', models.PositiveIntegerField(default=0)),
+                ('terminees', models.PositiveIntegerField(default=0)),
+                ('echouees', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Statistique livraisons',
+                'verbose_name_plural': 'Statistiques livraisons',
+                'db_table': 'stat_livraison_jour',
+                'ordering': ['jour', 'livreur'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StatRevenuJourModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jour', models.DateField()),
+                ('mode_paiement', models.CharField(blank=True, help_text='vide si non renseigné', max_length=20)),
+                ('nombre_factures', models.PositiveIntegerField(default=0)),
+                ('montant_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('montant_paye', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'verbose_name': 'Statistique revenus',
+                'verbose_name_plural': 'Statistiques revenus',
+                'db_table': 'stat_revenu_jour',
+                'ordering': ['jour', 'mode_paiement'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='statcolisjourmodel',
+            constraint=models.UniqueConstraint(fields=('jour', 'statut', 'ville'), name='stat_colis_jour_unique'),
+        ),
+        migrations.AddField(
+            model_name='statlivraisonjourmodel',
+            name='livreur',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='statistiques', to='api.livreurmodel'),
+        ),
+        migrations.AddConstraint(
+            model_name='statrevenujourmodel',
+            constraint=models.UniqueConstraint(fields=('jour', 'mode_paiement'), name='stat_revenu_jour_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='statlivraisonjourmodel',
+            constraint=models.UniqueConstraint(fields=('jour', 'livreur'), name='stat_livraison_jour_unique'),
+        ),
+    ]
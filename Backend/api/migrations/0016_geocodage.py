@@ -0,0 +1,39 @@
+# Generated by Django 5.0 on 2026-10-18 09:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_statistiques'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodageModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cle', models.CharField(max_length=255, unique=True)),
+                ('latitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('longitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('fournisseur', models.CharField(blank=True, max_length=50)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Géocodage',
+                'verbose_name_plural': 'Géocodages',
+                'db_table': 'geocodage',
+            },
+        ),
+        migrations.AddField(
+            model_name='destinatairemodel',
+            name='latitude',
+            field=models.DecimalField(blank=True, decimal_places=6, editable=False, max_digits=9, null=True),
+        ),
+        migrations.AddField(
+            model_name='destinatairemodel',
+            name='longitude',
+            field=models.DecimalField(blank=True, decimal_places=6, editable=False, max_digits=9, null=True),
+        ),
+    ]
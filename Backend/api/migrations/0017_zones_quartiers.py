@@ -0,0 +1,61 @@
+# Generated by Django 5.0 on 2026-10-18 09:44
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Copies figées de api.services.geocodage.normaliser_lieu et api.services.zones.quartiers:
+# la migration ne charge pas le code des services (et leurs dépendances) et ne change
+# pas de résultat s'ils évoluent
+
+def normaliser_lieu(texte):
+    sans_accents = unicodedata.normalize('NFKD', texte or '').encode('ascii', 'ignore').decode()
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', sans_accents.lower()).split())
+
+
+def quartiers(texte):
+    return {quartier for quartier in (normaliser_lieu(morceau) for morceau in re.split(r'[,;\n]+', texte or ''))
+            if quartier}
+
+
+def remplir_zone_quartier(apps, schema_editor):
+    ZoneLivraisonModel = apps.get_model('api', 'ZoneLivraisonModel')
+    ZoneQuartierModel = apps.get_model('api', 'ZoneQuartierModel')
+    ZoneQuartierModel.objects.bulk_create([
+        ZoneQuartierModel(zone=zone, ville=normaliser_lieu(zone.ville), quartier=quartier)
+        for zone in ZoneLivraisonModel.objects.all()
+        for quartier in (quartiers(zone.quartiers) or {''})
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_geocodage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZoneQuartierModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ville', models.CharField(max_length=100)),
+                ('quartier', models.CharField(blank=True, max_length=100)),
+                ('zone', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='correspondances', to='api.zonelivraisonmodel')),
+            ],
+            options={
+                'verbose_name': 'Quartier de zone',
+                'verbose_name_plural': 'Quartiers de zone',
+                'db_table': 'zone_quartier',
+                'indexes': [models.Index(fields=['ville', 'quartier'], name='zone_quartier_lieu_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='zonequartiermodel',
+            constraint=models.UniqueConstraint(fields=('zone', 'ville', 'quartier'), name='zone_quartier_unique'),
+        ),
+        migrations.RunPython(remplir_zone_quartier, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.0 on 2026-10-18 09:48
+
+import django.db.models.deletion
+from datetime import datetime, time, timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+
+# Table partitionnée par jour: la clé primaire doit inclure la clé de partition
+TABLE_PARTITIONNEE = '''
+CREATE TABLE position_livreur (
+    id bigint GENERATED BY DEFAULT AS IDENTITY,
+    livreur_id bigint NOT NULL REFERENCES livreur (id) DEFERRABLE INITIALLY DEFERRED,
+    latitude numeric(9, 6) NOT NULL,
+    longitude numeric(9, 6) NOT NULL,
+    precision_metres double precision NULL,
+    vitesse_kmh double precision NULL,
+    horodatage timestamp with time zone NOT NULL,
+    date_reception timestamp with time zone NOT NULL,
+    PRIMARY KEY (id, horodatage)
+) PARTITION BY RANGE (horodatage);
+CREATE INDEX position_livreur_date_idx ON position_livreur (livreur_id, horodatage DESC);
+CREATE TABLE position_livreur_defaut PARTITION OF position_livreur DEFAULT;
+'''
+
+
+def creer_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.create_model(apps.get_model('api', 'PositionLivreurModel'))
+        return
+    schema_editor.execute(TABLE_PARTITIONNEE)
+    # Partitions de la première semaine; la commande maintenir_positions crée les suivantes
+    aujourd_hui = timezone.localdate()
+    for decalage in range(7):
+        jour = aujourd_hui + timedelta(days=decalage)
+        debut = timezone.make_aware(datetime.combine(jour, time.min))
+        schema_editor.execute(
+            f'CREATE TABLE position_livreur_p{jour:%Y%m%d} PARTITION OF position_livreur '
+            'FOR VALUES FROM (%s) TO (%s)', [debut, debut + timedelta(days=1)]
+        )
+
+
+def supprimer_table(apps, schema_editor):
+    schema_editor.delete_model(apps.get_model('api', 'PositionLivreurModel'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_zones_quartiers'),
+    ]
+
+    operations = [
+        # La table est créée en SQL (partitionnement) par creer_table
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.CreateModel(
+                name='PositionLivreurModel',
+                fields=[
+                    ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                    ('latitude', models.DecimalField(decimal_places=6, max_digits=9)),
+                    ('longitude', models.DecimalField(decimal_places=6, max_digits=9)),
+                    ('precision_metres', models.FloatField(blank=True, null=True)),
+                    ('vitesse_kmh', models.FloatField(blank=True, null=True)),
+                    ('horodatage', models.DateTimeField(help_text='Heure du relevé sur le téléphone')),
+                    ('date_reception', models.DateTimeField()),
+                    ('livreur', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='positions', to='api.livreurmodel')),
+                ],
+                options={
+                    'verbose_name': 'Position de livreur',
+                    'verbose_name_plural': 'Positions de livreurs',
+                    'db_table': 'position_livreur',
+                    'indexes': [models.Index(fields=['livreur', '-horodatage'], name='position_livreur_date_idx')],
+                },
+            ),
+        ]),
+        migrations.RunPython(creer_table, supprimer_table),
+    ]
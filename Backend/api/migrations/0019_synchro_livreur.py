@@ -0,0 +1,51 @@
+# Generated by Django 5.0 on 2026-10-18 09:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_positions_livreurs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotenceModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cle', models.CharField(max_length=100)),
+                ('resultat', models.JSONField(default=dict)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': "Clé d'idempotence",
+                'verbose_name_plural': "Clés d'idempotence",
+                'db_table': 'idempotence',
+            },
+        ),
+        migrations.AddField(
+            model_name='livraisonmodel',
+            name='date_modification',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='livraisonmodel',
+            index=models.Index(fields=['livreur', 'date_modification', 'id'], name='livraison_livreur_modif_idx'),
+        ),
+        migrations.AddField(
+            model_name='idempotencemodel',
+            name='utilisateur',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='idempotencemodel',
+            index=models.Index(fields=['date_creation'], name='idempotence_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='idempotencemodel',
+            constraint=models.UniqueConstraint(fields=('utilisateur', 'cle'), name='idempotence_cle_unique'),
+        ),
+    ]
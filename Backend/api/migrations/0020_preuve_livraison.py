@@ -0,0 +1,74 @@
+# Generated by Django 5.0 on 2026-10-18 09:53
+
+import django.db.models.deletion
+import uuid
+import zlib
+from django.conf import settings
+from django.db import migrations, models
+
+
+def compresser_signatures(apps, schema_editor):
+    LivraisonModel = apps.get_model('api', 'LivraisonModel')
+    livraisons = LivraisonModel.objects.exclude(signature_destinataire__isnull=True).exclude(signature_destinataire='')
+    lot = []
+    for livraison in livraisons.only('id', 'signature_destinataire').iterator(chunk_size=500):
+        livraison.signature_compressee = zlib.compress(livraison.signature_destinataire.encode())
+        lot.append(livraison)
+        if len(lot) == 500:
+            LivraisonModel.objects.bulk_update(lot, ['signature_compressee'])
+            lot = []
+    LivraisonModel.objects.bulk_update(lot, ['signature_compressee'])
+
+
+def decompresser_signatures(apps, schema_editor):
+    LivraisonModel = apps.get_model('api', 'LivraisonModel')
+    lot = []
+    for livraison in LivraisonModel.objects.exclude(signature_compressee__isnull=True) \
+            .only('id', 'signature_compressee').iterator(chunk_size=500):
+        livraison.signature_destinataire = zlib.decompress(livraison.signature_compressee).decode()
+        lot.append(livraison)
+        if len(lot) == 500:
+            LivraisonModel.objects.bulk_update(lot, ['signature_destinataire'])
+            lot = []
+    LivraisonModel.objects.bulk_update(lot, ['signature_destinataire'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_synchro_livreur'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='livraisonmodel',
+            name='signature_compressee',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.RunPython(compresser_signatures, decompresser_signatures),
+        migrations.RemoveField(
+            model_name='livraisonmodel',
+            name='signature_destinataire',
+        ),
+        migrations.CreateModel(
+            name='TeleversementModel',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('taille', models.PositiveBigIntegerField()),
+                ('recu', models.PositiveBigIntegerField(default=0)),
+                ('type_contenu', models.CharField(max_length=50)),
+                ('empreinte', models.CharField(blank=True, help_text='SHA-256 annoncé par le client', max_length=64)),
+                ('fichier', models.CharField(help_text='Chemin dans le stockage une fois terminé', max_length=255)),
+                ('statut', models.CharField(choices=[('EN_COURS', 'En cours'), ('TERMINE', 'Terminé')], default='EN_COURS', max_length=10)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('date_modification', models.DateTimeField(auto_now=True)),
+                ('utilisateur', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Téléversement',
+                'verbose_name_plural': 'Téléversements',
+                'db_table': 'televersement',
+                'indexes': [models.Index(fields=['date_modification'], name='televersement_date_idx')],
+            },
+        ),
+    ]
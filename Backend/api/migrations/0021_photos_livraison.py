@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 09:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_preuve_livraison'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='livraisonmodel',
+            name='photo_miniature',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to=''),
+        ),
+    ]
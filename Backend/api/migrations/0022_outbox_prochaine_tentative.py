@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_photos_livraison'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evenementoutboxmodel',
+            name='prochaine_tentative',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
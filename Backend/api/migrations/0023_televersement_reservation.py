@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 10:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0022_outbox_prochaine_tentative'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='televersementmodel',
+            name='en_ecriture',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0 on 2026-10-18 10:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0023_televersement_reservation'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='colismodel',
+            index=models.Index(fields=['date_modification'], name='colis_date_modif_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='facturemodel',
+            index=models.Index(fields=['date_paiement'], name='facture_date_paiement_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='livraisonmodel',
+            index=models.Index(fields=['date_modification'], name='livraison_date_modif_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0024_index_statistiques'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='notificationmodel',
+            name='notif_en_attente_idx',
+        ),
+        migrations.AlterField(
+            model_name='notificationmodel',
+            name='statut',
+            field=models.CharField(choices=[('EN_ATTENTE', 'En attente'), ('EN_COURS', "En cours d'envoi"), ('ENVOYEE', 'Envoyée'), ('ECHOUEE', 'Échouée')], default='EN_ATTENTE', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='notificationmodel',
+            index=models.Index(condition=models.Q(('statut__in', ['EN_ATTENTE', 'EN_COURS'])), fields=['id'], name='notif_a_envoyer_idx'),
+        ),
+    ]
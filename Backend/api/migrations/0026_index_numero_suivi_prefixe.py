@@ -0,0 +1,17 @@
+# Generated by Django 5.0 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0025_notification_en_cours'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='colismodel',
+            index=models.Index(fields=['numero_suivi'], name='colis_numero_suivi_prefixe_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
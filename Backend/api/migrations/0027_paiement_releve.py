@@ -0,0 +1,31 @@
+# Generated by Django 5.0 on 2026-10-18 10:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0026_index_numero_suivi_prefixe'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaiementReleveModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reference', models.CharField(blank=True, max_length=100, null=True, unique=True)),
+                ('montant', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('mode_paiement', models.CharField(blank=True, max_length=20, null=True)),
+                ('date_paiement', models.DateTimeField()),
+                ('date_import', models.DateTimeField(auto_now_add=True)),
+                ('facture', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='paiements_releve', to='api.facturemodel')),
+            ],
+            options={
+                'verbose_name': 'Paiement de relevé',
+                'verbose_name_plural': 'Paiements de relevé',
+                'db_table': 'paiement_releve',
+            },
+        ),
+    ]
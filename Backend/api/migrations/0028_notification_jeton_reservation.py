@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 10:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0027_paiement_releve'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationmodel',
+            name='jeton_reservation',
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+    ]
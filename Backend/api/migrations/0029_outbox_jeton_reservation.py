@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0028_notification_jeton_reservation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evenementoutboxmodel',
+            name='jeton_reservation',
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+    ]
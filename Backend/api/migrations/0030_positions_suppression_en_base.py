@@ -0,0 +1,54 @@
+# Generated by Django 5.0 on 2026-10-18 16:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Clé étrangère recréée avec ON DELETE CASCADE: la base efface les points d'un livreur supprimé
+CASCADE = '''
+ALTER TABLE position_livreur DROP CONSTRAINT {contrainte};
+ALTER TABLE position_livreur ADD CONSTRAINT position_livreur_livreur_id_fk
+    FOREIGN KEY (livreur_id) REFERENCES livreur (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED;
+'''
+SANS_CASCADE = '''
+ALTER TABLE position_livreur DROP CONSTRAINT position_livreur_livreur_id_fk;
+ALTER TABLE position_livreur ADD CONSTRAINT position_livreur_livreur_id_fk
+    FOREIGN KEY (livreur_id) REFERENCES livreur (id) DEFERRABLE INITIALLY DEFERRED;
+'''
+
+
+def _contrainte(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = 'position_livreur'::regclass AND contype = 'f' "
+            "AND confrelid = 'livreur'::regclass"
+        )
+        return cursor.fetchone()[0]
+
+
+def ajouter_cascade(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CASCADE.format(contrainte=schema_editor.quote_name(_contrainte(schema_editor))))
+
+
+def retirer_cascade(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(SANS_CASCADE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0029_outbox_jeton_reservation'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name='positionlivreurmodel',
+                name='livreur',
+                field=models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, related_name='positions',
+                                        to='api.livreurmodel'),
+            ),
+        ]),
+        migrations.RunPython(ajouter_cascade, retirer_cascade),
+    ]
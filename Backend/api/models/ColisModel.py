@@ -1,10 +1,16 @@
 """Modèle Colis"""
+import logging
+
 from django.db import models
 from django.core.validators import MinValueValidator
 from decimal import Decimal
-import random
-import string
-from api.models.TarifModel import TarifModel  # Import TarifModel
+from api.services.sequences import allocateur, chiffre_controle
+
+# Corps à 7 chiffres du numéro de suivi
+NUMERO_SUIVI_MAX = 9_999_999
+from api.services.tarif_index import tarif_index
+
+logger = logging.getLogger(__name__)
 
 
 class ColisModel(models.Model):
@@ -68,14 +74,46 @@ class ColisModel(models.Model):
         verbose_name = 'Colis'
         verbose_name_plural = 'Colis'
         ordering = ['-date_creation']
+        indexes = [
+            models.Index(fields=['-date_creation', '-id'], name='colis_date_creation_idx'),
+            models.Index(fields=['statut', '-date_creation'], name='colis_statut_date_idx'),
+            # Colis encore en circulation: la grande majorité des lectures opérationnelles
+            models.Index(fields=['-date_creation'], name='colis_non_livres_idx',
+                         condition=~models.Q(statut__in=['LIVRE', 'ANNULE'])),
+            # Filtres de /api/colis/ (ColisFilter)
+            models.Index(fields=['priorite', '-date_creation'], name='colis_priorite_date_idx'),
+            models.Index(fields=['type_colis', '-date_creation'], name='colis_type_date_idx'),
+            models.Index(fields=['date_livraison_prevue'], name='colis_livraison_prevue_idx'),
+            # ?numero_suivi_prefixe= (startswith): l'index unique (collation) ne sert pas les LIKE 'xxx%'
+            models.Index(fields=['numero_suivi'], name='colis_numero_suivi_prefixe_idx',
+                         opclasses=['varchar_pattern_ops']),
+            # Jours à recalculer par rollup_stats (statistiques.jours_modifies)
+            models.Index(fields=['date_modification'], name='colis_date_modif_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.numero_suivi:
             self.numero_suivi = self.generer_numero_suivi()
+        if not self.pk:
+            self.planifier_livraison()
         super().save(*args, **kwargs)
 
+    def zone_livraison(self):
+        """Zone de livraison de l'adresse du destinataire (index en mémoire), ou None"""
+        from api.services.zones import zone_index
+
+        return zone_index.trouver(self.destinataire.ville, self.destinataire.quartier)
+
+    def planifier_livraison(self):
+        """Renseigne date_livraison_prevue d'après le délai de la zone du destinataire"""
+        from api.services.zones import date_livraison_prevue
+
+        zone = self.zone_livraison()
+        if self.date_livraison_prevue is None and zone is not None:
+            self.date_livraison_prevue = date_livraison_prevue(zone, self.date_creation)
+
     def generer_numero_suivi(self):
-        """Génère un numéro de suivi unique: 3 lettres de la ville + 4 chiffres."""
+        """Génère un numéro de suivi unique: 3 lettres de la ville + 7 chiffres + 1 chiffre de contrôle."""
         ville = None
         try:
             ville = getattr(self.destinataire, 'ville', None)
@@ -88,14 +126,10 @@ class ColisModel(models.Model):
         else:
             prefix = 'KID'
 
-        for _ in range(10):
-            random_str = ''.join(random.choices(string.digits, k=4))
-            candidate = f"{prefix}{random_str}"
-            if not self.__class__.objects.filter(numero_suivi=candidate).exists():
-                return candidate
-
-        import uuid
-        return f"{prefix}{uuid.uuid4().hex[:4].upper()}"
+        # Compteur propre au préfixe, alloué par blocs: aucune requête de vérification.
+        # Au-delà de 7 chiffres, SequenceEpuisee plutôt qu'un numéro d'un autre format
+        corps = f"{allocateur.suivant(f'numero_suivi:{prefix}', NUMERO_SUIVI_MAX):07d}"
+        return f"{prefix}{corps}{chiffre_controle(corps)}"
 
     def calculate_tariffs(self):
         """Calcule les tarifs (montant de base, express, assurance) pour le colis."""
@@ -105,25 +139,19 @@ class ColisModel(models.Model):
 
         # 1. Calcul du montant de base et des frais de poids
         # Chercher un tarif correspondant au poids et au type de service (priorité)
+        # dans l'index en mémoire de la grille tarifaire (aucune requête SQL par colis)
         try:
-            tarif = TarifModel.objects.filter(
-                poids_min__lte=self.poids,
-                poids_max__gte=self.poids,
-                type_service=self.priorite,
-                actif=True,
-            ).first()
-
-            if tarif:
-                montant_base = tarif.prix
+            prix = tarif_index.trouver_prix(self.priorite, self.poids)
+
+            if prix is not None:
+                montant_base = prix
             else:
                 # Fallback: trouver un tarif générique ou appliquer un tarif par défaut
                 # Pour l'instant, on met un montant par défaut si aucun tarif spécifique n'est trouvé
                 # ou on pourrait lever une erreur
                 montant_base = Decimal('5000.00') # Exemple de tarif de base par défaut
-        except TarifModel.DoesNotExist:
-            montant_base = Decimal('5000.00') # Tarif par défaut si aucun tarif n'existe
-        except Exception as e:
-            print(f"Erreur lors de la recherche du tarif: {e}")
+        except Exception:
+            logger.exception('Erreur lors de la recherche du tarif du colis %s', self.numero_suivi)
             montant_base = Decimal('5000.00')
 
         # 2. Calcul des frais express (si applicable)
@@ -136,14 +164,17 @@ class ColisModel(models.Model):
         if self.assurance and self.valeur_declaree > 0:
             frais_assurance = self.valeur_declaree * Decimal('0.01')  # 1% de la valeur déclarée
 
-        # Note: Les frais de distance ne sont pas inclus ici car ils dépendraient des zones,
-        # qui ne sont pas encore directement liées au ColisModel dans la structure actuelle.
-        # Ils devront être calculés au niveau de la Livraison ou via une logique de ZoneLivraison.
+        # 4. Frais de distance selon la zone de livraison du destinataire
+        from api.services.zones import frais_distance
+
+        zone = self.zone_livraison()
+        frais_distance_zone = frais_distance(zone, self.destinataire) if zone is not None else Decimal('0.00')
 
         return {
             'montant_base': montant_base,
             'frais_express': frais_express,
             'frais_assurance': frais_assurance,
+            'frais_distance': frais_distance_zone,
             'frais_poids': Decimal('0.00'), # Placeholder for now, can be integrated into montant_base or calculated separately
         }
 
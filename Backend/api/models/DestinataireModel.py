@@ -1,5 +1,8 @@
 """Modèle Destinataire"""
 from django.db import models
+from django.db.models.functions import Upper
+from django.contrib.postgres.indexes import GinIndex
+from api.services.telephone import normaliser_telephone
 
 
 class DestinataireModel(models.Model):
@@ -7,12 +10,16 @@ class DestinataireModel(models.Model):
 
     nom_complet = models.CharField(max_length=200)
     telephone = models.CharField(max_length=20)
+    telephone_normalise = models.CharField(max_length=20, db_index=True, blank=True, editable=False)
     email = models.EmailField(blank=True, null=True)
     adresse_complete = models.TextField(null=True)
     ville = models.CharField(max_length=100)
     quartier = models.CharField(max_length=100,null=True)
     code_postal = models.CharField(max_length=20, blank=True, null=True)
     complement_adresse = models.TextField(blank=True, null=True)
+    # Renseignées après coup par le géocodage (relais de l'outbox)
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True, editable=False)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True, editable=False)
     date_creation = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -20,6 +27,19 @@ class DestinataireModel(models.Model):
         verbose_name = 'Destinataire'
         verbose_name_plural = 'Destinataires'
         ordering = ['-date_creation']
+        indexes = [
+            # Recherche par préfixe (LIKE 'xxx%') et filtre insensible à la casse sur la ville
+            models.Index(fields=['telephone'], name='destinataire_telephone_idx', opclasses=['varchar_pattern_ops']),
+            models.Index(Upper('ville'), name='destinataire_ville_idx'),
+            # Recherche approchée (pg_trgm) de /api/search/customers/
+            GinIndex(fields=['nom_complet'], name='destinataire_nom_trgm_idx', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['telephone'], name='destinataire_tel_trgm_idx', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['quartier'], name='destinataire_quartier_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.telephone_normalise = normaliser_telephone(self.telephone)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.nom_complet} - {self.ville}"
@@ -0,0 +1,36 @@
+"""Modèle Événement d'outbox"""
+from django.db import models
+
+
+class EvenementOutboxModel(models.Model):
+    """Événements écrits dans la transaction métier puis traités par le relais (relay_outbox)"""
+
+    STATUT_CHOICES = [
+        ('EN_ATTENTE', 'En attente'),
+        ('TRAITE', 'Traité'),
+        ('ECHOUE', 'Échoué'),
+    ]
+
+    type_evenement = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    statut = models.CharField(max_length=20, choices=STATUT_CHOICES, default='EN_ATTENTE')
+    tentatives = models.PositiveSmallIntegerField(default=0)
+    derniere_erreur = models.TextField(blank=True, null=True)
+    # Après un échec, l'événement n'est pas repris avant cette date (attente exponentielle)
+    prochaine_tentative = models.DateTimeField(null=True, blank=True)
+    # Relais des événements lents qui a réservé l'événement, jusqu'à prochaine_tentative
+    jeton_reservation = models.UUIDField(null=True, blank=True, editable=False)
+    date_creation = models.DateTimeField(auto_now_add=True)
+    date_traitement = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'outbox'
+        verbose_name = 'Événement outbox'
+        verbose_name_plural = 'Événements outbox'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['id'], name='outbox_en_attente_idx', condition=models.Q(statut='EN_ATTENTE')),
+        ]
+
+    def __str__(self):
+        return f"{self.type_evenement} #{self.pk} - {self.get_statut_display()}"
@@ -1,5 +1,8 @@
 """Modèle Expéditeur"""
 from django.db import models
+from django.db.models.functions import Upper
+from django.contrib.postgres.indexes import GinIndex
+from api.services.telephone import normaliser_telephone
 
 
 class ExpediteurModel(models.Model):
@@ -7,6 +10,7 @@ class ExpediteurModel(models.Model):
 
     nom_complet = models.CharField(max_length=200)
     telephone = models.CharField(max_length=20)
+    telephone_normalise = models.CharField(max_length=20, db_index=True, blank=True, editable=False)
     email = models.EmailField(blank=True, null=True)
     adresse_complete = models.TextField(null=True)
     ville = models.CharField(max_length=100,null=True)
@@ -20,6 +24,19 @@ class ExpediteurModel(models.Model):
         verbose_name = 'Expéditeur'
         verbose_name_plural = 'Expéditeurs'
         ordering = ['-date_creation']
+        indexes = [
+            # Recherche par préfixe (LIKE 'xxx%') et filtre insensible à la casse sur la ville
+            models.Index(fields=['telephone'], name='expediteur_telephone_idx', opclasses=['varchar_pattern_ops']),
+            models.Index(Upper('ville'), name='expediteur_ville_idx'),
+            # Recherche approchée (pg_trgm) de /api/search/customers/
+            GinIndex(fields=['nom_complet'], name='expediteur_nom_trgm_idx', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['telephone'], name='expediteur_tel_trgm_idx', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['quartier'], name='expediteur_quartier_trgm_idx', opclasses=['gin_trgm_ops']),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.telephone_normalise = normaliser_telephone(self.telephone)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.nom_complet} - {self.ville}"
@@ -1,8 +1,11 @@
 """Modèle Facture"""
 from django.db import models
-import random
-import string
+from django.utils import timezone
 from decimal import Decimal # Import Decimal
+from api.services.sequences import allocateur
+
+# 7 chiffres après FACT + année
+NUMERO_FACTURE_MAX = 9_999_999
 
 
 class FactureModel(models.Model):
@@ -48,6 +51,11 @@ class FactureModel(models.Model):
         verbose_name = 'Facture'
         verbose_name_plural = 'Factures'
         ordering = ['-date_emission']
+        indexes = [
+            models.Index(fields=['-date_emission', '-id'], name='facture_date_emission_idx'),
+            # Paiements récents (statistiques.jours_modifies)
+            models.Index(fields=['date_paiement'], name='facture_date_paiement_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.numero_facture:
@@ -55,22 +63,33 @@ class FactureModel(models.Model):
 
         # Calculate tariffs from the associated colis
         if self.colis and not self.pk: # Only calculate on initial creation of invoice
-            calculated_tariffs = self.colis.calculate_tariffs()
-            self.montant_base = calculated_tariffs.get('montant_base', Decimal('0.00'))
-            self.frais_express = calculated_tariffs.get('frais_express', Decimal('0.00'))
-            self.frais_assurance = calculated_tariffs.get('frais_assurance', Decimal('0.00'))
-            self.frais_poids = calculated_tariffs.get('frais_poids', Decimal('0.00')) # Ensure frais_poids is included
-
-            # Calculate total amount
-            self.montant_total = self.montant_base + self.frais_distance +                                  self.frais_poids + self.frais_assurance + self.frais_express
+            self.appliquer_tarifs()
 
         super().save(*args, **kwargs)
 
+    def appliquer_tarifs(self):
+        """Renseigne les montants à partir des tarifs du colis associé"""
+        calculated_tariffs = self.colis.calculate_tariffs()
+        self.montant_base = calculated_tariffs.get('montant_base', Decimal('0.00'))
+        self.frais_express = calculated_tariffs.get('frais_express', Decimal('0.00'))
+        self.frais_assurance = calculated_tariffs.get('frais_assurance', Decimal('0.00'))
+        self.frais_distance = calculated_tariffs.get('frais_distance', Decimal('0.00'))
+        self.frais_poids = calculated_tariffs.get('frais_poids', Decimal('0.00')) # Ensure frais_poids is included
+
+        # Calculate total amount
+        self.montant_total = self.montant_base + self.frais_distance + \
+                             self.frais_poids + self.frais_assurance + self.frais_express
+
     def generer_numero_facture(self):
-        """Génère un numéro de facture unique"""
+        """Génère un numéro de facture unique: FACT + année + 7 chiffres.
+
+        La numérotation repart à 1 chaque année et est allouée par blocs:
+        aucune requête de vérification ni nouvel essai sur conflit. Lève
+        SequenceEpuisee au-delà de NUMERO_FACTURE_MAX factures dans l'année.
+        """
         prefix = 'FACT'
-        random_str = ''.join(random.choices(string.digits, k=8))
-        return f"{prefix}{random_str}"
+        annee = timezone.localdate().year
+        return f"{prefix}{annee}{allocateur.suivant(f'numero_facture:{annee}', NUMERO_FACTURE_MAX):07d}"
 
     def __str__(self):
         return f"{self.numero_facture} - {self.montant_total} FCFA"
@@ -0,0 +1,24 @@
+"""Modèle Géocodage"""
+from django.db import models
+
+
+class GeocodageModel(models.Model):
+    """Cache persistant des adresses géocodées.
+
+    Une adresse introuvable est aussi enregistrée (latitude et longitude
+    nulles): elle n'est pas redemandée au fournisseur.
+    """
+
+    cle = models.CharField(max_length=255, unique=True)
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    fournisseur = models.CharField(max_length=50, blank=True)
+    date_creation = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'geocodage'
+        verbose_name = 'Géocodage'
+        verbose_name_plural = 'Géocodages'
+
+    def __str__(self):
+        return f"{self.cle} ({self.latitude}, {self.longitude})"
@@ -0,0 +1,29 @@
+"""Modèle Idempotence"""
+from django.db import models
+
+
+class IdempotenceModel(models.Model):
+    """Résultat des opérations déjà appliquées, par clé d'idempotence du client.
+
+    Une opération renvoyée (réseau mobile instable) retrouve son résultat
+    au lieu d'être appliquée une seconde fois.
+    """
+
+    utilisateur = models.ForeignKey('UserModel', on_delete=models.CASCADE, related_name='+')
+    cle = models.CharField(max_length=100)
+    resultat = models.JSONField(default=dict)
+    date_creation = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'idempotence'
+        verbose_name = "Clé d'idempotence"
+        verbose_name_plural = "Clés d'idempotence"
+        constraints = [
+            models.UniqueConstraint(fields=['utilisateur', 'cle'], name='idempotence_cle_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['date_creation'], name='idempotence_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.utilisateur_id}:{self.cle}"
@@ -1,4 +1,6 @@
 """Modèle Livraison"""
+import zlib
+
 from django.db import models
 
 
@@ -27,8 +29,12 @@ class LivraisonModel(models.Model):
     motif_echec = models.TextField(blank=True, null=True)
 
     # Preuve de livraison
-    signature_destinataire = models.TextField(blank=True, null=True)
+    # Signature telle qu'envoyée par l'application (base64, SVG...), compressée par zlib
+    signature_compressee = models.BinaryField(blank=True, null=True, editable=False)
     photo_livraison = models.ImageField(upload_to='livraisons/', blank=True, null=True)
+    # Rendus WebP nommés par l'empreinte de l'original (services/photos.py); photo_livraison devient le
+    # rendu d'affichage
+    photo_miniature = models.ImageField(blank=True, null=True, editable=False)
     commentaire = models.TextField(blank=True, null=True)
 
     # Géolocalisation
@@ -36,12 +42,31 @@ class LivraisonModel(models.Model):
     longitude_livraison = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
 
     date_creation = models.DateTimeField(auto_now_add=True)
+    # Curseur de la synchronisation mobile: bulk_update et update() doivent le renseigner eux-mêmes
+    date_modification = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'livraison'
         verbose_name = 'Livraison'
         verbose_name_plural = 'Livraisons'
         ordering = ['-date_assignation']
+        indexes = [
+            models.Index(fields=['livreur', 'statut'], name='livraison_livreur_statut_idx'),
+            models.Index(fields=['-date_assignation', '-id'], name='livraison_date_assign_idx'),
+            models.Index(fields=['livreur', 'date_modification', 'id'], name='livraison_livreur_modif_idx'),
+            # Livraisons modifiées depuis le dernier rollup (statistiques.jours_modifies)
+            models.Index(fields=['date_modification'], name='livraison_date_modif_idx'),
+        ]
+
+    @property
+    def signature_destinataire(self):
+        if self.signature_compressee is None:
+            return None
+        return zlib.decompress(self.signature_compressee).decode()
+
+    @signature_destinataire.setter
+    def signature_destinataire(self, texte):
+        self.signature_compressee = zlib.compress(texte.encode()) if texte else None
 
     def __str__(self):
         return f"Livraison {self.colis.numero_suivi} - {self.livreur.matricule}"
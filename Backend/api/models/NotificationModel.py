@@ -13,6 +13,7 @@ class NotificationModel(models.Model):
 
     STATUT_CHOICES = [
         ('EN_ATTENTE', 'En attente'),
+        ('EN_COURS', "En cours d'envoi"),
         ('ENVOYEE', 'Envoyée'),
         ('ECHOUEE', 'Échouée'),
     ]
@@ -27,11 +28,24 @@ class NotificationModel(models.Model):
     date_envoi = models.DateTimeField(null=True, blank=True)
     date_lecture = models.DateTimeField(null=True, blank=True)
 
+    # Envoi par le dispatcheur (commande dispatch_notifications)
+    tentatives = models.PositiveSmallIntegerField(default=0)
+    prochaine_tentative = models.DateTimeField(null=True, blank=True)
+    derniere_erreur = models.TextField(blank=True, null=True)
+    # Dispatcheur qui détient la notification EN_COURS: seul lui peut enregistrer le résultat
+    jeton_reservation = models.UUIDField(null=True, blank=True, editable=False)
+
     class Meta:
         db_table = 'notification'
         verbose_name = 'Notification'
         verbose_name_plural = 'Notifications'
         ordering = ['-date_envoi']
+        indexes = [
+            models.Index(fields=['statut', '-date_envoi'], name='notif_statut_date_idx'),
+            # File d'attente des notifications à envoyer (et des envois interrompus à reprendre)
+            models.Index(fields=['id'], name='notif_a_envoyer_idx',
+                         condition=models.Q(statut__in=['EN_ATTENTE', 'EN_COURS'])),
+        ]
 
     def __str__(self):
         return f"{self.type_notification} - {self.colis.numero_suivi}"
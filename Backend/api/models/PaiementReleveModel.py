@@ -0,0 +1,25 @@
+"""Modèle PaiementReleve"""
+from django.db import models
+
+
+class PaiementReleveModel(models.Model):
+    """Ligne de relevé de paiement déjà appliquée à une facture.
+
+    La référence de transaction (Mobile Money, banque) est unique: une ligne
+    déjà vue n'est pas appliquée une seconde fois si le relevé est réimporté.
+    """
+
+    reference = models.CharField(max_length=100, unique=True, null=True, blank=True)
+    facture = models.ForeignKey('FactureModel', on_delete=models.CASCADE, related_name='paiements_releve')
+    montant = models.DecimalField(max_digits=10, decimal_places=2)
+    mode_paiement = models.CharField(max_length=20, null=True, blank=True)
+    date_paiement = models.DateTimeField()
+    date_import = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'paiement_releve'
+        verbose_name = 'Paiement de relevé'
+        verbose_name_plural = 'Paiements de relevé'
+
+    def __str__(self):
+        return f"{self.reference or '-'} -> {self.facture_id}"
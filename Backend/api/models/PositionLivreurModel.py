@@ -0,0 +1,33 @@
+"""Modèle Position de livreur"""
+from django.db import models
+
+
+class PositionLivreurModel(models.Model):
+    """Points GPS envoyés par les livreurs, en ajout seul.
+
+    Sous PostgreSQL la table est partitionnée par jour sur horodatage (voir la
+    migration 0018 et la commande maintenir_positions): la rétention supprime
+    des partitions entières au lieu de lignes. Les points d'un livreur
+    supprimé sont effacés par la base (ON DELETE CASCADE, migration 0030),
+    sans que Django ne les charge; ailleurs par le signal
+    supprimer_positions_livreur, en une requête.
+    """
+
+    livreur = models.ForeignKey('LivreurModel', on_delete=models.DO_NOTHING, related_name='positions')
+    latitude = models.DecimalField(max_digits=9, decimal_places=6)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6)
+    precision_metres = models.FloatField(null=True, blank=True)
+    vitesse_kmh = models.FloatField(null=True, blank=True)
+    horodatage = models.DateTimeField(help_text="Heure du relevé sur le téléphone")
+    date_reception = models.DateTimeField()
+
+    class Meta:
+        db_table = 'position_livreur'
+        verbose_name = 'Position de livreur'
+        verbose_name_plural = 'Positions de livreurs'
+        indexes = [
+            models.Index(fields=['livreur', '-horodatage'], name='position_livreur_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.livreur_id} @ {self.horodatage}: {self.latitude}, {self.longitude}"
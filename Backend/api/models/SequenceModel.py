@@ -0,0 +1,17 @@
+"""Modèle Séquence"""
+from django.db import models
+
+
+class SequenceModel(models.Model):
+    """Compteurs de numérotation (numéros de suivi, factures) alloués par blocs"""
+
+    nom = models.CharField(max_length=100, unique=True)
+    valeur = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'sequence_numerotation'
+        verbose_name = 'Séquence'
+        verbose_name_plural = 'Séquences'
+
+    def __str__(self):
+        return f"{self.nom} - {self.valeur}"
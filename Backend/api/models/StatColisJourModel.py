@@ -0,0 +1,23 @@
+"""Modèle Statistique journalière des colis"""
+from django.db import models
+
+
+class StatColisJourModel(models.Model):
+    """Nombre de colis par jour de création, statut et ville de destination (commande rollup_stats)"""
+
+    jour = models.DateField()
+    statut = models.CharField(max_length=20)
+    ville = models.CharField(max_length=100)
+    nombre = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'stat_colis_jour'
+        verbose_name = 'Statistique colis'
+        verbose_name_plural = 'Statistiques colis'
+        ordering = ['jour', 'statut', 'ville']
+        constraints = [
+            models.UniqueConstraint(fields=['jour', 'statut', 'ville'], name='stat_colis_jour_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.jour} - {self.statut} - {self.ville}: {self.nombre}"
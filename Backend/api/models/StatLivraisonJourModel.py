@@ -0,0 +1,24 @@
+"""Modèle Statistique journalière des livraisons"""
+from django.db import models
+
+
+class StatLivraisonJourModel(models.Model):
+    """Livraisons par jour d'assignation et par livreur (commande rollup_stats)"""
+
+    jour = models.DateField()
+    livreur = models.ForeignKey('LivreurModel', on_delete=models.CASCADE, related_name='statistiques')
+    nombre = models.PositiveIntegerField(default=0)
+    terminees = models.PositiveIntegerField(default=0)
+    echouees = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'stat_livraison_jour'
+        verbose_name = 'Statistique livraisons'
+        verbose_name_plural = 'Statistiques livraisons'
+        ordering = ['jour', 'livreur']
+        constraints = [
+            models.UniqueConstraint(fields=['jour', 'livreur'], name='stat_livraison_jour_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.jour} - {self.livreur_id}: {self.terminees}/{self.nombre}"
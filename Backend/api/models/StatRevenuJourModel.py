@@ -0,0 +1,24 @@
+"""Modèle Statistique journalière du chiffre d'affaires"""
+from django.db import models
+
+
+class StatRevenuJourModel(models.Model):
+    """Montants facturés par jour d'émission et mode de paiement (commande rollup_stats)"""
+
+    jour = models.DateField()
+    mode_paiement = models.CharField(max_length=20, blank=True, help_text="vide si non renseigné")
+    nombre_factures = models.PositiveIntegerField(default=0)
+    montant_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    montant_paye = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = 'stat_revenu_jour'
+        verbose_name = 'Statistique revenus'
+        verbose_name_plural = 'Statistiques revenus'
+        ordering = ['jour', 'mode_paiement']
+        constraints = [
+            models.UniqueConstraint(fields=['jour', 'mode_paiement'], name='stat_revenu_jour_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.jour} - {self.mode_paiement or '-'}: {self.montant_total} FCFA"
@@ -29,6 +29,10 @@ class SuiviModel(models.Model):
         verbose_name = 'Suivi'
         verbose_name_plural = 'Suivis'
         ordering = ['-date_creation']
+        indexes = [
+            models.Index(fields=['colis', '-date_creation'], name='suivi_colis_date_idx'),
+            models.Index(fields=['-date_creation', '-id'], name='suivi_date_creation_idx'),
+        ]
 
     def __str__(self):
         return f"{self.colis.numero_suivi} - {self.get_statut_display()}"
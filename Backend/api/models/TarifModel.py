@@ -25,6 +25,10 @@ class TarifModel(models.Model):
         db_table = 'tarif'
         verbose_name = 'Tarif'
         verbose_name_plural = 'Tarifs'
+        indexes = [
+            models.Index(fields=['type_service', 'poids_min', 'poids_max'], name='tarif_service_poids_idx',
+                         condition=models.Q(actif=True)),
+        ]
 
     def __str__(self):
         return f"{self.get_type_service_display()} - {self.poids_min}-{self.poids_max}kg - {self.prix} FCFA"
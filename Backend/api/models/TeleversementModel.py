@@ -0,0 +1,41 @@
+"""Modèle Téléversement"""
+import uuid
+
+from django.db import models
+
+
+class TeleversementModel(models.Model):
+    """Fichier envoyé par morceaux, reprenable après une coupure réseau.
+
+    Les octets sont écrits directement dans le stockage (fichier .part);
+    `recu` est la position à laquelle le client doit reprendre.
+    """
+
+    STATUT_CHOICES = [
+        ('EN_COURS', 'En cours'),
+        ('TERMINE', 'Terminé'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    utilisateur = models.ForeignKey('UserModel', on_delete=models.CASCADE, related_name='+')
+    taille = models.PositiveBigIntegerField()
+    recu = models.PositiveBigIntegerField(default=0)
+    type_contenu = models.CharField(max_length=50)
+    empreinte = models.CharField(max_length=64, blank=True, help_text="SHA-256 annoncé par le client")
+    fichier = models.CharField(max_length=255, help_text="Chemin dans le stockage une fois terminé")
+    statut = models.CharField(max_length=10, choices=STATUT_CHOICES, default='EN_COURS')
+    # Réservation du fichier par la requête qui écrit un morceau (aucune transaction ouverte pendant l'écriture)
+    en_ecriture = models.DateTimeField(null=True, blank=True)
+    date_creation = models.DateTimeField(auto_now_add=True)
+    date_modification = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'televersement'
+        verbose_name = 'Téléversement'
+        verbose_name_plural = 'Téléversements'
+        indexes = [
+            models.Index(fields=['date_modification'], name='televersement_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.fichier} ({self.recu}/{self.taille})"
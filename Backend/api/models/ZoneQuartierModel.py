@@ -0,0 +1,28 @@
+"""Modèle Quartier de zone"""
+from django.db import models
+
+
+class ZoneQuartierModel(models.Model):
+    """Quartiers couverts par une zone de livraison, normalisés.
+
+    Tenu à jour depuis ZoneLivraisonModel.quartiers par les signaux; un
+    quartier vide couvre toute la ville.
+    """
+
+    zone = models.ForeignKey('ZoneLivraisonModel', on_delete=models.CASCADE, related_name='correspondances')
+    ville = models.CharField(max_length=100)
+    quartier = models.CharField(max_length=100, blank=True)
+
+    class Meta:
+        db_table = 'zone_quartier'
+        verbose_name = 'Quartier de zone'
+        verbose_name_plural = 'Quartiers de zone'
+        constraints = [
+            models.UniqueConstraint(fields=['zone', 'ville', 'quartier'], name='zone_quartier_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['ville', 'quartier'], name='zone_quartier_lieu_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.ville} / {self.quartier or '*'} -> {self.zone_id}"
@@ -11,6 +11,17 @@ from .FactureModel import FactureModel
 from .ZoneLivraisonModel import ZoneLivraisonModel
 from .NotificationModel import NotificationModel
 from .TarifModel import TarifModel
+from .SequenceModel import SequenceModel
+from .EvenementOutboxModel import EvenementOutboxModel
+from .StatColisJourModel import StatColisJourModel
+from .StatRevenuJourModel import StatRevenuJourModel
+from .StatLivraisonJourModel import StatLivraisonJourModel
+from .GeocodageModel import GeocodageModel
+from .ZoneQuartierModel import ZoneQuartierModel
+from .PositionLivreurModel import PositionLivreurModel
+from .IdempotenceModel import IdempotenceModel
+from .TeleversementModel import TeleversementModel
+from .PaiementReleveModel import PaiementReleveModel
 
 __all__ = [
     'UserModel',
@@ -25,4 +36,15 @@ __all__ = [
     'ZoneLivraisonModel',
     'NotificationModel',
     'TarifModel',
+    'SequenceModel',
+    'EvenementOutboxModel',
+    'StatColisJourModel',
+    'StatRevenuJourModel',
+    'StatLivraisonJourModel',
+    'GeocodageModel',
+    'ZoneQuartierModel',
+    'PositionLivreurModel',
+    'IdempotenceModel',
+    'TeleversementModel',
+    'PaiementReleveModel',
 ]
@@ -0,0 +1,45 @@
+"""Classes de pagination de l'API"""
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+
+class PaginationStandard(LimitOffsetPagination):
+    """Pagination limit/offset pour les petites tables d'administration"""
+
+    default_limit = 50
+    max_limit = 500
+
+
+class PaginationCurseur(CursorPagination):
+    """Pagination par curseur (keyset): une page profonde coûte autant que la première.
+
+    Le tri porte sur une colonne indexée, complétée par l'identifiant pour que
+    le curseur reste stable entre deux lignes de même date.
+    """
+
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-date_creation', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        # ?ordering= (OrderingFilter) remplace le tri par défaut: l'identifiant est rajouté en
+        # dernier, dans le sens de la dernière clé, sans quoi des lignes de même date seraient
+        # sautées ou répétées d'une page à l'autre
+        ordering = tuple(super().get_ordering(request, queryset, view))
+        if not any(champ.lstrip('-') in ('id', 'pk') for champ in ordering):
+            ordering += ('-id' if ordering[-1].startswith('-') else 'id',)
+        return ordering
+
+
+class PaginationCurseurLivraison(PaginationCurseur):
+    ordering = ('-date_assignation', '-id')
+
+
+class PaginationCurseurNotification(PaginationCurseur):
+    # date_envoi reste NULL tant que la notification n'est pas partie: elle ne
+    # peut pas servir de curseur. L'identifiant suit l'ordre de création.
+    ordering = ('-id',)
+
+
+class PaginationCurseurFacture(PaginationCurseur):
+    ordering = ('-date_emission', '-id')
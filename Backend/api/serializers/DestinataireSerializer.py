@@ -1,6 +1,7 @@
 """Serializer pour DestinataireModel"""
 from rest_framework import serializers
 from api.models.DestinataireModel import DestinataireModel
+from api.services.clients import obtenir_ou_creer_client
 
 
 class DestinataireSerializer(serializers.ModelSerializer):
@@ -11,4 +12,7 @@ class DestinataireSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ['date_creation']
 
-
+    def create(self, validated_data):
+        # Un client qui revient (même téléphone, nom proche) réutilise sa fiche
+        client, _ = obtenir_ou_creer_client(DestinataireModel, validated_data)
+        return client
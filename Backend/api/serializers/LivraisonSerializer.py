@@ -10,10 +10,20 @@ class LivraisonSerializer(serializers.ModelSerializer):
     livreur_nom = serializers.CharField(source='livreur.utilisateur.get_full_name', read_only=True)
     vehicule_immatriculation = serializers.CharField(source='vehicule.immatriculation', read_only=True)
     statut_display = serializers.CharField(source='get_statut_display', read_only=True)
+    # Propriété du modèle: stockée compressée (signature_compressee)
+    signature_destinataire = serializers.CharField(required=False, allow_null=True, allow_blank=True)
 
     class Meta:
         model = LivraisonModel
-        fields = '__all__'
+        # La signature est exposée décompressée (signature_destinataire)
+        exclude = ['signature_compressee']
         read_only_fields = ['date_assignation', 'date_creation']
 
 
+class LivraisonListSerializer(LivraisonSerializer):
+    """Serializer allégé pour les listes: miniature de la photo seulement, sans signature"""
+
+    signature_destinataire = None
+
+    class Meta(LivraisonSerializer.Meta):
+        exclude = ['signature_compressee', 'photo_livraison']
@@ -6,7 +6,7 @@ from .ColisSerializer import ColisListSerializer, ColisDetailSerializer
 from .SuiviSerializer import SuiviSerializer
 from .LivreurSerializer import LivreurSerializer
 from .VehiculeSerializer import VehiculeSerializer
-from .LivraisonSerializer import LivraisonSerializer
+from .LivraisonSerializer import LivraisonSerializer, LivraisonListSerializer
 from .FactureSerializer import FactureSerializer
 from .ZoneLivraisonSerializer import ZoneLivraisonSerializer
 from .NotificationSerializer import NotificationSerializer
@@ -23,6 +23,7 @@ __all__ = [
     'LivreurSerializer',
     'VehiculeSerializer',
     'LivraisonSerializer',
+    'LivraisonListSerializer',
     'FactureSerializer',
     'ZoneLivraisonSerializer',
     'NotificationSerializer',
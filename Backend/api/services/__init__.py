@@ -0,0 +1 @@
+"""Services métier partagés par les vues, les modèles et les commandes"""
@@ -0,0 +1,162 @@
+"""Affectation automatique des colis en attente aux livreurs disponibles"""
+import heapq
+import re
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, IntegerField, Value, When
+
+from api.models import ColisModel, LivraisonModel, LivreurModel, VehiculeModel
+from api.services.clients import normaliser_nom
+
+ORDRE_PRIORITE = {'URGENTE': 0, 'EXPRESS': 1, 'NORMALE': 2}
+LIVRAISONS_ACTIVES = ('ASSIGNEE', 'EN_COURS')
+STATUTS_VEHICULE = ('DISPONIBLE', 'EN_SERVICE')
+
+
+def zones(texte):
+    """'Abidjan, Cocody / Riviéra' -> {'abidjan', 'cocody', 'riviera'}"""
+    return {zone for zone in (normaliser_nom(morceau) for morceau in re.split(r'[,;/\n]+', texte or '')) if zone}
+
+
+def volume(colis):
+    """Volume en m³ (dimensions saisies en cm); 0 si une dimension manque"""
+    if None in (colis.longueur, colis.largeur, colis.hauteur):
+        return Decimal(0)
+    return colis.longueur * colis.largeur * colis.hauteur / Decimal(1_000_000)
+
+
+class _Tournee:
+    """Capacité restante d'un couple livreur / véhicule pendant le calcul"""
+
+    __slots__ = ('livreur', 'vehicule', 'poids', 'volume', 'zones', 'version')
+
+    def __init__(self, livreur, vehicule, charge_poids, charge_volume):
+        self.livreur = livreur
+        self.vehicule = vehicule
+        self.poids = vehicule.capacite_charge - charge_poids
+        self.volume = vehicule.volume_utile - charge_volume
+        self.zones = zones(livreur.zone_intervention)
+        self.version = 0
+
+
+class Affectateur:
+    """Répartit un lot de colis entre les livreurs, en mémoire puis en une transaction.
+
+    Les colis sont traités par priorité (URGENTE, EXPRESS, NORMALE) puis par
+    ancienneté. Chaque zone d'intervention a son tas de livreurs, trié par
+    capacité restante décroissante: un colis va au livreur le moins chargé de
+    son quartier, sinon de sa ville, qui peut encore le porter (poids et
+    volume). Les entrées périmées des tas sont ignorées à la lecture.
+    """
+
+    # Livreurs examinés au plus par tas lorsque le volume ne suffit pas
+    CANDIDATS_MAX = 8
+
+    def affecter(self, colis_ids=None, limite=5000, simulation=False):
+        with transaction.atomic():
+            tournees = self._tournees()
+            colis_list = self._colis(colis_ids, limite)
+            tas = self._tas(tournees)
+            affectations, non_affectes = [], []
+            for colis in colis_list:
+                tournee = self._choisir(colis, tas)
+                if tournee is None:
+                    non_affectes.append(colis)
+                else:
+                    affectations.append(LivraisonModel(colis=colis, livreur=tournee.livreur, vehicule=tournee.vehicule))
+            if not simulation:
+                LivraisonModel.objects.bulk_create(affectations)
+        return affectations, non_affectes
+
+    def _tournees(self):
+        """Livreurs disponibles et leur plus grand véhicule, verrouillé jusqu'à la fin de l'affectation.
+
+        Seules les lignes des véhicules sont verrouillées (of=self): la jointure
+        sur le livreur ne doit pas bloquer l'édition de sa fiche ni sa synchro.
+        """
+        vehicules = {}
+        for vehicule in (
+            VehiculeModel.objects.select_for_update(of=('self',))
+            .filter(statut__in=STATUTS_VEHICULE, livreur_attribue__statut='DISPONIBLE', livreur_attribue__actif=True)
+            .order_by('id')
+        ):
+            actuel = vehicules.get(vehicule.livreur_attribue_id)
+            if actuel is None or vehicule.capacite_charge > actuel.capacite_charge:
+                vehicules[vehicule.livreur_attribue_id] = vehicule
+        livreurs = LivreurModel.objects.in_bulk(vehicules)
+
+        # Charge déjà embarquée: livraisons assignées ou en cours de chaque véhicule
+        charges = {}
+        for livraison in (
+            LivraisonModel.objects.filter(vehicule__in=vehicules.values(), statut__in=LIVRAISONS_ACTIVES)
+            .select_related('colis').only('vehicule_id', 'colis__poids', 'colis__longueur',
+                                          'colis__largeur', 'colis__hauteur')
+        ):
+            poids, vol = charges.get(livraison.vehicule_id, (Decimal(0), Decimal(0)))
+            charges[livraison.vehicule_id] = (poids + (livraison.colis.poids or 0), vol + volume(livraison.colis))
+        return [
+            _Tournee(livreurs[livreur_id], vehicule, *charges.get(vehicule.id, (Decimal(0), Decimal(0))))
+            for livreur_id, vehicule in vehicules.items()
+        ]
+
+    def _colis(self, colis_ids, limite):
+        """Colis en attente sans livraison active, par priorité; ceux verrouillés ailleurs sont sautés"""
+        queryset = ColisModel.objects.filter(statut='EN_ATTENTE').exclude(
+            livraisons__statut__in=LIVRAISONS_ACTIVES
+        )
+        if colis_ids is not None:
+            queryset = queryset.filter(pk__in=colis_ids)
+        rang = Case(*(When(priorite=priorite, then=Value(rang)) for priorite, rang in ORDRE_PRIORITE.items()),
+                    default=Value(len(ORDRE_PRIORITE)), output_field=IntegerField())
+        return list(
+            queryset.select_for_update(skip_locked=True, of=('self',))
+            .select_related('destinataire')
+            .only('numero_suivi', 'poids', 'longueur', 'largeur', 'hauteur', 'destinataire__ville',
+                  'destinataire__quartier')
+            .order_by(rang, 'date_creation', 'id')[:limite]
+        )
+
+    def _tas(self, tournees):
+        tas = {}
+        for tournee in tournees:
+            self._empiler(tas, tournee)
+        return tas
+
+    def _empiler(self, tas, tournee):
+        entree = (-tournee.poids, tournee.vehicule.id, tournee.version, tournee)
+        for zone in tournee.zones:
+            heapq.heappush(tas.setdefault(zone, []), entree)
+
+    def _choisir(self, colis, tas):
+        poids = colis.poids or Decimal(0)
+        vol = volume(colis)
+        for zone in (normaliser_nom(colis.destinataire.quartier), normaliser_nom(colis.destinataire.ville)):
+            tournee = self._extraire(tas.get(zone), poids, vol)
+            if tournee is not None:
+                tournee.poids -= poids
+                tournee.volume -= vol
+                tournee.version += 1
+                self._empiler(tas, tournee)
+                return tournee
+        return None
+
+    def _extraire(self, file, poids, vol):
+        """Meilleur livreur de la file qui peut porter le colis, ou None"""
+        ecartes = []
+        trouve = None
+        while file and len(ecartes) < self.CANDIDATS_MAX:
+            entree = heapq.heappop(file)
+            tournee = entree[3]
+            if entree[2] != tournee.version:
+                continue  # entrée périmée: une plus récente est dans le tas
+            if tournee.poids < poids:
+                ecartes.append(entree)
+                break  # tas trié par poids restant: aucun autre livreur ne convient
+            if tournee.volume >= vol:
+                trouve = tournee
+                break
+            ecartes.append(entree)
+        for entree in ecartes:
+            heapq.heappush(file, entree)
+        return trouve
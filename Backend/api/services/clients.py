@@ -0,0 +1,143 @@
+"""Déduplication des expéditeurs et destinataires"""
+import unicodedata
+from difflib import SequenceMatcher
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from api.models import ColisModel
+from api.services.telephone import normaliser_telephone
+
+# Champs complétés sur la fiche conservée lorsqu'ils y sont vides
+CHAMPS_COMPLETABLES = ('email', 'adresse_complete', 'ville', 'quartier', 'code_postal', 'complement_adresse')
+# Deux fiches dont l'un de ces champs diffère (renseigné des deux côtés) sont deux adresses distinctes
+CHAMPS_ADRESSE = ('adresse_complete', 'ville', 'quartier')
+
+
+def normaliser_nom(nom):
+    """'  Kouamé  KONAN ' -> 'kouame konan'"""
+    sans_accents = unicodedata.normalize('NFKD', nom or '').encode('ascii', 'ignore').decode()
+    return ' '.join(sans_accents.lower().split())
+
+
+def noms_similaires(nom_a, nom_b):
+    ratio = SequenceMatcher(None, normaliser_nom(nom_a), normaliser_nom(nom_b)).ratio()
+    return ratio >= settings.CLIENTS_SEUIL_SIMILARITE_NOM
+
+
+def _valeur(source, champ):
+    return source.get(champ) if isinstance(source, dict) else getattr(source, champ)
+
+
+def memes_adresses(client_a, client_b):
+    """Vrai si aucun champ d'adresse renseigné des deux côtés ne diffère (casse et accents ignorés)"""
+    for champ in CHAMPS_ADRESSE:
+        valeur_a, valeur_b = _valeur(client_a, champ), _valeur(client_b, champ)
+        if valeur_a and valeur_b and normaliser_nom(valeur_a) != normaliser_nom(valeur_b):
+            return False
+    return True
+
+
+def _completer(client, source):
+    """Copie sur client les champs renseignés de source qui y sont vides; retourne les champs modifiés"""
+    modifies = []
+    for champ in CHAMPS_COMPLETABLES:
+        valeur = _valeur(source, champ)
+        if valeur not in (None, '') and getattr(client, champ) in (None, ''):
+            setattr(client, champ, valeur)
+            modifies.append(champ)
+    return modifies
+
+
+def obtenir_ou_creer_client(modele, donnees):
+    """Retourne (client, cree): la fiche existante de même téléphone, de nom proche et de même adresse,
+    sinon une nouvelle.
+
+    Une nouvelle adresse donne une nouvelle fiche plutôt que de modifier
+    l'ancienne: les colis déjà en route vers l'ancienne adresse n'en changent pas.
+    """
+    telephone_normalise = normaliser_telephone(donnees.get('telephone'))
+    if telephone_normalise:
+        candidats = modele.objects.filter(telephone_normalise=telephone_normalise).order_by('date_creation', 'id')
+        for client in candidats:
+            if noms_similaires(client.nom_complet, donnees.get('nom_complet')) and memes_adresses(client, donnees):
+                modifies = _completer(client, donnees)
+                if modifies:
+                    client.save(update_fields=modifies)
+                return client, False
+    return modele.objects.create(**donnees), True
+
+
+def _regrouper(clients):
+    """Regroupe des clients de même téléphone par nom proche et même adresse; le plus ancien de chaque
+    groupe est conservé"""
+    groupes = []
+    for client in clients:
+        for groupe in groupes:
+            if noms_similaires(groupe[0].nom_complet, client.nom_complet) \
+                    and all(memes_adresses(membre, client) for membre in groupe):
+                groupe.append(client)
+                break
+        else:
+            groupes.append([client])
+    return [groupe for groupe in groupes if len(groupe) > 1]
+
+
+def dedupliquer(modele, champ_colis, taille_lot=1000, simulation=False):
+    """Fusionne les doublons de modele et repointe ColisModel.<champ_colis> vers la fiche conservée.
+
+    Les colis sont repointés par lots de taille_lot, chaque lot dans sa propre
+    transaction courte, pour ne pas verrouiller la table colis longtemps. La
+    dernière étape verrouille les doublons (un colis ne peut plus y être
+    rattaché), repointe les colis créés entre-temps et supprime les doublons,
+    dans une même transaction.
+    Retourne {'groupes', 'fusionnes', 'colis_repointes'}.
+    """
+    # Import local: livraisons dépend (via evenements et geocodage) de ce module
+    from api.services.livraisons import signaler_modification
+
+    rapport = {'groupes': 0, 'fusionnes': 0, 'colis_repointes': 0}
+    telephones = (
+        modele.objects.exclude(telephone_normalise='')
+        .values('telephone_normalise').annotate(nombre=Count('id')).filter(nombre__gt=1)
+        .values_list('telephone_normalise', flat=True)
+    )
+    for telephone_normalise in list(telephones):
+        clients = modele.objects.filter(telephone_normalise=telephone_normalise).order_by('date_creation', 'id')
+        for conserve, *doublons in _regrouper(list(clients)):
+            rapport['groupes'] += 1
+            rapport['fusionnes'] += len(doublons)
+            if simulation:
+                continue
+            ids_doublons = [doublon.pk for doublon in doublons]
+            while True:
+                with transaction.atomic():
+                    lot = list(ColisModel.objects.filter(**{f'{champ_colis}_id__in': ids_doublons})
+                               .values_list('id', flat=True)[:taille_lot])
+                    if not lot:
+                        break
+                    # update() ne touche pas auto_now: date_modification alimente la synchronisation par delta
+                    rapport['colis_repointes'] += ColisModel.objects.filter(id__in=lot).update(
+                        **{f'{champ_colis}_id': conserve.pk}, date_modification=timezone.now()
+                    )
+                    # Adresse de livraison changée pour les livreurs (synchronisation mobile)
+                    signaler_modification(colis_ids=lot)
+            with transaction.atomic():
+                # FOR UPDATE bloque l'insertion d'un colis qui référencerait un doublon (FOR KEY SHARE)
+                list(modele.objects.select_for_update().filter(id__in=ids_doublons).values_list('id', flat=True))
+                restants = list(ColisModel.objects.filter(**{f'{champ_colis}_id__in': ids_doublons})
+                                .values_list('id', flat=True))
+                if restants:
+                    rapport['colis_repointes'] += ColisModel.objects.filter(id__in=restants).update(
+                        **{f'{champ_colis}_id': conserve.pk}, date_modification=timezone.now()
+                    )
+                    signaler_modification(colis_ids=restants)
+                modifies = []
+                for doublon in doublons:
+                    modifies += _completer(conserve, doublon)
+                if modifies:
+                    conserve.save(update_fields=set(modifies))
+                modele.objects.filter(id__in=ids_doublons).delete()
+    return rapport
@@ -0,0 +1,125 @@
+"""Enregistrement des colis et de leurs effets (facture, suivi, notifications)"""
+from decimal import Decimal
+
+from django.db import transaction
+
+from api.models import ColisModel, FactureModel, SuiviModel, NotificationModel
+from api.services.evenements import evenement_suivi, publier_evenements
+from api.services.geocodage import DESTINATAIRES_A_GEOCODER
+from api.services.outbox import gestionnaire, publier, publier_en_masse
+from api.services.suivi_public import invalider_suivi_public
+
+COLIS_ENREGISTRE = 'COLIS_ENREGISTRE'
+
+
+def _lien_suivi(colis):
+    return colis.get_absolute_url() if hasattr(colis, 'get_absolute_url') else 'URL non disponible'
+
+
+def construire_effets(colis):
+    """Prépare, sans les enregistrer, la facture, le suivi initial et les notifications d'un colis"""
+    # La facture est construite hors de FactureModel.save(): bulk_create ne l'appelle pas
+    facture = FactureModel(colis=colis)
+    facture.numero_facture = facture.generer_numero_facture()
+    facture.appliquer_tarifs()
+
+    suivi = SuiviModel(
+        colis=colis,
+        statut='COLIS_RECEPTIONNE',
+        description='Colis réceptionné à l\'agence Cocody',
+        utilisateur_id=colis.utilisateur_id,
+        localisation='Agence Cocody'
+    )
+
+    notifications = [
+        # SMS de confirmation pour l'expéditeur
+        NotificationModel(
+            colis=colis,
+            type_notification='SMS',
+            destinataire=colis.expediteur.telephone,
+            sujet='Confirmation d\'enregistrement de colis',
+            message=f'Votre colis {colis.numero_suivi} a été enregistré avec succès. Suivi: {_lien_suivi(colis)}',
+            statut='EN_ATTENTE'
+        ),
+        # SMS d'information pour le destinataire
+        NotificationModel(
+            colis=colis,
+            type_notification='SMS',
+            destinataire=colis.destinataire.telephone,
+            sujet='Notification de colis en attente',
+            message=f'Un colis ({colis.numero_suivi}) vous est destiné. Statut actuel: En attente. Suivi: {_lien_suivi(colis)}',
+            statut='EN_ATTENTE'
+        ),
+    ]
+    return facture, suivi, notifications
+
+
+def enregistrer_colis(colis_list):
+    """Publie un événement COLIS_ENREGISTRE par colis, en une requête.
+
+    À appeler dans la transaction qui enregistre les colis: la facture, le
+    suivi initial et les notifications sont créés ensuite par le relais de
+    l'outbox (commande relay_outbox).
+    """
+    publier_en_masse(COLIS_ENREGISTRE, [{'colis_id': colis.pk} for colis in colis_list])
+
+
+@gestionnaire(COLIS_ENREGISTRE)
+def enregistrer_effets(evenements):
+    """Crée les factures, suivis et notifications d'un lot de colis en un nombre fixe de requêtes.
+
+    Les colis qui ont déjà une facture sont ignorés: rejouer un événement ne
+    duplique aucun effet.
+    """
+    colis_ids = {evenement.payload['colis_id'] for evenement in evenements}
+    deja_factures = set(FactureModel.objects.filter(colis_id__in=colis_ids).values_list('colis_id', flat=True))
+    colis_list = ColisModel.objects.select_related('expediteur', 'destinataire').filter(
+        pk__in=colis_ids - deja_factures
+    )
+
+    factures, suivis, notifications = [], [], []
+    for colis in colis_list:
+        facture, suivi, notifications_colis = construire_effets(colis)
+        factures.append(facture)
+        suivis.append(suivi)
+        notifications.extend(notifications_colis)
+
+    FactureModel.objects.bulk_create(factures)
+    SuiviModel.objects.bulk_create(suivis)
+    # bulk_create n'émet pas post_save: cache du suivi public et flux temps réel mis à jour ici
+    numeros = [suivi.colis.numero_suivi for suivi in suivis]
+    transaction.on_commit(lambda: invalider_suivi_public(numeros))
+    publier_evenements([
+        evenement_suivi(suivi, suivi.colis.numero_suivi, suivi.colis.destinataire.ville) for suivi in suivis
+    ])
+    NotificationModel.objects.bulk_create(notifications)
+    if colis_list:
+        # Géocodage des adresses de livraison, traité par un prochain lot du relais
+        publier(DESTINATAIRES_A_GEOCODER, {'destinataire_ids': sorted({colis.destinataire_id for colis in colis_list})})
+    return factures
+
+
+def recalculer_frais_distance(destinataire_ids):
+    """Recalcule frais_distance des factures non réglées des destinataires tout juste géocodés.
+
+    Le colis d'un nouveau destinataire est facturé avant que ses coordonnées
+    soient connues (tarif de base de la zone seul): une fois géocodé, il doit
+    coûter comme le colis suivant vers la même adresse. Seules les factures
+    EN_ATTENTE sans aucun paiement sont modifiées. Retourne le nombre de
+    factures modifiées.
+    """
+    from api.services.zones import frais_distance
+
+    factures = FactureModel.objects.select_related('colis__destinataire').filter(
+        colis__destinataire_id__in=list(destinataire_ids), statut='EN_ATTENTE', montant_paye=0,
+    )
+    modifiees = []
+    for facture in factures:
+        zone = facture.colis.zone_livraison()
+        nouveaux_frais = frais_distance(zone, facture.colis.destinataire) if zone is not None else Decimal('0.00')
+        if nouveaux_frais != facture.frais_distance:
+            facture.montant_total += nouveaux_frais - facture.frais_distance
+            facture.frais_distance = nouveaux_frais
+            modifiees.append(facture)
+    FactureModel.objects.bulk_update(modifiees, ['frais_distance', 'montant_total'])
+    return len(modifiees)
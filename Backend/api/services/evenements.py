@@ -0,0 +1,254 @@
+"""Diffusion en temps réel des changements de statut des colis (flux SSE)"""
+import asyncio
+import itertools
+import json
+import logging
+import secrets
+import select
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, connections, transaction
+from django.utils.module_loading import import_string
+
+from api.services.geocodage import normaliser_lieu
+
+logger = logging.getLogger(__name__)
+
+COLIS_STATUT = 'colis.statut'
+SUIVI_CREE = 'suivi.cree'
+PREFIXE_TICKET = 'evenements:ticket:'
+# Description d'une étape de suivi tronquée dans les événements: ils transitent par NOTIFY
+TEXTE_MAX = 200
+# Une charge NOTIFY doit rester sous 8000 octets, sinon pg_notify échoue et annule la transaction métier
+CHARGE_MAX = 7900
+CHAMPS_TEXTE = ('description', 'localisation')
+
+
+def emettre_ticket(utilisateur):
+    """Ticket à usage unique, valable EVENEMENTS_TICKET_TTL secondes, pour ouvrir le flux.
+
+    EventSource ne peut pas envoyer d'en-tête: le ticket passe dans l'URL à la
+    place du jeton JWT, qui finirait dans les journaux des proxys. Conservé
+    dans le cache partagé, il est accepté par n'importe quel processus ASGI.
+    """
+    ticket = secrets.token_urlsafe(32)
+    cache.set(PREFIXE_TICKET + ticket, utilisateur.pk, settings.EVENEMENTS_TICKET_TTL)
+    return ticket
+
+
+def consommer_ticket(ticket):
+    """Identifiant de l'utilisateur du ticket, ou None si le ticket est inconnu, expiré ou déjà utilisé"""
+    if not ticket:
+        return None
+    cle = PREFIXE_TICKET + ticket
+    utilisateur_id = cache.get(cle)
+    # delete() ne réussit qu'une fois: deux ouvertures simultanées ne peuvent pas réutiliser le ticket
+    if utilisateur_id is None or not cache.delete(cle):
+        return None
+    return utilisateur_id
+
+
+class Abonnement:
+    """File d'événements d'un client du flux, filtrée par villes et/ou numéros de suivi"""
+
+    def __init__(self, boucle, villes=(), numeros=(), taille=100):
+        self.boucle = boucle
+        self.villes = {normaliser_lieu(ville) for ville in villes}
+        self.numeros = {numero.strip().upper() for numero in numeros}
+        self.file = asyncio.Queue(maxsize=taille)
+        self.ferme = False
+
+    def _deposer(self, evenement):
+        # Exécuté dans la boucle de l'abonné
+        if self.ferme:
+            return
+        try:
+            self.file.put_nowait(evenement)
+        except asyncio.QueueFull:
+            # Client trop lent: on le déconnecte, il se réabonnera et relira l'état par l'API
+            self.ferme = True
+            logger.warning('Abonné en retard déconnecté')
+
+    async def suivant(self, delai):
+        """Prochain événement, None si l'abonnement est fermé; lève TimeoutError après `delai` secondes"""
+        if self.ferme:
+            return None
+        return await asyncio.wait_for(self.file.get(), delai)
+
+
+class Diffuseur:
+    """Courtier en mémoire: répartit les événements reçus du backend entre les abonnés du processus.
+
+    Les abonnés sont indexés par ville et par numéro de suivi: un événement
+    n'est examiné que pour les abonnés qu'il concerne, quel que soit leur
+    nombre total.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tous = set()
+        self._par_ville = {}
+        self._par_numero = {}
+        self._backend = None
+        self._ids = itertools.count(1)
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = import_string(settings.EVENEMENTS_BACKEND)()
+        return self._backend
+
+    def abonner(self, abonnement):
+        self.backend.ecouter(self.diffuser)
+        with self._lock:
+            if not abonnement.villes and not abonnement.numeros:
+                self._tous.add(abonnement)
+            for ville in abonnement.villes:
+                self._par_ville.setdefault(ville, set()).add(abonnement)
+            for numero in abonnement.numeros:
+                self._par_numero.setdefault(numero, set()).add(abonnement)
+        return abonnement
+
+    def desabonner(self, abonnement):
+        with self._lock:
+            self._tous.discard(abonnement)
+            for index, cles in ((self._par_ville, abonnement.villes), (self._par_numero, abonnement.numeros)):
+                for cle in cles:
+                    abonnes = index.get(cle)
+                    if abonnes is not None:
+                        abonnes.discard(abonnement)
+                        if not abonnes:
+                            del index[cle]
+
+    def nombre_abonnes(self):
+        with self._lock:
+            return len(self._tous | set().union(*self._par_ville.values(), *self._par_numero.values()))
+
+    def diffuser(self, evenement):
+        """Transmet un événement aux abonnés concernés; appelable depuis n'importe quel thread"""
+        evenement = {'id': next(self._ids), **evenement}
+        with self._lock:
+            destinataires = set(self._tous)
+            destinataires.update(self._par_ville.get(evenement.get('ville'), ()))
+            destinataires.update(self._par_numero.get(evenement.get('numero_suivi'), ()))
+        # Un seul réveil par boucle asyncio, quel que soit le nombre de ses abonnés
+        par_boucle = {}
+        for abonnement in destinataires:
+            par_boucle.setdefault(abonnement.boucle, []).append(abonnement)
+        for boucle, abonnes in par_boucle.items():
+            try:
+                boucle.call_soon_threadsafe(_deposer, abonnes, evenement)
+            except RuntimeError:
+                for abonnement in abonnes:
+                    self.desabonner(abonnement)  # boucle fermée
+
+
+def _deposer(abonnes, evenement):
+    for abonnement in abonnes:
+        abonnement._deposer(evenement)
+
+
+diffuseur = Diffuseur()
+
+
+class BackendEvenements:
+    """Transport des événements entre les processus qui écrivent et ceux qui servent le flux.
+
+    publier() est appelé dans la transaction de l'écriture; l'événement ne
+    doit parvenir aux abonnés qu'après sa validation. ecouter() démarre, une
+    seule fois par processus, la réception qui appelle `rappel(evenement)`.
+    """
+
+    def publier(self, evenements):
+        raise NotImplementedError
+
+    def ecouter(self, rappel):
+        raise NotImplementedError
+
+
+class LocalBackend(BackendEvenements):
+    """Diffusion dans le seul processus courant (développement, tests)"""
+
+    def publier(self, evenements):
+        transaction.on_commit(lambda: [diffuseur.diffuser(evenement) for evenement in evenements])
+
+    def ecouter(self, rappel):
+        pass
+
+
+def charge_notify(evenement):
+    """JSON de l'événement pour NOTIFY; sans son texte libre s'il dépasse CHARGE_MAX octets"""
+    charge = json.dumps(evenement, default=str)
+    if len(charge.encode()) > CHARGE_MAX:
+        charge = json.dumps({cle: valeur for cle, valeur in evenement.items() if cle not in CHAMPS_TEXTE},
+                            default=str)
+    return charge
+
+
+class PostgresBackend(BackendEvenements):
+    """NOTIFY / LISTEN PostgreSQL: la notification est émise à la validation de la transaction"""
+
+    canal = 'kid_evenements'
+
+    def __init__(self):
+        self._ecoute = None
+        self._lock = threading.Lock()
+
+    def publier(self, evenements):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_notify(%s, charge) FROM unnest(%s::text[]) AS charge',
+                [self.canal, [charge_notify(evenement) for evenement in evenements]],
+            )
+
+    def ecouter(self, rappel):
+        with self._lock:
+            if self._ecoute is None or not self._ecoute.is_alive():
+                self._ecoute = threading.Thread(target=self._boucle, args=(rappel,), daemon=True,
+                                                name='evenements-listen')
+                self._ecoute.start()
+
+    def _boucle(self, rappel):
+        while True:
+            ecoute = None
+            try:
+                # Connexion dédiée en autocommit, hors du pool des requêtes
+                ecoute = connections.create_connection('default')
+                ecoute.ensure_connection()
+                ecoute.set_autocommit(True)
+                brute = ecoute.connection
+                with brute.cursor() as cursor:
+                    cursor.execute(f'LISTEN {self.canal}')
+                while True:
+                    if select.select([brute], [], [], 30) == ([], [], []):
+                        continue
+                    brute.poll()
+                    while brute.notifies:
+                        rappel(json.loads(brute.notifies.pop(0).payload))
+            except Exception:
+                logger.exception('Écoute des événements interrompue, reconnexion')
+                # L'ancienne connexion est fermée avant d'en ouvrir une autre: sinon chaque
+                # coupure en laisserait une ouverte côté serveur
+                if ecoute is not None:
+                    try:
+                        ecoute.close()
+                    except Exception:
+                        pass
+                threading.Event().wait(5)
+
+
+def publier_evenements(evenements):
+    """Publie des événements {type, numero_suivi, ville, ...}; à appeler dans la transaction de l'écriture"""
+    evenements = [{**evenement, 'ville': normaliser_lieu(evenement.get('ville'))} for evenement in evenements]
+    if evenements:
+        diffuseur.backend.publier(evenements)
+
+
+def evenement_suivi(suivi, numero_suivi, ville):
+    return {
+        'type': SUIVI_CREE, 'numero_suivi': numero_suivi, 'ville': ville, 'statut': suivi.statut,
+        'description': suivi.description[:TEXTE_MAX], 'localisation': suivi.localisation,
+        'date': suivi.date_creation.isoformat() if suivi.date_creation else None,
+    }
@@ -0,0 +1,11 @@
+"""Calculs géographiques simples, sans dépendance (importé par les processus web)"""
+import math
+
+RAYON_TERRE_KM = 6371.0088
+
+
+def distance_km(latitude_a, longitude_a, latitude_b, longitude_b):
+    """Distance orthodromique entre deux points, en km"""
+    lat_a, lon_a, lat_b, lon_b = map(math.radians, map(float, (latitude_a, longitude_a, latitude_b, longitude_b)))
+    a = math.sin((lat_b - lat_a) / 2) ** 2 + math.cos(lat_a) * math.cos(lat_b) * math.sin((lon_b - lon_a) / 2) ** 2
+    return 2 * RAYON_TERRE_KM * math.asin(math.sqrt(min(a, 1.0)))
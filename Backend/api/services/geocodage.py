@@ -0,0 +1,216 @@
+"""Géocodage des adresses: normalisation, fournisseurs et caches"""
+import csv
+import json
+import logging
+import re
+import time
+import urllib.parse
+import urllib.request
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from api.models import DestinataireModel, GeocodageModel
+from api.services.clients import normaliser_nom
+from api.services.lru import CacheLRU
+from api.services.outbox import gestionnaire
+
+logger = logging.getLogger(__name__)
+
+DESTINATAIRES_A_GEOCODER = 'DESTINATAIRES_A_GEOCODER'
+_INCONNU = (None, None)
+
+
+def normaliser_lieu(texte):
+    """'Rue 12, Cocody-Angré ' -> 'rue 12 cocody angre'"""
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', normaliser_nom(texte)).split())
+
+
+def cle_adresse(ville, quartier=None, adresse=None):
+    """Clé canonique d'une adresse: mêmes ville, quartier et adresse à la casse, aux accents et à la ponctuation près"""
+    return '|'.join(normaliser_lieu(partie) for partie in (ville, quartier, adresse))[:255]
+
+
+class FournisseurGeocodage:
+    """Source de coordonnées. geocoder() retourne (latitude, longitude) ou None si l'adresse est inconnue."""
+
+    nom = ''
+
+    def __init__(self, **options):
+        self.options = options
+
+    def geocoder(self, ville, quartier, adresse):
+        raise NotImplementedError
+
+
+class GazetteerFournisseur(FournisseurGeocodage):
+    """Fichier CSV hors ligne (ville, quartier, latitude, longitude); précision au quartier, sinon à la ville"""
+
+    nom = 'gazetteer'
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.lieux = {}
+        with open(options['FICHIER'], encoding='utf-8') as fichier:
+            for ligne in csv.DictReader(fichier):
+                self.lieux[(normaliser_lieu(ligne['ville']), normaliser_lieu(ligne['quartier']))] = (
+                    Decimal(ligne['latitude']), Decimal(ligne['longitude'])
+                )
+
+    def geocoder(self, ville, quartier, adresse):
+        ville, quartier = normaliser_lieu(ville), normaliser_lieu(quartier)
+        return self.lieux.get((ville, quartier)) or self.lieux.get((ville, ''))
+
+
+class NominatimFournisseur(FournisseurGeocodage):
+    """API de recherche Nominatim (OpenStreetMap) ou compatible (option URL).
+
+    Une requête au plus toutes les INTERVALLE secondes (1 par défaut, limite
+    du service public), tous processus confondus: le créneau est réservé
+    dans le cache partagé avant chaque appel.
+    """
+
+    nom = 'nominatim'
+
+    def _attendre_creneau(self):
+        cle = f"geocodage:creneau:{self.options['URL']}"
+        while not cache.add(cle, 1, self.options.get('INTERVALLE', 1)):
+            time.sleep(0.05)
+
+    def geocoder(self, ville, quartier, adresse):
+        self._attendre_creneau()
+        requete = ', '.join(partie for partie in (adresse, quartier, ville, self.options.get('PAYS')) if partie)
+        url = f"{self.options['URL']}?{urllib.parse.urlencode({'q': requete, 'format': 'json', 'limit': 1})}"
+        entetes = {'User-Agent': self.options.get('USER_AGENT', 'kid-livraison')}
+        with urllib.request.urlopen(urllib.request.Request(url, headers=entetes),
+                                    timeout=self.options.get('TIMEOUT', 10)) as reponse:
+            resultats = json.load(reponse)
+        if not resultats:
+            return None
+        return Decimal(resultats[0]['lat']).quantize(Decimal('0.000001')), \
+            Decimal(resultats[0]['lon']).quantize(Decimal('0.000001'))
+
+
+def charger_fournisseurs():
+    """Instancie les fournisseurs de settings.GEOCODAGE_FOURNISSEURS, dans l'ordre de consultation"""
+    fournisseurs = []
+    for config in settings.GEOCODAGE_FOURNISSEURS:
+        options = dict(config)
+        fournisseurs.append(import_string(options.pop('FOURNISSEUR'))(**options))
+    return fournisseurs
+
+
+class Geocodeur:
+    """Résout les adresses: cache mémoire, puis table geocodage, puis fournisseurs.
+
+    Chaque clé n'est demandée qu'une fois aux fournisseurs: la réponse, même
+    négative, est enregistrée dans la table.
+    """
+
+    def __init__(self, fournisseurs=None):
+        self._fournisseurs = fournisseurs
+        self.cache = CacheLRU(settings.GEOCODAGE_CACHE_TAILLE, settings.GEOCODAGE_CACHE_TTL)
+
+    @property
+    def fournisseurs(self):
+        if self._fournisseurs is None:
+            self._fournisseurs = charger_fournisseurs()
+        return self._fournisseurs
+
+    def resoudre(self, ville, quartier=None, adresse=None):
+        """(latitude, longitude) de l'adresse, ou (None, None) si aucun fournisseur ne la connaît"""
+        return self.resoudre_en_masse([(ville, quartier, adresse)])[cle_adresse(ville, quartier, adresse)]
+
+    def resoudre_en_masse(self, adresses):
+        """{clé: (latitude, longitude)} pour des (ville, quartier, adresse); une requête pour toutes les clés en cache"""
+        adresses = {cle_adresse(*adresse): adresse for adresse in adresses}
+        resultats = {}
+        manquantes = []
+        for cle in adresses:
+            coordonnees = self.cache.get(cle)
+            if coordonnees is None:
+                manquantes.append(cle)
+            else:
+                resultats[cle] = coordonnees
+        if manquantes:
+            for cle, latitude, longitude in GeocodageModel.objects.filter(cle__in=manquantes).values_list(
+                'cle', 'latitude', 'longitude'
+            ):
+                resultats[cle] = (latitude, longitude)
+                self.cache.set(cle, (latitude, longitude))
+
+        nouvelles = []
+        for cle, adresse in adresses.items():
+            if cle in resultats:
+                continue
+            coordonnees, nom, definitif = self._interroger(*adresse)
+            resultats[cle] = coordonnees
+            if definitif:
+                self.cache.set(cle, coordonnees)
+                nouvelles.append(GeocodageModel(cle=cle, latitude=coordonnees[0], longitude=coordonnees[1],
+                                                fournisseur=nom))
+        GeocodageModel.objects.bulk_create(nouvelles, ignore_conflicts=True)
+        return resultats
+
+    def _interroger(self, ville, quartier, adresse):
+        """Retourne (coordonnées, nom du fournisseur, définitif).
+
+        Un fournisseur en panne passe la main au suivant; la réponse de secours
+        n'est alors pas mémorisée et l'adresse sera redemandée. Si tous les
+        fournisseurs échouent, la dernière erreur remonte (le lot est rejoué).
+        """
+        erreur = None
+        for fournisseur in self.fournisseurs:
+            try:
+                coordonnees = fournisseur.geocoder(ville, quartier, adresse)
+            except Exception as e:
+                logger.warning('Géocodage %s indisponible: %s', fournisseur.nom, e)
+                erreur = e
+                continue
+            if coordonnees is not None:
+                return coordonnees, fournisseur.nom, erreur is None
+        if erreur is not None:
+            raise erreur
+        return _INCONNU, '', True
+
+
+geocodeur = Geocodeur()
+
+
+@gestionnaire(DESTINATAIRES_A_GEOCODER, lent=True)
+def geocoder_destinataires(evenements):
+    """Renseigne les coordonnées des destinataires d'un lot d'événements.
+
+    L'adresse est résolue à chaque colis (le plus souvent depuis le cache):
+    un destinataire dont l'adresse a changé est relocalisé, et les factures
+    non réglées de ses colis sont recalculées. Exécuté hors transaction par le
+    relais des événements lents: les appels aux fournisseurs ne retiennent
+    aucun verrou, seules les écritures finales sont dans une transaction.
+    Une erreur du fournisseur fait échouer le lot, qui sera rejoué.
+    """
+    ids = {pk for evenement in evenements for pk in evenement.payload['destinataire_ids']}
+    coordonnees = geocodeur.resoudre_en_masse(
+        DestinataireModel.objects.filter(pk__in=ids).values_list('ville', 'quartier', 'adresse_complete')
+    )
+    # Imports locaux: livraisons et colis_intake dépendent d'evenements, qui dépend de ce module
+    from api.services.colis_intake import recalculer_frais_distance
+    from api.services.livraisons import signaler_modification
+    with transaction.atomic():
+        geocodes = []
+        for destinataire in DestinataireModel.objects.select_for_update().filter(pk__in=ids):
+            cle = cle_adresse(destinataire.ville, destinataire.quartier, destinataire.adresse_complete)
+            if cle not in coordonnees:
+                # Adresse modifiée pendant la résolution: laissée au prochain événement
+                continue
+            if coordonnees[cle] != (destinataire.latitude, destinataire.longitude):
+                destinataire.latitude, destinataire.longitude = coordonnees[cle]
+                geocodes.append(destinataire)
+        DestinataireModel.objects.bulk_update(geocodes, ['latitude', 'longitude'])
+        geocodes_ids = [destinataire.pk for destinataire in geocodes]
+        # Les téléphones des livreurs reçoivent les nouvelles coordonnées à leur prochaine synchronisation
+        signaler_modification(destinataire_ids=geocodes_ids)
+        # Factures émises avant que l'adresse soit connue: même prix que le prochain colis vers elle
+        recalculer_frais_distance(geocodes_ids)
@@ -0,0 +1,63 @@
+"""Traitement d'une photo de livraison, exécuté dans un processus du pool.
+
+Ce module n'importe pas Django: les processus du pool n'ont ni base de
+données ni configuration chargées.
+"""
+import hashlib
+import os
+import tempfile
+
+from PIL import Image, ImageOps
+
+TAMPON = 64 * 1024
+
+
+def empreinte(chemin):
+    contenu = hashlib.sha256()
+    with open(chemin, 'rb') as fichier:
+        for bloc in iter(lambda: fichier.read(TAMPON), b''):
+            contenu.update(bloc)
+    return contenu.hexdigest()
+
+
+def noms(valeur):
+    """Noms (relatifs au stockage) des rendus d'une photo, dérivés de son contenu"""
+    return (f'livraisons/affichage/{valeur[:2]}/{valeur}.webp',
+            f'livraisons/miniatures/{valeur[:2]}/{valeur}.webp')
+
+
+def _enregistrer(image, chemin, qualite):
+    # Écriture dans un fichier temporaire puis renommage: un rendu présent est toujours complet
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    descripteur, temporaire = tempfile.mkstemp(dir=os.path.dirname(chemin), suffix='.tmp')
+    try:
+        with os.fdopen(descripteur, 'wb') as fichier:
+            # Aucune métadonnée n'est recopiée (EXIF: position GPS, téléphone...)
+            image.save(fichier, 'WEBP', quality=qualite, method=4)
+        os.replace(temporaire, chemin)
+    except BaseException:
+        os.remove(temporaire)
+        raise
+
+
+def traiter_image(chemin, racine, affichage_px, miniature_px, qualite):
+    """Produit le rendu d'affichage et la miniature WebP de l'image `chemin`.
+
+    Les rendus sont nommés d'après l'empreinte SHA-256 de l'original: une
+    photo déjà traitée (même envoyée deux fois) n'est pas décodée de nouveau.
+    Retourne les noms des deux rendus, relatifs à `racine`.
+    """
+    affichage, miniature = noms(empreinte(chemin))
+    chemin_affichage, chemin_miniature = os.path.join(racine, affichage), os.path.join(racine, miniature)
+    if os.path.exists(chemin_affichage) and os.path.exists(chemin_miniature):
+        return affichage, miniature
+    with Image.open(chemin) as original:
+        # JPEG: décodage directement à taille réduite, la mémoire suit le rendu et non l'original
+        original.draft('RGB', (affichage_px, affichage_px))
+        image = ImageOps.exif_transpose(original)
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+        image.thumbnail((affichage_px, affichage_px), Image.LANCZOS)
+        _enregistrer(image, chemin_affichage, qualite)
+        image.thumbnail((miniature_px, miniature_px), Image.LANCZOS)
+        _enregistrer(image, chemin_miniature, qualite)
+    return affichage, miniature
@@ -0,0 +1,57 @@
+"""Index en mémoire invalidés dans tous les processus par une version dans le cache partagé"""
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class IndexPartage:
+    """Index construit au premier accès puis gardé en mémoire du processus.
+
+    invalider() publie une nouvelle version dans le cache partagé (Redis):
+    chaque processus compare la sienne au plus toutes les
+    INDEX_VERIFICATION_SECONDES et reconstruit son index si elle a changé.
+    La durée de vie (_ttl) ne sert que de filet, si la version était évincée
+    du cache. Les sous-classes définissent nom, _ttl() et _construire().
+    """
+
+    nom = ''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._valeur = None
+        self._version = None
+        self._construit_le = 0.0
+        self._verifie_le = 0.0
+
+    def _cle_version(self):
+        return f'index_version:{self.nom}'
+
+    def invalider(self):
+        cache.set(self._cle_version(), uuid.uuid4().hex, None)
+        with self._lock:
+            self._valeur = None
+
+    def _ttl(self):
+        raise NotImplementedError
+
+    def _construire(self):
+        raise NotImplementedError
+
+    def _index(self):
+        valeur = self._valeur
+        if valeur is not None and time.monotonic() - self._verifie_le < settings.INDEX_VERIFICATION_SECONDES:
+            return valeur
+        with self._lock:
+            maintenant = time.monotonic()
+            if self._valeur is None or maintenant - self._verifie_le >= settings.INDEX_VERIFICATION_SECONDES:
+                # Version lue avant la construction: une invalidation pendant celle-ci sera vue au prochain contrôle
+                version = cache.get(self._cle_version())
+                if self._valeur is None or version != self._version or maintenant - self._construit_le >= self._ttl():
+                    self._valeur = self._construire()
+                    self._version = version
+                    self._construit_le = maintenant
+                self._verifie_le = maintenant
+            return self._valeur
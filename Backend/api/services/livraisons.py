@@ -0,0 +1,149 @@
+"""Changements de statut des livraisons et de leurs colis, appliqués par lots"""
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api.models import ColisModel, LivraisonModel, NotificationModel, SuiviModel
+from api.services.evenements import COLIS_STATUT, evenement_suivi, publier_evenements
+from api.services.suivi_public import invalider_suivi_public
+
+TRANSITIONS = {
+    'ASSIGNEE': {'EN_COURS', 'ECHOUEE'},
+    'EN_COURS': {'TERMINEE', 'ECHOUEE'},
+}
+# statut de livraison -> (statut du colis, étape de suivi, description)
+EFFETS = {
+    'EN_COURS': ('EN_LIVRAISON', 'EN_COURS_LIVRAISON', 'Colis en cours de livraison'),
+    'TERMINEE': ('LIVRE', 'LIVRE', 'Colis livré au destinataire'),
+    # Le colis redevient en attente: il peut être réaffecté
+    'ECHOUEE': ('EN_ATTENTE', 'ECHEC_LIVRAISON', 'Échec de livraison'),
+}
+CHAMPS_LIVRAISON = ['statut', 'heure_depart', 'heure_arrivee', 'motif_echec', 'commentaire',
+                    'latitude_livraison', 'longitude_livraison', 'date_modification']
+
+
+class ChangementInvalide(Exception):
+    pass
+
+
+def _horodatage(valeur, defaut):
+    if not valeur:
+        return defaut
+    try:
+        horodatage = parse_datetime(str(valeur))
+    except ValueError:
+        horodatage = None
+    if horodatage is None:
+        raise ChangementInvalide('Horodatage invalide')
+    return timezone.make_aware(horodatage) if timezone.is_naive(horodatage) else horodatage
+
+
+def _coordonnee(valeur):
+    if valeur in (None, ''):
+        return None
+    try:
+        return Decimal(str(valeur)).quantize(Decimal('0.000001'))
+    except InvalidOperation:
+        raise ChangementInvalide('Coordonnée invalide')
+
+
+def appliquer_changements(livreur_id, utilisateur, changements, preparer=None, champs=()):
+    """Applique des changements de statut [{livraison, statut, horodatage, motif_echec, commentaire,
+    latitude, longitude}] aux livraisons d'un livreur, dans une transaction.
+
+    Le nombre de requêtes ne dépend pas de la taille du lot: livraisons et
+    colis sont lus en une requête verrouillée puis écrits par bulk_update;
+    étapes de suivi et notifications sont créées par bulk_create.
+    `preparer(livraison, changement)` peut renseigner d'autres champs `champs`
+    de la livraison (preuve de livraison) ou lever ChangementInvalide. Retourne une erreur (ou None) par changement.
+    """
+    maintenant = timezone.now()
+    erreurs = []
+    with transaction.atomic():
+        livraisons = LivraisonModel.objects.select_for_update(of=('self', 'colis')).select_related(
+            'colis__destinataire'
+        ).in_bulk({changement.get('livraison') for changement in changements
+                   if isinstance(changement.get('livraison'), int)})
+        modifiees, suivis, notifications = {}, [], []
+        for changement in changements:
+            livraison = livraisons.get(changement.get('livraison'))
+            try:
+                if livraison is None or livraison.livreur_id != livreur_id:
+                    raise ChangementInvalide('Livraison introuvable')
+                statut = changement.get('statut')
+                if statut not in TRANSITIONS.get(livraison.statut, ()):
+                    raise ChangementInvalide(f'Transition {livraison.statut} -> {statut} impossible')
+                horodatage = _horodatage(changement.get('horodatage'), maintenant)
+                latitude, longitude = _coordonnee(changement.get('latitude')), _coordonnee(changement.get('longitude'))
+                if statut == 'ECHOUEE' and not changement.get('motif_echec'):
+                    raise ChangementInvalide("Motif d'échec requis")
+                if preparer is not None:
+                    preparer(livraison, changement)
+            except ChangementInvalide as e:
+                erreurs.append(str(e))
+                continue
+
+            livraison.statut = statut
+            if statut == 'EN_COURS':
+                livraison.heure_depart = horodatage
+            else:
+                livraison.heure_arrivee = horodatage
+                livraison.motif_echec = changement.get('motif_echec') or livraison.motif_echec
+            livraison.commentaire = changement.get('commentaire') or livraison.commentaire
+            if latitude is not None and longitude is not None:
+                livraison.latitude_livraison, livraison.longitude_livraison = latitude, longitude
+            livraison.date_modification = maintenant
+
+            colis = livraison.colis
+            colis.statut, statut_suivi, description = EFFETS[statut]
+            if statut == 'TERMINEE':
+                colis.date_livraison_reelle = horodatage
+            colis.date_modification = maintenant
+            suivis.append(SuiviModel(
+                colis=colis, statut=statut_suivi, utilisateur=utilisateur, latitude=latitude, longitude=longitude,
+                description=description if statut != 'ECHOUEE' else f"{description}: {livraison.motif_echec}",
+            ))
+            if statut == 'TERMINEE':
+                notifications.append(NotificationModel(
+                    colis=colis, type_notification='SMS', destinataire=colis.destinataire.telephone,
+                    sujet='Colis livré', message=f'Votre colis {colis.numero_suivi} a été remis avec succès.',
+                    statut='EN_ATTENTE',
+                ))
+            modifiees[livraison.pk] = livraison
+            erreurs.append(None)
+
+        livraisons_modifiees = list(modifiees.values())
+        LivraisonModel.objects.bulk_update(livraisons_modifiees, CHAMPS_LIVRAISON + list(champs))
+        colis_modifies = [livraison.colis for livraison in livraisons_modifiees]
+        ColisModel.objects.bulk_update(colis_modifies, ['statut', 'date_livraison_reelle', 'date_modification'])
+        SuiviModel.objects.bulk_create(suivis)
+        NotificationModel.objects.bulk_create(notifications)
+
+        # Les écritures groupées n'émettent pas de signaux: cache du suivi public et flux temps réel
+        numeros = [colis.numero_suivi for colis in colis_modifies]
+        transaction.on_commit(lambda: invalider_suivi_public(numeros))
+        publier_evenements(
+            [{'type': COLIS_STATUT, 'numero_suivi': colis.numero_suivi, 'ville': colis.destinataire.ville,
+              'statut': colis.statut} for colis in colis_modifies]
+            + [evenement_suivi(suivi, suivi.colis.numero_suivi, suivi.colis.destinataire.ville) for suivi in suivis]
+        )
+    return erreurs
+
+
+def signaler_modification(colis_ids=(), destinataire_ids=()):
+    """Avance date_modification des livraisons non terminées de ces colis ou destinataires.
+
+    La synchronisation mobile n'envoie que les livraisons dont
+    date_modification a avancé: tout changement d'un champ du colis ou du
+    destinataire qu'elle transmet (adresse, coordonnées, instructions...)
+    doit passer par ici, y compris les écritures groupées.
+    """
+    colis_ids, destinataire_ids = list(colis_ids), list(destinataire_ids)
+    if not colis_ids and not destinataire_ids:
+        return 0
+    return LivraisonModel.objects.filter(
+        Q(colis_id__in=colis_ids) | Q(colis__destinataire_id__in=destinataire_ids), statut__in=list(TRANSITIONS),
+    ).update(date_modification=timezone.now())
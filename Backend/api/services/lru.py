@@ -0,0 +1,43 @@
+"""Cache LRU en mémoire, borné en taille et en durée de vie"""
+import threading
+import time
+from collections import OrderedDict
+
+_ABSENT = object()
+
+
+class CacheLRU:
+    """Cache local au processus, sûr entre threads.
+
+    Les entrées les moins récemment lues sont évincées au-delà de `taille`;
+    une entrée plus ancienne que `ttl` secondes est ignorée.
+    """
+
+    def __init__(self, taille=1024, ttl=300):
+        self.taille = taille
+        self.ttl = ttl
+        self._entrees = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, cle, defaut=None):
+        with self._lock:
+            entree = self._entrees.get(cle, _ABSENT)
+            if entree is _ABSENT:
+                return defaut
+            valeur, expire = entree
+            if expire < time.monotonic():
+                del self._entrees[cle]
+                return defaut
+            self._entrees.move_to_end(cle)
+            return valeur
+
+    def set(self, cle, valeur):
+        with self._lock:
+            self._entrees[cle] = (valeur, time.monotonic() + self.ttl)
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.taille:
+                self._entrees.popitem(last=False)
+
+    def vider(self):
+        with self._lock:
+            self._entrees.clear()
@@ -0,0 +1,204 @@
+"""Envoi des notifications en attente (SMS, email, push)"""
+import asyncio
+import json
+import logging
+import math
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection, send_mail
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from api.models import NotificationModel
+
+logger = logging.getLogger(__name__)
+
+
+class BackendNotification:
+    """Canal d'envoi d'un type de notification.
+
+    envoyer() est synchrone et lève une exception en cas d'échec; le
+    dispatcheur l'exécute dans un thread, au plus `concurrence` à la fois.
+    Le dispatcheur n'interrompt pas un envoi: envoyer() doit borner ses
+    appels réseau par self.timeout (option TIMEOUT).
+    """
+
+    def __init__(self, concurrence=10, **options):
+        self.concurrence = concurrence
+        self.options = options
+        self.timeout = options.get('TIMEOUT', settings.NOTIFICATION_TIMEOUT)
+
+    def envoyer(self, notification):
+        raise NotImplementedError
+
+
+class HttpBackend(BackendNotification):
+    """Poste {destinataire, sujet, message} en JSON vers une passerelle HTTP (option URL)"""
+
+    def envoyer(self, notification):
+        corps = json.dumps({
+            'destinataire': notification.destinataire,
+            'sujet': notification.sujet,
+            'message': notification.message,
+        }).encode()
+        requete = urllib.request.Request(
+            self.options['URL'], data=corps, method='POST',
+            headers={'Content-Type': 'application/json', **self.options.get('HEADERS', {})},
+        )
+        with urllib.request.urlopen(requete, timeout=self.timeout) as reponse:
+            if reponse.status >= 300:
+                raise RuntimeError(f'Passerelle: HTTP {reponse.status}')
+
+
+class EmailBackend(BackendNotification):
+    """Envoi par le backend email de Django"""
+
+    def envoyer(self, notification):
+        send_mail(notification.sujet, notification.message, None, [notification.destinataire],
+                  connection=get_connection(timeout=self.timeout))
+
+
+class JournalBackend(BackendNotification):
+    """Écrit les notifications dans les logs, sans rien envoyer (développement)"""
+
+    def envoyer(self, notification):
+        logger.info('[%s] %s: %s', notification.type_notification, notification.destinataire, notification.message)
+
+
+class MemoireBackend(BackendNotification):
+    """Passerelle factice qui conserve les envois en mémoire (tests)"""
+
+    def __init__(self, concurrence=10, **options):
+        super().__init__(concurrence, **options)
+        self.boite_envoi = []
+
+    def envoyer(self, notification):
+        if notification.destinataire in self.options.get('ECHECS', ()):
+            raise RuntimeError('Destinataire refusé par la passerelle')
+        self.boite_envoi.append((notification.type_notification, notification.destinataire, notification.message))
+
+
+def charger_backends():
+    """Instancie les backends déclarés dans settings.NOTIFICATION_BACKENDS, par type"""
+    backends = {}
+    for type_notification, config in settings.NOTIFICATION_BACKENDS.items():
+        options = dict(config)
+        classe = import_string(options.pop('BACKEND'))
+        backends[type_notification] = classe(concurrence=options.pop('CONCURRENCE', 10), **options)
+    return backends
+
+
+class DispatcheurNotifications:
+    """Réclame les notifications en attente par lots et les envoie.
+
+    Un lot est réclamé dans une transaction courte (SELECT ... FOR UPDATE
+    SKIP LOCKED) qui le passe EN_COURS avec un jeton propre au dispatcheur;
+    l'envoi se fait ensuite hors transaction, sans verrou tenu. La réservation
+    dure le temps d'envoyer tout le lot (nombre de vagues de `concurrence`
+    envois, fois NOTIFICATION_TIMEOUT), plus NOTIFICATION_RESERVATION_SECONDES.
+    Plusieurs dispatcheurs peuvent tourner en parallèle sans traiter la même
+    notification. Si le processus s'arrête en cours de lot, la réservation
+    expire et le lot est repris (au moins une fois); le résultat d'un
+    dispatcheur qui a perdu sa réservation n'est pas enregistré.
+    """
+
+    def __init__(self, backends=None):
+        self.backends = backends if backends is not None else charger_backends()
+
+    def traiter_lot(self, taille=100):
+        """Envoie un lot de notifications; retourne le nombre de notifications traitées"""
+        jeton = uuid.uuid4()
+        lot = self._reserver(taille, jeton)
+        if not lot:
+            return 0
+        erreurs = asyncio.run(self._envoyer(lot))
+        for notification, erreur in zip(lot, erreurs):
+            self._appliquer_resultat(notification, erreur)
+        # Conditionnel au jeton: une notification reprise par un autre dispatcheur garde son résultat
+        NotificationModel.objects.filter(jeton_reservation=jeton).bulk_update(
+            lot, ['statut', 'date_envoi', 'tentatives', 'prochaine_tentative', 'derniere_erreur', 'jeton_reservation']
+        )
+        return len(lot)
+
+    def duree_reservation(self, lot):
+        """Secondes nécessaires pour envoyer le lot: vagues successives de `concurrence` envois par type"""
+        par_type = {}
+        for notification in lot:
+            par_type[notification.type_notification] = par_type.get(notification.type_notification, 0) + 1
+        vagues = max((math.ceil(nombre / self.backends[type_notification].concurrence)
+                      for type_notification, nombre in par_type.items() if type_notification in self.backends),
+                     default=0)
+        return vagues * settings.NOTIFICATION_TIMEOUT + settings.NOTIFICATION_RESERVATION_SECONDES
+
+    def _reserver(self, taille, jeton):
+        maintenant = timezone.now()
+        with transaction.atomic():
+            lot = list(
+                NotificationModel.objects.select_for_update(skip_locked=True)
+                .filter(
+                    Q(statut='EN_ATTENTE', prochaine_tentative__isnull=True)
+                    | Q(statut='EN_ATTENTE', prochaine_tentative__lte=maintenant)
+                    # Réservation expirée: dispatcheur arrêté en cours d'envoi
+                    | Q(statut='EN_COURS', prochaine_tentative__lte=maintenant)
+                )
+                .order_by('id')[:taille]
+            )
+            reservation = maintenant + timedelta(seconds=self.duree_reservation(lot))
+            for notification in lot:
+                notification.statut = 'EN_COURS'
+                notification.prochaine_tentative = reservation
+                notification.jeton_reservation = jeton
+            NotificationModel.objects.bulk_update(lot, ['statut', 'prochaine_tentative', 'jeton_reservation'])
+        return lot
+
+    async def _envoyer(self, lot):
+        semaphores = {type_notification: asyncio.Semaphore(backend.concurrence)
+                      for type_notification, backend in self.backends.items()}
+        # Un thread par envoi autorisé: le pool par défaut d'asyncio (quelques threads) étalerait
+        # le lot au-delà de la durée de réservation
+        executeur = ThreadPoolExecutor(max_workers=max(1, sum(backend.concurrence
+                                                              for backend in self.backends.values())))
+        boucle = asyncio.get_running_loop()
+
+        async def envoyer(notification):
+            backend = self.backends.get(notification.type_notification)
+            if backend is None:
+                return f'Aucun backend pour {notification.type_notification}'
+            async with semaphores[notification.type_notification]:
+                try:
+                    # Pas de wait_for: abandonner un thread encore en cours d'envoi
+                    # ferait réessayer une notification peut-être déjà partie
+                    await boucle.run_in_executor(executeur, backend.envoyer, notification)
+                except Exception as e:
+                    return str(e) or e.__class__.__name__
+            return None
+
+        try:
+            return await asyncio.gather(*(envoyer(notification) for notification in lot))
+        finally:
+            executeur.shutdown(wait=False)
+
+    def _appliquer_resultat(self, notification, erreur):
+        notification.tentatives += 1
+        notification.jeton_reservation = None
+        if erreur is None:
+            notification.statut = 'ENVOYEE'
+            notification.date_envoi = timezone.now()
+            notification.prochaine_tentative = None
+            notification.derniere_erreur = None
+            return
+        notification.derniere_erreur = erreur
+        if notification.tentatives >= settings.NOTIFICATION_MAX_TENTATIVES:
+            notification.statut = 'ECHOUEE'
+            notification.prochaine_tentative = None
+        else:
+            notification.statut = 'EN_ATTENTE'
+            # Attente exponentielle: base, 2 x base, 4 x base...
+            delai = settings.NOTIFICATION_BACKOFF_SECONDES * 2 ** (notification.tentatives - 1)
+            notification.prochaine_tentative = timezone.now() + timedelta(seconds=delai)
@@ -0,0 +1,166 @@
+"""Outbox transactionnelle: effets différés des écritures métier"""
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from api.models import EvenementOutboxModel
+
+logger = logging.getLogger(__name__)
+
+# type_evenement -> fonction recevant la liste des événements d'un lot
+_gestionnaires = {}
+# Types traités hors transaction par le relais des événements lents (RelaisOutbox(lents=True))
+_types_lents = set()
+
+
+def gestionnaire(type_evenement, lent=False):
+    """Déclare la fonction qui matérialise les événements d'un type.
+
+    La fonction reçoit une liste d'événements et doit être idempotente: un
+    événement déjà matérialisé peut lui être représenté après une reprise.
+    Une fonction lente (appels réseau, calcul) est exécutée hors transaction
+    par son propre relais et valide elle-même ses écritures, en transactions
+    courtes.
+    """
+    def enregistrer(fonction):
+        _gestionnaires[type_evenement] = fonction
+        if lent:
+            _types_lents.add(type_evenement)
+        return fonction
+    return enregistrer
+
+
+def publier(type_evenement, payload):
+    """Écrit un événement; à appeler dans la transaction de l'écriture métier"""
+    return EvenementOutboxModel.objects.create(type_evenement=type_evenement, payload=payload)
+
+
+def publier_en_masse(type_evenement, payloads):
+    """Écrit un événement par payload en une requête"""
+    return EvenementOutboxModel.objects.bulk_create(
+        [EvenementOutboxModel(type_evenement=type_evenement, payload=payload) for payload in payloads]
+    )
+
+
+CHAMPS_RESULTAT = ['statut', 'tentatives', 'derniere_erreur', 'date_traitement', 'prochaine_tentative']
+
+
+class RelaisOutbox:
+    """Consomme les événements en attente par lots.
+
+    Les effets d'un lot et le passage de ses événements à TRAITE sont validés
+    dans la même transaction: un relais interrompu ne laisse ni effet sans
+    événement traité, ni événement traité sans effet. Les lots sont réclamés
+    par SELECT ... FOR UPDATE SKIP LOCKED, plusieurs relais peuvent tourner.
+    Un événement en échec attend avant d'être repris, de plus en plus
+    longtemps: une panne passagère n'épuise pas ses tentatives.
+
+    Avec lents=True, le relais ne traite que les types déclarés lents, et
+    sans garder de verrou pendant leur exécution: le lot est réservé (jeton
+    et date de reprise) dans une transaction courte, les gestionnaires
+    s'exécutent hors transaction, puis le résultat n'est enregistré que si la
+    réservation appartient toujours au relais. Un relais arrêté en cours de
+    lot laisse des événements que la fin de réservation rend à nouveau dus.
+    """
+
+    def __init__(self, lents=False):
+        self.lents = lents
+
+    def _dus(self):
+        evenements = EvenementOutboxModel.objects.filter(statut='EN_ATTENTE').filter(
+            Q(prochaine_tentative__isnull=True) | Q(prochaine_tentative__lte=timezone.now())
+        )
+        if self.lents:
+            return evenements.filter(type_evenement__in=_types_lents)
+        return evenements.exclude(type_evenement__in=_types_lents)
+
+    def traiter_lot(self, taille=100):
+        """Traite un lot d'événements; retourne le nombre d'événements traités"""
+        if self.lents:
+            return self._traiter_lot_reserve(taille)
+        with transaction.atomic():
+            lot = list(self._dus().select_for_update(skip_locked=True).order_by('id')[:taille])
+            self._traiter(lot)
+            EvenementOutboxModel.objects.bulk_update(lot, CHAMPS_RESULTAT)
+        return len(lot)
+
+    def _traiter_lot_reserve(self, taille):
+        jeton = uuid.uuid4()
+        with transaction.atomic():
+            lot = list(self._dus().select_for_update(skip_locked=True).order_by('id')[:taille])
+            reservation = timezone.now() + timedelta(seconds=settings.OUTBOX_RESERVATION_SECONDES)
+            for evenement in lot:
+                evenement.prochaine_tentative = reservation
+                evenement.jeton_reservation = jeton
+            EvenementOutboxModel.objects.bulk_update(lot, ['prochaine_tentative', 'jeton_reservation'])
+        self._traiter(lot)
+        for evenement in lot:
+            evenement.jeton_reservation = None
+        # Réservation expirée et reprise par un autre relais: son résultat prévaut
+        EvenementOutboxModel.objects.filter(jeton_reservation=jeton).bulk_update(
+            lot, CHAMPS_RESULTAT + ['jeton_reservation']
+        )
+        return len(lot)
+
+    def _traiter(self, lot):
+        par_type = {}
+        for evenement in lot:
+            par_type.setdefault(evenement.type_evenement, []).append(evenement)
+        for type_evenement, evenements in par_type.items():
+            self._traiter_type(type_evenement, evenements)
+
+    def _executer(self, fonction, evenements):
+        if self.lents:
+            fonction(evenements)
+            return
+        with transaction.atomic():
+            fonction(evenements)
+
+    def _traiter_type(self, type_evenement, evenements):
+        fonction = _gestionnaires.get(type_evenement)
+        if fonction is None:
+            for evenement in evenements:
+                self._echec(evenement, f'Aucun gestionnaire pour {type_evenement}')
+            return
+        try:
+            self._executer(fonction, evenements)
+        except Exception as e:
+            if len(evenements) == 1:
+                self._echec(evenements[0], str(e) or e.__class__.__name__)
+                return
+            # Le lot est rejoué événement par événement pour isoler les fautifs
+            logger.exception('Échec du lot %s, reprise unitaire', type_evenement)
+            for evenement in evenements:
+                try:
+                    self._executer(fonction, [evenement])
+                except Exception as e:
+                    self._echec(evenement, str(e) or e.__class__.__name__)
+                else:
+                    self._succes(evenement)
+        else:
+            for evenement in evenements:
+                self._succes(evenement)
+
+    def _succes(self, evenement):
+        evenement.tentatives += 1
+        evenement.statut = 'TRAITE'
+        evenement.date_traitement = timezone.now()
+        evenement.derniere_erreur = None
+        evenement.prochaine_tentative = None
+
+    def _echec(self, evenement, erreur):
+        evenement.tentatives += 1
+        evenement.derniere_erreur = erreur
+        if evenement.tentatives >= settings.OUTBOX_MAX_TENTATIVES:
+            evenement.statut = 'ECHOUE'
+            evenement.prochaine_tentative = None
+        else:
+            # Attente exponentielle: base, 2 x base, 4 x base... plafonnée
+            delai = min(settings.OUTBOX_BACKOFF_SECONDES * 2 ** (evenement.tentatives - 1),
+                        settings.OUTBOX_BACKOFF_MAX_SECONDES)
+            evenement.prochaine_tentative = timezone.now() + timedelta(seconds=delai)
@@ -0,0 +1,102 @@
+"""Rendus des photos de livraison (affichage, miniature), produits hors des requêtes"""
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from PIL import Image, UnidentifiedImageError
+
+from api.models import LivraisonModel
+from api.services.images import traiter_image
+from api.services.outbox import gestionnaire, publier
+
+logger = logging.getLogger(__name__)
+
+PHOTOS_A_TRAITER = 'PHOTOS_A_TRAITER'
+
+_executeur = None
+
+
+def executeur():
+    """Pool de processus du relais des événements lents, créé au premier lot de photos.
+
+    Processus démarrés par spawn et non par fork: un enfant forké hériterait
+    des connexions ouvertes (base, Redis) et des verrous du relais.
+    api.services.images n'importe pas Django, son chargement reste léger.
+    """
+    global _executeur
+    if _executeur is None:
+        _executeur = ProcessPoolExecutor(max_workers=settings.PHOTOS_PROCESSUS,
+                                         mp_context=multiprocessing.get_context('spawn'))
+    return _executeur
+
+
+def _reinitialiser():
+    """Abandonne un pool dont un processus est mort; le suivant sera recréé"""
+    global _executeur
+    if _executeur is not None:
+        _executeur.shutdown(wait=False, cancel_futures=True)
+        _executeur = None
+
+
+def a_traiter():
+    """Livraisons dont la photo n'a pas encore de rendus"""
+    return LivraisonModel.objects.exclude(Q(photo_livraison__isnull=True) | Q(photo_livraison='')).filter(
+        Q(photo_miniature__isnull=True) | Q(photo_miniature='')
+    )
+
+
+def demander_traitement(livraison_ids):
+    """Publie le traitement des photos des livraisons; à appeler dans la transaction qui les rattache"""
+    if livraison_ids:
+        publier(PHOTOS_A_TRAITER, {'livraison_ids': sorted(livraison_ids)})
+
+
+@gestionnaire(PHOTOS_A_TRAITER, lent=True)
+def traiter_photos(evenements):
+    """Remplace les originaux d'un lot par leurs rendus WebP, décodés en parallèle par le pool.
+
+    Une photo illisible est journalisée et laissée telle quelle. Toute autre
+    erreur (fichier absent, disque, pool) fait échouer le lot, que le relais
+    reprendra plus tard. Exécuté hors transaction par le relais des
+    événements lents; les originaux ne sont effacés qu'une fois les rendus
+    enregistrés.
+    """
+    ids = {pk for evenement in evenements for pk in evenement.payload['livraison_ids']}
+    livraisons = list(a_traiter().filter(pk__in=ids).only('id', 'photo_livraison', 'photo_miniature'))
+    taches = [
+        (livraison, executeur().submit(
+            traiter_image, default_storage.path(livraison.photo_livraison.name), settings.MEDIA_ROOT,
+            settings.PHOTOS_AFFICHAGE_PX, settings.PHOTOS_MINIATURE_PX, settings.PHOTOS_QUALITE_WEBP,
+        ))
+        for livraison in livraisons
+    ]
+    traitees, originaux = [], []
+    for livraison, tache in taches:
+        try:
+            affichage, miniature = tache.result()
+        except (UnidentifiedImageError, Image.DecompressionBombError, SyntaxError):
+            # Contenu invalide: une reprise donnerait le même résultat
+            logger.exception('Photo de la livraison %s illisible, conservée telle quelle', livraison.pk)
+            continue
+        except BrokenProcessPool:
+            _reinitialiser()
+            raise
+        originaux.append(livraison.photo_livraison.name)
+        livraison.photo_livraison.name, livraison.photo_miniature.name = affichage, miniature
+        traitees.append(livraison)
+    with transaction.atomic():
+        LivraisonModel.objects.bulk_update(traitees, ['photo_livraison', 'photo_miniature'])
+        transaction.on_commit(lambda: _supprimer(originaux))
+
+
+def _supprimer(noms):
+    for nom in noms:
+        try:
+            default_storage.delete(nom)
+        except OSError:
+            logger.warning('Original %s non supprimé', nom)
@@ -0,0 +1,229 @@
+"""Positions GPS des livreurs: ingestion par lots, dernière position connue, partitions"""
+import csv
+import io
+import re
+import time as horloge
+from datetime import datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api.models import PositionLivreurModel
+
+TABLE = PositionLivreurModel._meta.db_table
+# Partition par défaut (PostgreSQL): reçoit les points d'un jour sans partition
+DEFAUT = f'{TABLE}_defaut'
+COLONNES = ('livreur_id', 'latitude', 'longitude', 'precision_metres', 'vitesse_kmh', 'horodatage', 'date_reception')
+# Tolérance sur l'horloge des téléphones
+AVANCE_MAX = timedelta(minutes=5)
+# Verrou de mise à jour de la dernière position: durée de vie et attente maximale (secondes)
+VERROU_TTL = 5
+VERROU_ATTENTE = 0.5
+
+
+def cle_cache(livreur_id):
+    return f'position_livreur:{livreur_id}'
+
+
+def _flottant(valeur):
+    return None if valeur in (None, '') else float(valeur)
+
+
+def valider_points(points, maintenant=None):
+    """Sépare les points valides (dicts prêts à insérer) des rejets [{'index', 'motif'}]"""
+    maintenant = maintenant or timezone.now()
+    plus_ancien = maintenant - timedelta(days=settings.POSITIONS_RETENTION_JOURS)
+    valides, rejets = [], []
+    for index, point in enumerate(points):
+        try:
+            latitude = Decimal(str(point['latitude'])).quantize(Decimal('0.000001'))
+            longitude = Decimal(str(point['longitude'])).quantize(Decimal('0.000001'))
+            horodatage = parse_datetime(str(point['horodatage']))
+            precision, vitesse = _flottant(point.get('precision')), _flottant(point.get('vitesse'))
+        except (KeyError, TypeError, ValueError, InvalidOperation):
+            rejets.append({'index': index, 'motif': 'Point illisible'})
+            continue
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            rejets.append({'index': index, 'motif': 'Coordonnées hors limites'})
+            continue
+        if horodatage is None:
+            rejets.append({'index': index, 'motif': 'Horodatage invalide'})
+            continue
+        if timezone.is_naive(horodatage):
+            horodatage = timezone.make_aware(horodatage)
+        if not plus_ancien <= horodatage <= maintenant + AVANCE_MAX:
+            rejets.append({'index': index, 'motif': 'Horodatage hors période'})
+            continue
+        valides.append({'latitude': latitude, 'longitude': longitude, 'precision_metres': precision,
+                        'vitesse_kmh': vitesse, 'horodatage': horodatage})
+    return valides, rejets
+
+
+def enregistrer_positions(livreur_id, points):
+    """Insère un lot de points d'un livreur et met à jour sa dernière position connue.
+
+    L'insertion passe par COPY sous PostgreSQL (une seule commande, sans
+    instanciation de modèles), par bulk_create ailleurs.
+    """
+    valides, rejets = valider_points(points)
+    if not valides:
+        return 0, rejets
+    maintenant = timezone.now()
+    if connection.vendor == 'postgresql':
+        tampon = io.StringIO()
+        writer = csv.writer(tampon)
+        for point in valides:
+            writer.writerow([livreur_id, point['latitude'], point['longitude'],
+                             '' if point['precision_metres'] is None else point['precision_metres'],
+                             '' if point['vitesse_kmh'] is None else point['vitesse_kmh'],
+                             point['horodatage'].isoformat(), maintenant.isoformat()])
+        tampon.seek(0)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(f"COPY {TABLE} ({', '.join(COLONNES)}) FROM STDIN WITH (FORMAT csv)", tampon)
+    else:
+        PositionLivreurModel.objects.bulk_create(
+            [PositionLivreurModel(livreur_id=livreur_id, date_reception=maintenant, **point) for point in valides]
+        )
+    _memoriser(livreur_id, max(valides, key=lambda point: point['horodatage']))
+    return len(valides), rejets
+
+
+def _memoriser(livreur_id, point):
+    """Avance la dernière position connue sans jamais la faire reculer.
+
+    Comparer puis écrire sans verrou laisserait deux lots concurrents se
+    croiser et le plus ancien écraser le plus récent: la comparaison se fait
+    sous un verrou posé par cache.add (atomique). Verrou introuvable à temps,
+    l'entrée est supprimée et la prochaine lecture repart de la table.
+    """
+    cle = cle_cache(livreur_id)
+    verrou = f'{cle}:verrou'
+    limite = horloge.monotonic() + VERROU_ATTENTE
+    while not cache.add(verrou, 1, VERROU_TTL):
+        if horloge.monotonic() >= limite:
+            cache.delete(cle)
+            return
+        horloge.sleep(0.01)
+    try:
+        actuelle = cache.get(cle)
+        if actuelle is not None and actuelle['horodatage'] >= point['horodatage']:
+            return  # lot en retard (renvoi hors ligne): la position en cache est plus récente
+        cache.set(cle, {**point, 'livreur': livreur_id}, settings.POSITIONS_CACHE_TTL)
+    finally:
+        cache.delete(verrou)
+
+
+def derniere_position(livreur_id):
+    """Dernière position connue d'un livreur, depuis le cache, sinon depuis la table; None si aucune"""
+    position = cache.get(cle_cache(livreur_id))
+    if position is not None:
+        return position
+    ligne = (
+        PositionLivreurModel.objects.filter(livreur_id=livreur_id).order_by('-horodatage')
+        .values('latitude', 'longitude', 'precision_metres', 'vitesse_kmh', 'horodatage').first()
+    )
+    if ligne is None:
+        return None
+    position = {**ligne, 'livreur': livreur_id}
+    # add et non set: un lot enregistré entre-temps a priorité sur cette lecture
+    cache.add(cle_cache(livreur_id), position, settings.POSITIONS_CACHE_TTL)
+    return position
+
+
+# Maintenance (PostgreSQL): partitions journalières position_livreur_pAAAAMMJJ
+
+def _nom_partition(jour):
+    return f'{TABLE}_p{jour:%Y%m%d}'
+
+
+def _bornes(jour):
+    debut = timezone.make_aware(datetime.combine(jour, time.min))
+    return debut, debut + timedelta(days=1)
+
+
+def creer_partitions(depuis, jours):
+    """Crée les partitions manquantes des `jours` jours à partir de `depuis`; retourne leur nombre.
+
+    Les jours dont des points sont tombés dans la partition par défaut
+    (exécution manquée) reçoivent aussi leur partition, et leurs points y sont
+    déplacés: PostgreSQL refuse de créer une partition dont la plage a déjà
+    des lignes dans la partition par défaut.
+    """
+    if connection.vendor != 'postgresql':
+        return 0
+    existantes = partitions()
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT DISTINCT (horodatage AT TIME ZONE %s)::date FROM {DEFAUT}',
+                       [timezone.get_current_timezone_name()])
+        egares = {jour for jour, in cursor.fetchall()}
+    a_creer = sorted(({depuis + timedelta(days=decalage) for decalage in range(jours)} | egares) - set(existantes))
+    for jour in a_creer:
+        debut, fin = _bornes(jour)
+        creation = (f'CREATE TABLE {_nom_partition(jour)} PARTITION OF {TABLE} FOR VALUES FROM (%s) TO (%s)',
+                    [debut, fin])
+        with transaction.atomic(), connection.cursor() as cursor:
+            if jour not in egares:
+                cursor.execute(*creation)
+                continue
+            # La partition par défaut est détachée le temps de vider la plage du jour
+            colonnes = ', '.join(('id',) + COLONNES)
+            cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION {DEFAUT}')
+            cursor.execute(*creation)
+            cursor.execute(
+                f'INSERT INTO {TABLE} ({colonnes}) SELECT {colonnes} FROM {DEFAUT} '
+                'WHERE horodatage >= %s AND horodatage < %s', [debut, fin]
+            )
+            cursor.execute(f'DELETE FROM {DEFAUT} WHERE horodatage >= %s AND horodatage < %s', [debut, fin])
+            cursor.execute(f'ALTER TABLE {TABLE} ATTACH PARTITION {DEFAUT} DEFAULT')
+    return len(a_creer)
+
+
+def partitions():
+    """{jour: nom} des partitions journalières existantes"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT enfant.relname FROM pg_inherits '
+            'JOIN pg_class enfant ON enfant.oid = pg_inherits.inhrelid '
+            'JOIN pg_class parent ON parent.oid = pg_inherits.inhparent WHERE parent.relname = %s', [TABLE]
+        )
+        noms = [nom for nom, in cursor.fetchall()]
+    return {
+        datetime.strptime(correspondance.group(1), '%Y%m%d').date(): nom
+        for nom in noms if (correspondance := re.fullmatch(rf'{TABLE}_p(\d{{8}})', nom))
+    }
+
+
+def purger(avant):
+    """Supprime les positions antérieures au jour `avant`: partitions entières sous PostgreSQL,
+    plus les points restés dans la partition par défaut. Retourne partitions et points supprimés."""
+    limite = _bornes(avant)[0]
+    if connection.vendor != 'postgresql':
+        supprimees, _ = PositionLivreurModel.objects.filter(horodatage__lt=limite).delete()
+        return supprimees
+    anciennes = [nom for jour, nom in partitions().items() if jour < avant]
+    with connection.cursor() as cursor:
+        for nom in anciennes:
+            cursor.execute(f'DROP TABLE IF EXISTS {nom}')
+        cursor.execute(f'DELETE FROM {DEFAUT} WHERE horodatage < %s', [limite])
+        return len(anciennes) + cursor.rowcount
+
+
+def sous_echantillonner(jour, pas_secondes):
+    """Ne garde, pour le jour donné, que le premier point de chaque livreur par tranche de `pas_secondes`"""
+    if connection.vendor != 'postgresql':
+        return 0
+    debut, fin = _bornes(jour)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {TABLE} p USING ('
+            '  SELECT id, horodatage, row_number() OVER ('
+            '    PARTITION BY livreur_id, floor(extract(epoch FROM horodatage) / %s) ORDER BY horodatage, id'
+            f'  ) AS rang FROM {TABLE} WHERE horodatage >= %s AND horodatage < %s'
+            ') doublons WHERE p.id = doublons.id AND p.horodatage = doublons.horodatage AND doublons.rang > 1',
+            [pas_secondes, debut, fin],
+        )
+        return cursor.rowcount
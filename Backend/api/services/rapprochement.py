@@ -0,0 +1,168 @@
+"""Rapprochement des relevés de paiement (Mobile Money, banque) avec les factures"""
+import csv
+from datetime import datetime, time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from api.models import FactureModel, PaiementReleveModel
+
+TAILLE_LOT = 2000
+# Un lot en conflit avec un import concurrent (référence validée entre la lecture et l'écriture) est rejoué
+TENTATIVES_LOT = 3
+MODES_PAIEMENT = {mode for mode, _ in FactureModel.MODE_PAIEMENT_CHOICES}
+
+
+def lire_releve(flux):
+    """Itère sur les lignes d'un relevé CSV (séparateur ',' ou ';') sans le charger en mémoire.
+
+    Colonnes: numero_facture et montant obligatoires; reference (référence de
+    la transaction), mode_paiement et date_paiement facultatives. Produit des couples (numéro de ligne, dict).
+    """
+    entete = flux.readline()
+    delimiteur = ';' if entete.count(';') > entete.count(',') else ','
+    colonnes = [colonne.strip().lower() for colonne in next(csv.reader([entete], delimiter=delimiteur), [])]
+    for numero, valeurs in enumerate(csv.reader(flux, delimiter=delimiteur), start=2):
+        if any(valeur.strip() for valeur in valeurs):
+            yield numero, dict(zip(colonnes, (valeur.strip() for valeur in valeurs)))
+
+
+def _montant(texte):
+    # Accepte "1 500,50" comme "1500.50"
+    montant = Decimal(texte.replace('\xa0', '').replace(' ', '').replace(',', '.'))
+    if not montant.is_finite() or montant <= 0:
+        raise InvalidOperation
+    return montant
+
+
+def _date(texte):
+    if not texte:
+        return None
+    date = parse_datetime(texte)
+    if date is None and (jour := parse_date(texte)) is not None:
+        date = datetime.combine(jour, time.min)
+    if date is not None and timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    return date
+
+
+def rapprocher(lignes, taille_lot=TAILLE_LOT, simulation=False):
+    """Applique les paiements d'un relevé aux factures, par lots de `taille_lot` lignes.
+
+    Chaque lot coûte quatre requêtes, quelle que soit sa taille: une lecture
+    verrouillée (SELECT ... FOR UPDATE) des factures citées, la lecture des
+    références déjà importées, un bulk_update et un bulk_create. Chaque lot est
+    validé dans sa propre transaction: un import interrompu se relance tel
+    quel, les lignes dont la référence a déjà été vue sont écartées. Les
+    lignes non rapprochées (facture inconnue ou annulée, montant illisible,
+    transaction déjà importée) sont retournées avec leur motif. Une ligne sans
+    référence ne peut pas être reconnue et est appliquée à chaque import.
+    Deux imports simultanés d'une même référence ne l'appliquent qu'une fois:
+    le lot qui perd la course est annulé puis rejoué, et la ligne écartée.
+    """
+    rapport = {'lignes': 0, 'rapprochees': 0, 'factures_mises_a_jour': 0, 'non_rapprochees': []}
+    references_vues = set()  # références du relevé en cours, pour les doublons internes et la simulation
+    lignes = iter(lignes)
+    while lot := list(islice(lignes, taille_lot)):
+        _rapprocher_lot(lot, rapport, references_vues, simulation)
+    rapport['non_rapprochees'].sort(key=lambda rejet: rejet['ligne'])
+    return rapport
+
+
+def _rapprocher_lot(lot, rapport, references_vues, simulation):
+    rapport['lignes'] += len(lot)
+    paiements = {}  # numero_facture -> [(numero_ligne, reference, montant, mode, date)]
+    for numero_ligne, ligne in lot:
+        numero_facture = ligne.get('numero_facture', '').upper()
+        reference = ligne.get('reference') or None
+        if reference is not None and reference in references_vues:
+            _rejeter(rapport, numero_ligne, numero_facture, 'Transaction déjà importée')
+            continue
+        try:
+            montant = _montant(ligne.get('montant', ''))
+        except (InvalidOperation, ValueError):
+            _rejeter(rapport, numero_ligne, numero_facture, 'Montant invalide')
+            continue
+        mode = ligne.get('mode_paiement', '').upper() or None
+        if mode is not None and mode not in MODES_PAIEMENT:
+            _rejeter(rapport, numero_ligne, numero_facture, 'Mode de paiement inconnu')
+            continue
+        try:
+            date = _date(ligne.get('date_paiement', ''))
+        except ValueError:
+            _rejeter(rapport, numero_ligne, numero_facture, 'Date invalide')
+            continue
+        if reference is not None:
+            references_vues.add(reference)
+        paiements.setdefault(numero_facture, []).append((numero_ligne, reference, montant, mode, date))
+
+    for tentative in range(1, TENTATIVES_LOT + 1):
+        resultat = {'rapprochees': 0, 'factures_mises_a_jour': 0, 'non_rapprochees': []}
+        try:
+            _appliquer_lot(paiements, resultat, simulation)
+        except IntegrityError:
+            # Référence validée par un import concurrent depuis notre lecture: la relecture l'écartera
+            if tentative == TENTATIVES_LOT:
+                raise
+            continue
+        break
+    rapport['rapprochees'] += resultat['rapprochees']
+    rapport['factures_mises_a_jour'] += resultat['factures_mises_a_jour']
+    rapport['non_rapprochees'].extend(resultat['non_rapprochees'])
+
+
+def _references_importees(references):
+    return set(PaiementReleveModel.objects.filter(reference__in=references).values_list('reference', flat=True))
+
+
+def _appliquer_lot(paiements, rapport, simulation):
+    with transaction.atomic():
+        factures = {
+            facture.numero_facture: facture
+            for facture in FactureModel.objects.select_for_update().filter(numero_facture__in=paiements)
+        }
+        # Lues après le verrou: un import concurrent des mêmes lignes a déjà validé les siennes
+        deja_importees = _references_importees([paiement[1] for paiements_facture in paiements.values()
+                                                for paiement in paiements_facture if paiement[1] is not None])
+        modifiees = []
+        enregistres = []
+        maintenant = timezone.now()
+        for numero_facture, paiements_facture in paiements.items():
+            facture = factures.get(numero_facture)
+            motif = 'Facture inconnue' if facture is None else 'Facture annulée' if facture.statut == 'ANNULEE' else None
+            if motif:
+                for numero_ligne, *_ in paiements_facture:
+                    _rejeter(rapport, numero_ligne, numero_facture, motif)
+                continue
+            appliques = 0
+            for numero_ligne, reference, montant, mode, date in paiements_facture:
+                if reference in deja_importees:
+                    _rejeter(rapport, numero_ligne, numero_facture, 'Transaction déjà importée')
+                    continue
+                facture.montant_paye += montant
+                facture.mode_paiement = mode or facture.mode_paiement
+                facture.date_paiement = date or maintenant
+                enregistres.append(PaiementReleveModel(
+                    reference=reference, facture=facture, montant=montant,
+                    mode_paiement=mode, date_paiement=facture.date_paiement,
+                ))
+                appliques += 1
+            if not appliques:
+                continue
+            facture.statut = 'PAYEE' if facture.montant_paye >= facture.montant_total else 'PARTIELLEMENT_PAYEE'
+            rapport['rapprochees'] += appliques
+            modifiees.append(facture)
+        FactureModel.objects.bulk_update(
+            modifiees, ['montant_paye', 'statut', 'mode_paiement', 'date_paiement'], batch_size=TAILLE_LOT
+        )
+        PaiementReleveModel.objects.bulk_create(enregistres, batch_size=TAILLE_LOT)
+        rapport['factures_mises_a_jour'] += len(modifiees)
+        if simulation:
+            transaction.set_rollback(True)
+
+
+def _rejeter(rapport, numero_ligne, numero_facture, motif):
+    rapport['non_rapprochees'].append({'ligne': numero_ligne, 'numero_facture': numero_facture, 'motif': motif})
@@ -0,0 +1,51 @@
+"""Recherche approchée des expéditeurs et destinataires"""
+from django.conf import settings
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import FloatField, Q, Value
+from django.db.models.functions import Greatest
+
+from api.models import DestinataireModel, ExpediteurModel
+from api.services.lru import CacheLRU
+from api.services.telephone import normaliser_telephone
+
+MODELES = (('expediteur', ExpediteurModel), ('destinataire', DestinataireModel))
+CHAMPS = ('id', 'nom_complet', 'telephone', 'ville', 'quartier')
+
+# Requêtes fréquentes (client qui revient au guichet); vidé à chaque écriture d'un client
+cache_recherche = CacheLRU(taille=settings.RECHERCHE_CLIENTS_CACHE_TAILLE, ttl=settings.RECHERCHE_CLIENTS_CACHE_TTL)
+
+
+def _rechercher_modele(modele, q, chiffres, limite):
+    if len(chiffres) >= 8:
+        # Numéro complet: égalité exacte sur la colonne normalisée
+        return modele.objects.filter(telephone_normalise=chiffres).annotate(
+            score=Value(1.0, output_field=FloatField())
+        ).values(*CHAMPS, 'score')[:limite]
+    if chiffres and chiffres == q.replace(' ', ''):
+        # Fragment de numéro: similarité de mot, le fragment n'est qu'une partie du numéro
+        return modele.objects.filter(telephone__trigram_word_similar=chiffres).annotate(
+            score=TrigramWordSimilarity(chiffres, 'telephone')
+        ).order_by('-score').values(*CHAMPS, 'score')[:limite]
+    # Similarité de mot: « kouassi » doit trouver « Kouassi Jean Marc » malgré la longueur du nom complet
+    return modele.objects.filter(
+        Q(nom_complet__trigram_word_similar=q) | Q(quartier__trigram_word_similar=q)
+    ).annotate(
+        score=Greatest(TrigramWordSimilarity(q, 'nom_complet'), TrigramWordSimilarity(q, 'quartier'))
+    ).order_by('-score').values(*CHAMPS, 'score')[:limite]
+
+
+def rechercher_clients(q, limite=20):
+    """Expéditeurs et destinataires proches de q (nom, quartier ou téléphone), par similarité décroissante"""
+    q = ' '.join(q.split())
+    cle = (q.lower(), limite)
+    resultats = cache_recherche.get(cle)
+    if resultats is not None:
+        return resultats
+    chiffres = normaliser_telephone(q)
+    resultats = []
+    for type_client, modele in MODELES:
+        resultats.extend({'type': type_client, **ligne} for ligne in _rechercher_modele(modele, q, chiffres, limite))
+    resultats.sort(key=lambda ligne: ligne['score'], reverse=True)
+    resultats = resultats[:limite]
+    cache_recherche.set(cle, resultats)
+    return resultats
@@ -0,0 +1,108 @@
+"""Allocation de numéros uniques par blocs, sans sonder les tables métier"""
+import os
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+
+class SequenceEpuisee(Exception):
+    """La séquence a dépassé la plus grande valeur que son format peut afficher"""
+
+
+class AllocateurSequence:
+    """Distribue des numéros croissants pour des séquences nommées.
+
+    Chaque processus réserve un bloc de SEQUENCE_TAILLE_BLOC numéros en une
+    seule requête (INSERT ... ON CONFLICT DO UPDATE ... RETURNING) puis les
+    distribue en mémoire. La réservation passe par une connexion dédiée en
+    autocommit: elle n'est jamais annulée avec la transaction de l'appelant,
+    si bien que deux processus ne peuvent pas recevoir le même bloc. Les
+    numéros d'un bloc non consommé sont perdus, la numérotation tolère donc
+    des trous.
+    """
+
+    def __init__(self):
+        self._reinitialiser()
+        os.register_at_fork(after_in_child=self._reinitialiser)
+
+    def _reinitialiser(self):
+        # Après un fork (gunicorn --preload), les blocs et la connexion du
+        # parent ne doivent pas être réutilisés par l'enfant.
+        self._lock = threading.Lock()
+        self._blocs = {}
+        self._local = threading.local()
+
+    def _connexion(self):
+        connexion = getattr(self._local, 'connexion', None)
+        if connexion is None:
+            connexion = connections.create_connection(DEFAULT_DB_ALIAS)
+            self._local.connexion = connexion
+        else:
+            # Connexion hors du cycle requête de Django: CONN_MAX_AGE, CONN_HEALTH_CHECKS
+            # et erreurs précédentes sont vérifiés ici; une connexion fermée est rouverte au curseur suivant
+            connexion.close_if_unusable_or_obsolete()
+        return connexion
+
+    def _abandonner(self):
+        connexion = getattr(self._local, 'connexion', None)
+        self._local.connexion = None
+        if connexion is not None:
+            try:
+                connexion.close()
+            except DatabaseError:
+                pass
+
+    def _executer(self, nom, taille):
+        connexion = self._connexion()
+        table = connexion.ops.quote_name('sequence_numerotation')
+        with connexion.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (nom, valeur) VALUES (%s, %s) "
+                f"ON CONFLICT (nom) DO UPDATE SET valeur = {table}.valeur + EXCLUDED.valeur "
+                f"RETURNING valeur",
+                [nom, taille],
+            )
+            return cursor.fetchone()[0]
+
+    def _reserver(self, nom, taille):
+        try:
+            fin = self._executer(nom, taille)
+        except DatabaseError:
+            # Connexion coupée (redémarrage PostgreSQL, pgbouncer): on repart d'une connexion neuve,
+            # une seule fois. Un bloc réservé dont la réponse s'est perdue n'est qu'un trou de plus.
+            self._abandonner()
+            fin = self._executer(nom, taille)
+        return fin - taille + 1, fin
+
+    def suivant(self, nom, maximum=None):
+        """Retourne le prochain numéro de la séquence nom.
+
+        Lève SequenceEpuisee au-delà de maximum: un numéro de largeur fixe qui
+        gagnerait un chiffre changerait de format, et pourrait reproduire un
+        numéro existant d'un autre préfixe.
+        """
+        with self._lock:
+            prochain, fin = self._blocs.get(nom, (1, 0))
+            if prochain > fin:
+                prochain, fin = self._reserver(nom, getattr(settings, 'SEQUENCE_TAILLE_BLOC', 100))
+            if maximum is not None and prochain > maximum:
+                raise SequenceEpuisee(f'Séquence {nom} épuisée (maximum {maximum})')
+            self._blocs[nom] = (prochain + 1, fin)
+            return prochain
+
+
+def chiffre_controle(chiffres):
+    """Chiffre de contrôle de Luhn d'une chaîne de chiffres"""
+    total = 0
+    for position, chiffre in enumerate(reversed(chiffres)):
+        valeur = int(chiffre)
+        if position % 2 == 0:
+            valeur *= 2
+            if valeur > 9:
+                valeur -= 9
+        total += valeur
+    return str((10 - total % 10) % 10)
+
+
+allocateur = AllocateurSequence()
@@ -0,0 +1,114 @@
+"""Agrégats journaliers du tableau de bord (tables stat_*)"""
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from api.models import (
+    ColisModel, FactureModel, LivraisonModel,
+    StatColisJourModel, StatLivraisonJourModel, StatRevenuJourModel,
+)
+
+
+def _plages(jours):
+    """Regroupe des jours en plages [début, fin) de jours consécutifs, en instants du fuseau courant"""
+    plages = []
+    for jour in sorted(jours):
+        if plages and plages[-1][1] == jour:
+            plages[-1][1] = jour + timedelta(days=1)
+        else:
+            plages.append([jour, jour + timedelta(days=1)])
+    return [tuple(timezone.make_aware(datetime.combine(borne, time.min)) for borne in plage) for plage in plages]
+
+
+def _dans(champ, plages):
+    """Filtre par plages d'instants: servi par l'index de la colonne, contrairement à TruncDate(champ)__in"""
+    filtre = Q()
+    for debut, fin in plages:
+        filtre |= Q(**{f'{champ}__gte': debut, f'{champ}__lt': fin})
+    return filtre
+
+
+def jours_modifies(depuis):
+    """Jours dont les agrégats ont pu changer depuis l'instant `depuis`.
+
+    Chaque filtre porte sur une colonne indexée; date_modification d'une
+    livraison avance à chaque changement (départ, arrivée, statut).
+    """
+    jours = set(
+        ColisModel.objects.filter(date_modification__gte=depuis)
+        .annotate(jour=TruncDate('date_creation')).values_list('jour', flat=True).distinct()
+    )
+    jours.update(
+        FactureModel.objects.filter(Q(date_emission__gte=depuis) | Q(date_paiement__gte=depuis))
+        .annotate(jour=TruncDate('date_emission')).values_list('jour', flat=True).distinct()
+    )
+    jours.update(
+        LivraisonModel.objects.filter(date_modification__gte=depuis)
+        .annotate(jour=TruncDate('date_assignation')).values_list('jour', flat=True).distinct()
+    )
+    return jours
+
+
+def tous_les_jours():
+    """Tous les jours présents dans les tables sources (reconstruction complète)"""
+    jours = set(ColisModel.objects.annotate(jour=TruncDate('date_creation')).values_list('jour', flat=True).distinct())
+    jours.update(FactureModel.objects.annotate(jour=TruncDate('date_emission')).values_list('jour', flat=True).distinct())
+    jours.update(
+        LivraisonModel.objects.annotate(jour=TruncDate('date_assignation')).values_list('jour', flat=True).distinct()
+    )
+    return jours
+
+
+def recalculer_jours(jours):
+    """Recalcule les agrégats des jours donnés à partir des tables sources.
+
+    Chaque jour est remplacé en entier (suppression puis insertion groupée):
+    recalculer deux fois le même jour donne le même résultat.
+    """
+    jours = sorted(jours)
+    if not jours:
+        return 0
+    plages = _plages(jours)
+    colis = (
+        ColisModel.objects.filter(_dans('date_creation', plages)).annotate(jour=TruncDate('date_creation'))
+        .values('jour', 'statut', 'destinataire__ville').annotate(nombre=Count('id'))
+    )
+    revenus = (
+        FactureModel.objects.filter(_dans('date_emission', plages)).annotate(jour=TruncDate('date_emission'))
+        .values('jour', 'mode_paiement')
+        .annotate(nombre_factures=Count('id'), montant_total=Sum('montant_total'), montant_paye=Sum('montant_paye'))
+    )
+    livraisons = (
+        LivraisonModel.objects.filter(_dans('date_assignation', plages))
+        .annotate(jour=TruncDate('date_assignation'))
+        .values('jour', 'livreur_id')
+        .annotate(
+            nombre=Count('id'),
+            terminees=Coalesce(Count('id', filter=Q(statut='TERMINEE')), 0),
+            echouees=Coalesce(Count('id', filter=Q(statut='ECHOUEE')), 0),
+        )
+    )
+    with transaction.atomic():
+        StatColisJourModel.objects.filter(jour__in=jours).delete()
+        StatColisJourModel.objects.bulk_create([
+            StatColisJourModel(jour=ligne['jour'], statut=ligne['statut'],
+                               ville=ligne['destinataire__ville'] or '', nombre=ligne['nombre'])
+            for ligne in colis
+        ])
+        StatRevenuJourModel.objects.filter(jour__in=jours).delete()
+        StatRevenuJourModel.objects.bulk_create([
+            StatRevenuJourModel(jour=ligne['jour'], mode_paiement=ligne['mode_paiement'] or '',
+                                nombre_factures=ligne['nombre_factures'], montant_total=ligne['montant_total'],
+                                montant_paye=ligne['montant_paye'])
+            for ligne in revenus
+        ])
+        StatLivraisonJourModel.objects.filter(jour__in=jours).delete()
+        StatLivraisonJourModel.objects.bulk_create([
+            StatLivraisonJourModel(jour=ligne['jour'], livreur_id=ligne['livreur_id'], nombre=ligne['nombre'],
+                                   terminees=ligne['terminees'], echouees=ligne['echouees'])
+            for ligne in livraisons
+        ])
+    return len(jours)
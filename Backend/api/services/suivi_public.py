@@ -0,0 +1,65 @@
+"""Suivi public des colis, servi depuis le cache"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from api.models import ColisModel
+
+
+def cle_cache(numero_suivi):
+    return f'suivi_public:{numero_suivi}'
+
+
+def _construire(numero_suivi):
+    colis = ColisModel.objects.filter(numero_suivi=numero_suivi).only(
+        'id', 'numero_suivi', 'statut', 'date_creation', 'date_livraison_prevue', 'date_livraison_reelle'
+    ).first()
+    if colis is None:
+        return None
+    historique = [
+        {
+            'statut': suivi.statut,
+            'statut_display': suivi.get_statut_display(),
+            'description': suivi.description,
+            'localisation': suivi.localisation,
+            'date': suivi.date_creation,
+        }
+        for suivi in colis.suivis.only('statut', 'description', 'localisation', 'date_creation', 'colis_id')
+    ]
+    return {
+        'numero_suivi': colis.numero_suivi,
+        'statut': colis.statut,
+        'statut_display': colis.get_statut_display(),
+        'date_creation': colis.date_creation,
+        'date_livraison_prevue': colis.date_livraison_prevue,
+        'date_livraison_reelle': colis.date_livraison_reelle,
+        'historique': historique,
+    }
+
+
+def obtenir_suivi_public(numero_suivi):
+    """Retourne l'entrée en cache {'etag', 'donnees'} du colis, la construisant au besoin.
+
+    Les numéros inconnus sont aussi mis en cache (donnees à None), pour une
+    durée plus courte, afin que les sondages répétés n'atteignent pas la base.
+    """
+    entree = cache.get(cle_cache(numero_suivi))
+    if entree is not None:
+        return entree
+    donnees = _construire(numero_suivi)
+    contenu = json.dumps(donnees, cls=DjangoJSONEncoder, sort_keys=True)
+    entree = {
+        'etag': '"%s"' % hashlib.sha1(contenu.encode()).hexdigest(),
+        'donnees': json.loads(contenu),
+    }
+    duree = settings.SUIVI_PUBLIC_CACHE_TTL if donnees is not None else settings.SUIVI_PUBLIC_CACHE_TTL_INCONNU
+    cache.set(cle_cache(numero_suivi), entree, duree)
+    return entree
+
+
+def invalider_suivi_public(numeros_suivi):
+    """Retire du cache les colis dont le statut ou l'historique a changé"""
+    cache.delete_many([cle_cache(numero) for numero in numeros_suivi])
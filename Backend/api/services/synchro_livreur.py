@@ -0,0 +1,179 @@
+"""Synchronisation incrémentale de l'application mobile des livreurs"""
+import base64
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api.models import IdempotenceModel, LivraisonModel, TeleversementModel
+from api.services.affectation import LIVRAISONS_ACTIVES
+from api.services.livraisons import ChangementInvalide, appliquer_changements
+from api.services.photos import demander_traitement
+from api.services.televersements import termines
+
+# Champs envoyés au téléphone: le strict nécessaire à la tournée
+CHAMPS = {
+    'id': 'id',
+    'statut': 'statut',
+    'heure_depart': 'heure_depart',
+    'heure_arrivee': 'heure_arrivee',
+    'motif_echec': 'motif_echec',
+    'modifie': 'date_modification',
+    'numero_suivi': 'colis__numero_suivi',
+    'poids': 'colis__poids',
+    'instructions': 'colis__instructions_speciales',
+    'destinataire': 'colis__destinataire__nom_complet',
+    'telephone': 'colis__destinataire__telephone',
+    'adresse': 'colis__destinataire__adresse_complete',
+    'quartier': 'colis__destinataire__quartier',
+    'ville': 'colis__destinataire__ville',
+    'latitude': 'colis__destinataire__latitude',
+    'longitude': 'colis__destinataire__longitude',
+}
+
+
+class CurseurInvalide(ValueError):
+    pass
+
+
+def encoder_curseur(date_modification, pk):
+    return base64.urlsafe_b64encode(f'{date_modification.isoformat()}|{pk}'.encode()).decode()
+
+
+def decoder_curseur(curseur):
+    try:
+        date_texte, pk = base64.urlsafe_b64decode(curseur.encode()).decode().split('|')
+        date_modification = parse_datetime(date_texte)
+        if date_modification is None:
+            raise ValueError
+        return date_modification, int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise CurseurInvalide('Curseur invalide')
+
+
+def changements(livreur_id, curseur=None, taille=None):
+    """Livraisons du livreur modifiées depuis `curseur`, par (date_modification, id) croissants.
+
+    Sans curseur, seules les livraisons modifiées pendant les
+    LIVREUR_SYNC_JOURS derniers jours sont envoyées: le coût suit le nombre
+    de changements, pas l'historique. Les lignes modifiées depuis moins de
+    LIVREUR_SYNC_MARGE_SECONDES sont gardées pour la synchronisation suivante,
+    afin qu'une transaction validée en retard ne passe pas derrière le curseur.
+    Retourne (lignes, curseur suivant, reste-t-il des lignes).
+    """
+    taille = taille or settings.LIVREUR_SYNC_TAILLE
+    maintenant = timezone.now()
+    queryset = LivraisonModel.objects.filter(
+        livreur_id=livreur_id,
+        date_modification__lte=maintenant - timedelta(seconds=settings.LIVREUR_SYNC_MARGE_SECONDES),
+    )
+    if curseur:
+        date_modification, pk = decoder_curseur(curseur)
+        queryset = queryset.filter(
+            Q(date_modification__gt=date_modification) | Q(date_modification=date_modification, id__gt=pk)
+        )
+    else:
+        queryset = queryset.filter(date_modification__gte=maintenant - timedelta(days=settings.LIVREUR_SYNC_JOURS))
+    lignes = list(queryset.order_by('date_modification', 'id').values(*CHAMPS.values())[:taille + 1])
+    plus = len(lignes) > taille
+    lignes = lignes[:taille]
+    if lignes:
+        curseur = encoder_curseur(lignes[-1]['date_modification'], lignes[-1]['id'])
+    return [{cle: ligne[champ] for cle, champ in CHAMPS.items()} for ligne in lignes], curseur, plus
+
+
+def actives(livreur_id):
+    """Identifiants des livraisons en cours du livreur: le téléphone oublie les autres (réaffectations)"""
+    return list(LivraisonModel.objects.filter(livreur_id=livreur_id, statut__in=LIVRAISONS_ACTIVES)
+                .order_by('id').values_list('id', flat=True))
+
+
+def _preuves(utilisateur, operations):
+    """Prépare la lecture des preuves de livraison (signature, photo téléversée) d'un lot.
+
+    Les téléversements référencés sont lus en une requête; retourne la
+    fonction `preparer` d'appliquer_changements et le dictionnaire, rempli au
+    fil du lot, des téléversements rattachés (téléversement -> livraison).
+    """
+    photos = termines(utilisateur, {str(operation['photo']) for operation in operations if operation.get('photo')})
+    rattaches = {}
+
+    def preparer(livraison, operation):
+        signature, photo = operation.get('signature'), operation.get('photo')
+        if not signature and not photo:
+            return
+        if operation.get('statut') != 'TERMINEE':
+            raise ChangementInvalide('Preuve de livraison réservée au statut TERMINEE')
+        if signature and (not isinstance(signature, str) or len(signature) > settings.LIVRAISON_SIGNATURE_MAX):
+            raise ChangementInvalide('Signature invalide')
+        televersement = photos.get(str(photo)) if photo else None
+        if photo and televersement is None:
+            raise ChangementInvalide('Photo introuvable ou incomplète')
+        if signature:
+            livraison.signature_destinataire = signature
+        if televersement is not None:
+            livraison.photo_livraison.name = televersement.fichier
+            rattaches[televersement.pk] = livraison.pk
+
+    return preparer, rattaches
+
+
+def synchroniser(utilisateur, livreur_id, operations):
+    """Applique des opérations hors ligne [{cle, livraison, statut, ...}], chacune au plus une fois.
+
+    Une opération dont la clé est déjà connue reçoit le résultat enregistré
+    lors de sa première application. Les livraisons visées sont verrouillées
+    avant la lecture des clés: deux envois simultanés du même lot sont
+    sérialisés; une clé enregistrée par un envoi concurrent pendant le lot
+garde le résultat de cet envoi. Une confirmation (TERMINEE) peut porter sa preuve: `signature`
+    et `photo` (identifiant d'un téléversement terminé). Tout le lot est
+    écrit dans une transaction.
+    """
+    with transaction.atomic():
+        list(LivraisonModel.objects.select_for_update().filter(
+            livreur_id=livreur_id, pk__in={operation.get('livraison') for operation in operations
+                                           if isinstance(operation.get('livraison'), int)}
+        ).values_list('id', flat=True))
+        connues = dict(IdempotenceModel.objects.filter(
+            utilisateur=utilisateur, cle__in=[operation['cle'] for operation in operations]
+        ).values_list('cle', 'resultat'))
+
+        nouvelles = {}
+        for operation in operations:
+            if operation['cle'] not in connues:
+                nouvelles.setdefault(operation['cle'], operation)
+        preparer, rattaches = _preuves(utilisateur, list(nouvelles.values()))
+        erreurs = appliquer_changements(livreur_id, utilisateur, list(nouvelles.values()), preparer=preparer,
+                                        champs=['signature_compressee', 'photo_livraison'])
+        # Une photo rattachée n'est plus un téléversement en attente (purge)
+        TeleversementModel.objects.filter(pk__in=list(rattaches)).delete()
+        demander_traitement(set(rattaches.values()))
+        resultats = {
+            cle: {'cle': cle, 'resultat': 'rejete', 'erreur': erreur} if erreur else {'cle': cle, 'resultat': 'applique'}
+            for cle, erreur in zip(nouvelles, erreurs)
+        }
+        # Un envoi concurrent visant d'autres livraisons (donc sans verrou commun) a pu enregistrer
+        # la même clé entre-temps: son résultat, seul conservé, est renvoyé comme déjà traité
+        IdempotenceModel.objects.bulk_create(
+            [IdempotenceModel(utilisateur=utilisateur, cle=cle, resultat=resultat)
+             for cle, resultat in resultats.items()],
+            ignore_conflicts=True,
+        )
+        stockes = dict(IdempotenceModel.objects.filter(utilisateur=utilisateur, cle__in=list(resultats))
+                       .values_list('cle', 'resultat'))
+        for cle, resultat in resultats.items():
+            if stockes.get(cle, resultat) != resultat:
+                connues[cle] = stockes[cle]
+    return [
+        {**connues[operation['cle']], 'deja_traite': True} if operation['cle'] in connues
+        else resultats[operation['cle']]
+        for operation in operations
+    ]
+
+
+def purger_idempotence(avant):
+    supprimees, _ = IdempotenceModel.objects.filter(date_creation__lt=avant).delete()
+    return supprimees
@@ -0,0 +1,58 @@
+"""Index en mémoire de la grille tarifaire"""
+import bisect
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils import timezone
+
+from api.services.index_partage import IndexPartage
+
+
+class TarifIndex(IndexPartage):
+    """Résolution des tarifs sans requête SQL.
+
+    Les tarifs actifs sont regroupés par type de service puis triés par
+    poids minimum: une recherche dichotomique écarte les intervalles qui
+    commencent après le poids demandé. L'index est invalidé par les signaux
+    post_save/post_delete de TarifModel, dans ce processus comme dans les
+    autres (version partagée, voir IndexPartage).
+    """
+
+    nom = 'tarifs'
+
+    def _ttl(self):
+        return settings.TARIF_INDEX_TTL
+
+    def _construire(self):
+        from api.models.TarifModel import TarifModel
+
+        intervalles = defaultdict(lambda: ([], []))
+        tarifs = TarifModel.objects.filter(actif=True).order_by('type_service', 'poids_min', 'pk').values_list(
+            'pk', 'type_service', 'poids_min', 'poids_max', 'prix', 'date_debut', 'date_fin'
+        )
+        for pk, type_service, poids_min, poids_max, prix, date_debut, date_fin in tarifs:
+            bornes, entrees = intervalles[type_service]
+            bornes.append(poids_min)
+            entrees.append((pk, poids_max, prix, date_debut, date_fin))
+        return dict(intervalles)
+
+    def trouver_prix(self, type_service, poids, jour=None):
+        """Retourne le prix du tarif applicable, ou None si aucun ne correspond.
+
+        Comme TarifModel.objects.filter(...).first(), le tarif de plus petite clé
+        primaire l'emporte lorsque plusieurs intervalles se chevauchent.
+        """
+        if poids is None:
+            return None
+        bornes, entrees = self._index().get(type_service, ((), ()))
+        jour = jour or timezone.localdate()
+        meilleur = None
+        for pk, poids_max, prix, date_debut, date_fin in entrees[:bisect.bisect_right(bornes, poids)]:
+            if poids_max < poids or date_debut > jour or (date_fin is not None and date_fin < jour):
+                continue
+            if meilleur is None or pk < meilleur[0]:
+                meilleur = (pk, prix)
+        return meilleur[1] if meilleur else None
+
+
+tarif_index = TarifIndex()
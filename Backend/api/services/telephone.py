@@ -0,0 +1,14 @@
+"""Normalisation des numéros de téléphone"""
+import re
+
+INDICATIF_PAYS = '225'
+
+
+def normaliser_telephone(telephone):
+    """Réduit un numéro à ses chiffres nationaux: '+225 07 08-09 10 11' -> '0708091011'"""
+    chiffres = re.sub(r'\D', '', telephone or '')
+    if chiffres.startswith('00' + INDICATIF_PAYS):
+        chiffres = chiffres[2 + len(INDICATIF_PAYS):]
+    elif chiffres.startswith(INDICATIF_PAYS) and len(chiffres) > 10:
+        chiffres = chiffres[len(INDICATIF_PAYS):]
+    return chiffres
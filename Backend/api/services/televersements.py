@@ -0,0 +1,197 @@
+"""Téléversements reprenables: les photos de livraison arrivent par morceaux"""
+import hashlib
+import os
+import re
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image, UnidentifiedImageError
+
+from api.models import TeleversementModel
+
+TYPES_ACCEPTES = {'image/jpeg': 'jpg', 'image/png': 'png', 'image/webp': 'webp'}
+# Taille des lectures et écritures: la mémoire utilisée ne dépend pas de la taille du fichier
+TAMPON = 64 * 1024
+EMPREINTE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class TeleversementInvalide(ValueError):
+    pass
+
+
+class TeleversementOccupe(ValueError):
+    pass
+
+
+class DecalageInvalide(ValueError):
+    """Le morceau ne commence pas là où le serveur s'est arrêté"""
+
+    def __init__(self, recu):
+        super().__init__(f'Reprise attendue à l\'octet {recu}')
+        self.recu = recu
+
+
+def chemin_partiel(televersement):
+    # Stockage sur disque (volume media): les morceaux sont ajoutés au fichier
+    return default_storage.path(f'{televersement.fichier}.part')
+
+
+def creer(utilisateur, taille, type_contenu, empreinte=''):
+    if not isinstance(taille, int) or not 0 < taille <= settings.TELEVERSEMENT_TAILLE_MAX:
+        raise TeleversementInvalide(f'Taille attendue entre 1 et {settings.TELEVERSEMENT_TAILLE_MAX} octets')
+    if type_contenu not in TYPES_ACCEPTES:
+        raise TeleversementInvalide(f'Type accepté: {", ".join(TYPES_ACCEPTES)}')
+    empreinte = (empreinte or '').lower()
+    if empreinte and not EMPREINTE.match(empreinte):
+        raise TeleversementInvalide('Empreinte SHA-256 invalide')
+    televersement = TeleversementModel(utilisateur=utilisateur, taille=taille, type_contenu=type_contenu,
+                                       empreinte=empreinte)
+    televersement.fichier = f'livraisons/{televersement.id.hex}.{TYPES_ACCEPTES[type_contenu]}'
+    televersement.save()
+    return televersement
+
+
+def ecrire_morceau(utilisateur, televersement_id, debut, flux, longueur):
+    """Écrit `longueur` octets lus dans `flux` à partir de l'octet `debut`.
+
+    Le morceau est copié par blocs de TAMPON octets, hors de toute
+    transaction: le téléversement est seulement réservé (colonne en_ecriture)
+    par une mise à jour conditionnelle, puis `recu` est enregistré à la fin.
+    Deux morceaux du même fichier ne s'écrivent jamais en même temps; une
+    réservation plus vieille que TELEVERSEMENT_RESERVATION_SECONDES (requête
+    tuée) peut être reprise. Pendant la copie, la réservation est prolongée
+    avant chaque bloc dès qu'un tiers de cette durée est écoulé: si elle a
+    été reprise entre-temps (client bloqué trop longtemps), l'écriture
+    s'arrête sans toucher au fichier du nouvel envoi. Si le client coupe en cours de route, les octets
+    reçus sont conservés et `recu` indique où reprendre. Le dernier morceau
+    déclenche la vérification du fichier.
+    """
+    televersement = TeleversementModel.objects.get(pk=televersement_id, utilisateur=utilisateur)
+    if televersement.statut == 'TERMINE':
+        return televersement
+    if longueur > settings.TELEVERSEMENT_MORCEAU_MAX or debut + longueur > televersement.taille:
+        raise TeleversementInvalide('Morceau trop grand')
+
+    reservation = timezone.now()
+    expiree = reservation - timedelta(seconds=settings.TELEVERSEMENT_RESERVATION_SECONDES)
+    reserve = TeleversementModel.objects.filter(
+        Q(en_ecriture__isnull=True) | Q(en_ecriture__lt=expiree),
+        pk=televersement.pk, statut='EN_COURS', recu=debut,
+    ).update(en_ecriture=reservation)
+    if not reserve:
+        televersement.refresh_from_db()
+        if televersement.statut == 'TERMINE':
+            return televersement
+        if televersement.recu != debut:
+            raise DecalageInvalide(televersement.recu)
+        raise TeleversementOccupe('Un autre morceau de ce fichier est en cours d\'envoi')
+
+    televersement.recu, televersement.statut = debut, 'EN_COURS'
+    erreur = None
+    try:
+        chemin = chemin_partiel(televersement)
+        os.makedirs(os.path.dirname(chemin), exist_ok=True)
+        ecrits = 0
+        prolongee = time.monotonic()
+        with open(chemin, 'r+b' if os.path.exists(chemin) else 'wb') as fichier:
+            fichier.seek(debut)
+            fichier.truncate()
+            try:
+                while ecrits < longueur:
+                    bloc = flux.read(min(TAMPON, longueur - ecrits))
+                    if not bloc:
+                        break
+                    if time.monotonic() - prolongee >= settings.TELEVERSEMENT_RESERVATION_SECONDES / 3:
+                        reservation = _prolonger(televersement, reservation)
+                        if reservation is None:
+                            raise TeleversementOccupe('Réservation reprise par un autre envoi de ce fichier')
+                        prolongee = time.monotonic()
+                    fichier.write(bloc)
+                    ecrits += len(bloc)
+            except OSError:
+                # Connexion coupée: on garde ce qui est arrivé
+                pass
+            fichier.flush()
+            os.fsync(fichier.fileno())
+        televersement.recu = debut + ecrits
+        if televersement.recu == televersement.taille:
+            erreur = _terminer(televersement, chemin)
+    finally:
+        # Enregistre la progression et libère la réservation, si elle est toujours à nous
+        if reservation is not None:
+            TeleversementModel.objects.filter(pk=televersement.pk, en_ecriture=reservation).update(
+                recu=televersement.recu, statut=televersement.statut, en_ecriture=None,
+                date_modification=timezone.now(),
+            )
+    if erreur:
+        raise TeleversementInvalide(erreur)
+    return televersement
+
+
+def _prolonger(televersement, reservation):
+    """Nouvelle date de réservation, ou None si un autre envoi a repris le téléversement"""
+    nouvelle = timezone.now()
+    if TeleversementModel.objects.filter(pk=televersement.pk, en_ecriture=reservation).update(en_ecriture=nouvelle):
+        return nouvelle
+    return None
+
+
+def _terminer(televersement, chemin):
+    """Vérifie le fichier complet puis le met à sa place; retourne l'erreur éventuelle.
+
+    En cas d'erreur le fichier est effacé et le téléversement repart de zéro.
+    """
+    empreinte = hashlib.sha256()
+    with open(chemin, 'rb') as fichier:
+        for bloc in iter(lambda: fichier.read(TAMPON), b''):
+            empreinte.update(bloc)
+    erreur = None
+    if televersement.empreinte and empreinte.hexdigest() != televersement.empreinte:
+        erreur = 'Empreinte SHA-256 différente: fichier corrompu'
+    else:
+        try:
+            # verify() contrôle la structure sans décoder les pixels
+            with Image.open(chemin) as image:
+                image.verify()
+        except (UnidentifiedImageError, OSError, SyntaxError, ValueError):
+            erreur = 'Image illisible'
+    if erreur:
+        os.remove(chemin)
+        televersement.recu = 0
+        return erreur
+    os.replace(chemin, default_storage.path(televersement.fichier))
+    televersement.statut = 'TERMINE'
+    return None
+
+
+def termines(utilisateur, identifiants):
+    """Téléversements terminés de l'utilisateur parmi `identifiants`, par identifiant texte"""
+    valides = set()
+    for identifiant in identifiants:
+        try:
+            valides.add(TeleversementModel._meta.pk.to_python(identifiant))
+        except ValidationError:
+            continue
+    return {str(televersement.pk): televersement for televersement in TeleversementModel.objects.filter(
+        utilisateur=utilisateur, statut='TERMINE', pk__in=valides
+    )}
+
+
+def purger_televersements(avant):
+    """Supprime les téléversements abandonnés (jamais terminés ou jamais rattachés à une livraison).
+
+    Un téléversement rattaché est supprimé par la confirmation qui l'utilise:
+    ceux qui restent n'ont pas de livraison.
+    """
+    abandonnes = list(TeleversementModel.objects.filter(date_modification__lt=avant))
+    TeleversementModel.objects.filter(pk__in=[televersement.pk for televersement in abandonnes]).delete()
+    for televersement in abandonnes:
+        nom = televersement.fichier if televersement.statut == 'TERMINE' else f'{televersement.fichier}.part'
+        if default_storage.exists(nom):
+            default_storage.delete(nom)
+    return len(abandonnes)
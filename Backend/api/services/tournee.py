@@ -0,0 +1,123 @@
+"""Ordre de passage d'une tournée de livraison"""
+import time
+
+import numpy as np
+
+from api.services.geo import RAYON_TERRE_KM
+
+
+def matrice_distances(latitudes, longitudes):
+    """Distances orthodromiques (km) entre tous les points, calculées d'un bloc"""
+    lat = np.radians(np.asarray(latitudes, dtype=float))
+    lon = np.radians(np.asarray(longitudes, dtype=float))
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * RAYON_TERRE_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def plus_proche_voisin(distances):
+    """Tournée initiale: depuis le point 0, toujours vers le point non visité le plus proche"""
+    n = len(distances)
+    visite = np.zeros(n, dtype=bool)
+    ordre = [0]
+    visite[0] = True
+    for _ in range(n - 1):
+        ligne = np.where(visite, np.inf, distances[ordre[-1]])
+        suivant = int(np.argmin(ligne))
+        ordre.append(suivant)
+        visite[suivant] = True
+    return np.array(ordre)
+
+
+def longueur(distances, ordre):
+    """Longueur du cycle ordre[0] -> ... -> ordre[-1] -> ordre[0]"""
+    return float(distances[ordre, np.roll(ordre, -1)].sum())
+
+
+def _deux_opt(distances, ordre, echeance):
+    """Une passe de 2-opt; retourne True si la tournée a été raccourcie"""
+    n = len(ordre)
+    ameliore = False
+    for i in range(1, n - 1):
+        if time.monotonic() > echeance:
+            break
+        # Inversion de ordre[i..j] pour tous les j > i à la fois
+        a, b = ordre[i - 1], ordre[i]
+        c = ordre[i + 1:]
+        e = np.roll(ordre, -1)[i + 1:]
+        gains = distances[a, b] + distances[c, e] - distances[a, c] - distances[b, e]
+        j = int(np.argmax(gains))
+        if gains[j] > 1e-9:
+            j += i + 1
+            ordre[i:j + 1] = ordre[i:j + 1][::-1]
+            ameliore = True
+    return ameliore
+
+
+def _or_opt(distances, ordre, echeance, longueurs=(1, 2, 3)):
+    """Une passe d'Or-opt (déplacement de segments de 1 à 3 arrêts); True si raccourcie"""
+    ameliore = False
+    for k in longueurs:
+        i = 1
+        while i + k <= len(ordre):
+            if time.monotonic() > echeance:
+                return ameliore
+            segment = ordre[i:i + k]
+            p, q = ordre[i - 1], ordre[(i + k) % len(ordre)]
+            gain_retrait = distances[p, segment[0]] + distances[segment[-1], q] - distances[p, q]
+            reste = np.concatenate([ordre[:i], ordre[i + k:]])
+            u, v = reste, np.roll(reste, -1)
+            # Insertion entre u et v, dans le sens d'origine ou inversé
+            couts = distances[u, segment[0]] + distances[segment[-1], v] - distances[u, v]
+            couts_inv = distances[u, segment[-1]] + distances[segment[0], v] - distances[u, v]
+            j, j_inv = int(np.argmin(couts)), int(np.argmin(couts_inv))
+            inverser = couts_inv[j_inv] < couts[j]
+            position, cout = (j_inv, couts_inv[j_inv]) if inverser else (j, couts[j])
+            if cout < gain_retrait - 1e-9:
+                insere = segment[::-1] if inverser else segment
+                ordre[:] = np.concatenate([reste[:position + 1], insere, reste[position + 1:]])
+                ameliore = True
+            else:
+                i += 1
+    return ameliore
+
+
+def optimiser(distances, budget=1.0):
+    """Ordre de visite quasi optimal du cycle partant du point 0, dans la limite de `budget` secondes.
+
+    Plus proche voisin, puis alternance de passes 2-opt et Or-opt tant
+    qu'elles raccourcissent la tournée et que le budget n'est pas épuisé.
+    Le point 0 reste en tête.
+    """
+    echeance = time.monotonic() + budget
+    ordre = plus_proche_voisin(distances)
+    if len(ordre) < 4:
+        return ordre
+    while time.monotonic() < echeance:
+        ameliore = _deux_opt(distances, ordre, echeance)
+        ameliore = _or_opt(distances, ordre, echeance) or ameliore
+        if not ameliore:
+            break
+    return ordre
+
+
+def planifier(depot, arrets, retour=False, budget=1.0):
+    """Ordonne les arrêts [(cle, latitude, longitude)] d'une tournée partant de `depot` (latitude, longitude).
+
+    Sans retour au dépôt, le trajet vers le dépôt est compté nul: le cycle
+    optimal est alors le meilleur chemin ouvert partant du dépôt. Les moves
+    restent valides, seules les arêtes vers le point 0 sont asymétriques.
+    Retourne ([(cle, distance depuis l'arrêt précédent)], distance totale en km).
+    """
+    latitudes = [depot[0]] + [arret[1] for arret in arrets]
+    longitudes = [depot[1]] + [arret[2] for arret in arrets]
+    distances = matrice_distances(latitudes, longitudes)
+    if not retour:
+        distances[:, 0] = 0
+    ordre = optimiser(distances, budget)
+    etapes = [
+        (arrets[point - 1][0], float(distances[precedent, point]))
+        for precedent, point in zip(ordre[:-1], ordre[1:])
+    ]
+    return etapes, longueur(distances, ordre)
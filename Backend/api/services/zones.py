@@ -0,0 +1,87 @@
+"""Index en mémoire des zones de livraison par (ville, quartier)"""
+import re
+from collections import namedtuple
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils import timezone
+
+from api.services.geo import distance_km
+from api.services.geocodage import normaliser_lieu
+from api.services.index_partage import IndexPartage
+
+Zone = namedtuple('Zone', 'pk tarif_base tarif_km_supplementaire delai_livraison_jours')
+
+
+def quartiers(texte):
+    """'Cocody, Riviéra 2; Angré' -> {'cocody', 'riviera 2', 'angre'}; vide si la zone couvre toute la ville"""
+    return {quartier for quartier in (normaliser_lieu(morceau) for morceau in re.split(r'[,;\n]+', texte or ''))
+            if quartier}
+
+
+def synchroniser_quartiers(zone):
+    """Réécrit les lignes zone_quartier d'une zone à partir de son champ quartiers"""
+    from api.models import ZoneQuartierModel
+
+    ville = normaliser_lieu(zone.ville)
+    ZoneQuartierModel.objects.filter(zone=zone).delete()
+    ZoneQuartierModel.objects.bulk_create([
+        ZoneQuartierModel(zone=zone, ville=ville, quartier=quartier)
+        for quartier in (quartiers(zone.quartiers) or {''})
+    ])
+
+
+class ZoneIndex(IndexPartage):
+    """Zone de livraison d'un (ville, quartier) sans requête SQL.
+
+    Dictionnaire construit depuis zone_quartier au premier accès, invalidé
+    par les signaux de ZoneLivraisonModel dans tous les processus (version
+    partagée, voir IndexPartage). Quand plusieurs zones actives couvrent un
+    lieu, la plus ancienne l'emporte.
+    """
+
+    nom = 'zones'
+
+    def _ttl(self):
+        return settings.ZONE_INDEX_TTL
+
+    def _construire(self):
+        from api.models import ZoneQuartierModel
+
+        zones = {}
+        lignes = ZoneQuartierModel.objects.filter(zone__active=True).order_by('-zone_id').values_list(
+            'ville', 'quartier', 'zone_id', 'zone__tarif_base', 'zone__tarif_km_supplementaire',
+            'zone__delai_livraison_jours',
+        )
+        for ville, quartier, *zone in lignes:
+            zones[(ville, quartier)] = Zone(*zone)
+        return zones
+
+    def trouver(self, ville, quartier=None):
+        """Zone du quartier, sinon zone couvrant toute la ville, sinon None"""
+        zones = self._index()
+        ville = normaliser_lieu(ville)
+        return zones.get((ville, normaliser_lieu(quartier))) or zones.get((ville, ''))
+
+
+zone_index = ZoneIndex()
+
+
+def frais_distance(zone, destinataire):
+    """tarif_base, plus tarif_km_supplementaire par km au-delà de ZONE_KM_INCLUS depuis le dépôt.
+
+    Sans coordonnées connues pour le destinataire, seul le tarif de base
+    s'applique.
+    """
+    frais = zone.tarif_base
+    if destinataire.latitude is not None and destinataire.longitude is not None:
+        km = distance_km(settings.TOURNEE_DEPOT_LATITUDE, settings.TOURNEE_DEPOT_LONGITUDE,
+                         destinataire.latitude, destinataire.longitude)
+        km_supplementaires = max(0.0, km - settings.ZONE_KM_INCLUS)
+        frais += zone.tarif_km_supplementaire * Decimal(str(round(km_supplementaires, 2)))
+    return frais.quantize(Decimal('0.01'))
+
+
+def date_livraison_prevue(zone, depuis=None):
+    return (depuis or timezone.now()) + timedelta(days=zone.delai_livraison_jours)
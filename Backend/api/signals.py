@@ -0,0 +1,137 @@
+"""Signaux de l'application api
+
+Les caches et index sont invalidés à la validation de la transaction: invalidés
+plus tôt, une lecture concurrente pourrait y remettre l'état d'avant.
+"""
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from api.models import (
+    ColisModel, DestinataireModel, ExpediteurModel, LivraisonModel, LivreurModel, PositionLivreurModel, SuiviModel,
+    TarifModel, ZoneLivraisonModel, ZoneQuartierModel,
+)
+from api.services.evenements import COLIS_STATUT, evenement_suivi, publier_evenements
+from api.services.livraisons import signaler_modification
+from api.services.photos import demander_traitement
+from api.services.recherche_clients import cache_recherche
+from api.services.suivi_public import invalider_suivi_public
+from api.services.tarif_index import tarif_index
+from api.services.zones import synchroniser_quartiers, zone_index
+
+
+@receiver([post_save, post_delete], sender=TarifModel)
+def invalider_index_tarifs(sender, **kwargs):
+    """Reconstruit l'index tarifaire au prochain calcul"""
+    transaction.on_commit(tarif_index.invalider)
+
+
+@receiver(post_save, sender=ZoneLivraisonModel)
+def synchroniser_zone(sender, instance, **kwargs):
+    """Recalcule les quartiers normalisés de la zone"""
+    synchroniser_quartiers(instance)
+    transaction.on_commit(zone_index.invalider)
+
+
+@receiver(post_delete, sender=ZoneLivraisonModel)
+@receiver([post_save, post_delete], sender=ZoneQuartierModel)
+def invalider_index_zones(sender, **kwargs):
+    """Reconstruit l'index des zones au prochain accès"""
+    transaction.on_commit(zone_index.invalider)
+
+
+@receiver(post_save, sender=ColisModel)
+def invalider_suivi_public_colis(sender, instance, **kwargs):
+    """Le statut du colis a pu changer: la page de suivi public est recalculée"""
+    numeros = [instance.numero_suivi]
+    transaction.on_commit(lambda: invalider_suivi_public(numeros))
+
+
+@receiver([post_save, post_delete], sender=SuiviModel)
+def invalider_suivi_public_historique(sender, instance, **kwargs):
+    """Nouvelle étape de suivi: la page de suivi public est recalculée"""
+    numeros = [instance.colis.numero_suivi]
+    transaction.on_commit(lambda: invalider_suivi_public(numeros))
+
+
+@receiver(post_save, sender=ColisModel)
+def signaler_colis_modifie(sender, instance, created, **kwargs):
+    """Les livraisons en cours du colis sont renvoyées aux livreurs (synchronisation mobile)"""
+    if not created:
+        signaler_modification(colis_ids=[instance.pk])
+
+
+@receiver(post_save, sender=DestinataireModel)
+def signaler_destinataire_modifie(sender, instance, created, **kwargs):
+    """Adresse ou téléphone modifié: les livraisons en cours sont renvoyées aux livreurs"""
+    if not created:
+        signaler_modification(destinataire_ids=[instance.pk])
+
+
+@receiver([post_save, post_delete], sender=ExpediteurModel)
+@receiver([post_save, post_delete], sender=DestinataireModel)
+def vider_cache_recherche_clients(sender, **kwargs):
+    """Un client a changé: les résultats de recherche en mémoire sont périmés"""
+    transaction.on_commit(cache_recherche.vider)
+
+
+@receiver(post_init, sender=ColisModel)
+def memoriser_statut_colis(sender, instance, **kwargs):
+    """Statut lu en base, pour ne publier que les changements"""
+    instance._statut_initial = instance.__dict__.get('statut')
+
+
+@receiver(post_save, sender=ColisModel)
+def publier_statut_colis(sender, instance, created, **kwargs):
+    """Pousse le nouveau statut du colis aux abonnés du flux /api/events/"""
+    if not created and instance.statut == instance._statut_initial:
+        return
+    instance._statut_initial = instance.statut
+    if ColisModel.destinataire.is_cached(instance):
+        ville = instance.destinataire.ville
+    else:
+        ville = DestinataireModel.objects.filter(pk=instance.destinataire_id).values_list('ville', flat=True).first()
+    publier_evenements([{
+        'type': COLIS_STATUT, 'numero_suivi': instance.numero_suivi, 'ville': ville, 'statut': instance.statut,
+    }])
+
+
+@receiver(post_save, sender=SuiviModel)
+def publier_suivi(sender, instance, created, **kwargs):
+    """Pousse la nouvelle étape de suivi aux abonnés du flux /api/events/"""
+    if not created:
+        return
+    numero_suivi, ville = ColisModel.objects.filter(pk=instance.colis_id).values_list(
+        'numero_suivi', 'destinataire__ville'
+    ).first() or (None, None)
+    publier_evenements([evenement_suivi(instance, numero_suivi, ville)])
+
+
+@receiver(post_init, sender=LivraisonModel)
+def memoriser_photo_livraison(sender, instance, **kwargs):
+    """Photo lue en base, pour ne traiter que les nouvelles photos"""
+    photo = instance.__dict__.get('photo_livraison')
+    instance._photo_initiale = getattr(photo, 'name', photo)
+
+
+@receiver(post_save, sender=LivraisonModel)
+def traiter_photo_livraison(sender, instance, **kwargs):
+    """Demande les rendus WebP d'une photo envoyée par l'API ou l'admin (le lot mobile les demande lui-même)"""
+    if 'photo_livraison' not in instance.__dict__:
+        return
+    nom = instance.photo_livraison.name
+    if not nom or nom == instance._photo_initiale:
+        return
+    instance._photo_initiale = nom
+    if instance.photo_miniature:
+        # La miniature de l'ancienne photo ne vaut plus
+        instance.photo_miniature = None
+        LivraisonModel.objects.filter(pk=instance.pk).update(photo_miniature=None)
+    demander_traitement({instance.pk})
+
+
+@receiver(pre_delete, sender=LivreurModel)
+def supprimer_positions_livreur(sender, instance, using, **kwargs):
+    """Efface les positions du livreur en une requête, hors PostgreSQL où la base s'en charge (ON DELETE CASCADE)"""
+    if connections[using].vendor != 'postgresql':
+        PositionLivreurModel.objects.using(using).filter(livreur=instance)._raw_delete(using)
@@ -1,3 +1,1784 @@
-from django.test import TestCase
+import asyncio
+import csv
+import datetime
+import gzip
+import hashlib
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import re
+import shutil
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import connection, connections, transaction
+from django.db.models import Q
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.pagination import Cursor
+from rest_framework.test import APIClient
+from rest_framework.throttling import ScopedRateThrottle
+
+from api.models import (
+    ColisModel, DestinataireModel, EvenementOutboxModel, ExpediteurModel, FactureModel, GeocodageModel,
+    IdempotenceModel, LivraisonModel, LivreurModel, NotificationModel, PaiementReleveModel, PositionLivreurModel,
+    SequenceModel, SuiviModel, TarifModel, TeleversementModel, UserModel, VehiculeModel, ZoneLivraisonModel,
+)
+from api.pagination import PaginationCurseur
+from api.services import images, photos, positions, rapprochement, synchro_livreur, televersements
+from api.services.affectation import ORDRE_PRIORITE, Affectateur
+from api.services.clients import dedupliquer, obtenir_ou_creer_client
+from api.services.colis_intake import enregistrer_colis
+from api.services.evenements import (
+    CHARGE_MAX, COLIS_STATUT, Abonnement, Diffuseur, LocalBackend, PostgresBackend, charge_notify, evenement_suivi,
+)
+from api.services.geocodage import GazetteerFournisseur, Geocodeur, NominatimFournisseur, cle_adresse
+from api.services.notifications import DispatcheurNotifications, MemoireBackend
+from api.services.outbox import RelaisOutbox, gestionnaire, publier
+from api.services.rapprochement import rapprocher
+from api.services.lru import CacheLRU
+from api.services.recherche_clients import cache_recherche, rechercher_clients
+from api.services.sequences import AllocateurSequence, SequenceEpuisee, allocateur
+from api.services.suivi_public import cle_cache, obtenir_suivi_public
+from api.services.tarif_index import TarifIndex, tarif_index
+from api.services.telephone import normaliser_telephone
+from api.services.televersements import TeleversementOccupe, ecrire_morceau
+from api.services.tournee import longueur, matrice_distances, optimiser, planifier, plus_proche_voisin
+
+_compteur = itertools.count(1)
+
+
+def _tirer_numeros(nombre):
+    # Exécuté dans un processus enfant (fork): l'allocateur global y repart de zéro
+    return [allocateur.suivant('test:multi') for _ in range(nombre)]
+
+
+def _numeros_facture(nombre):
+    return [FactureModel().generer_numero_facture() for _ in range(nombre)]
+
+
+def creer_colis(ville='Abidjan', **champs):
+    expediteur = ExpediteurModel.objects.create(nom_complet='Expéditeur', telephone='0102030405', ville=ville)
+    destinataire = DestinataireModel.objects.create(nom_complet='Destinataire', telephone='0708091011',
+                                                    ville=ville, quartier='Cocody')
+    return ColisModel.objects.create(expediteur=expediteur, destinataire=destinataire,
+                                     description='Colis de test', poids=1, **champs)
+
+
+def vider_outbox():
+    """Traite les événements en attente, comme les deux relais en production"""
+    while RelaisOutbox().traiter_lot() + RelaisOutbox(lents=True).traiter_lot():
+        pass
+
+
+def enregistrer(colis_list):
+    """Publie l'enregistrement des colis puis vide l'outbox"""
+    with transaction.atomic():
+        enregistrer_colis(colis_list)
+    vider_outbox()
+
+
+def creer_livreur(utilisateur=None):
+    n = next(_compteur)
+    utilisateur = utilisateur or UserModel.objects.create(username=f'livreur{n}', role='LIVREUR')
+    return LivreurModel.objects.create(
+        utilisateur=utilisateur, matricule=f'M{n}', permis_conduire='P', telephone_pro='0101010101',
+        date_validite_permis=datetime.date(2030, 1, 1), zone_intervention='Cocody',
+        date_embauche=datetime.date(2020, 1, 1),
+    )
+
+
+def creer_vehicule(livreur=None):
+    return VehiculeModel.objects.create(
+        immatriculation=f'V{next(_compteur)}', type_vehicule='MOTO', marque='Yamaha', modele='X', annee=2020,
+        capacite_charge=100, volume_utile=1, date_visite_technique=datetime.date(2030, 1, 1),
+        date_assurance=datetime.date(2030, 1, 1), livreur_attribue=livreur,
+    )
+
+
+def creer_livraison(livreur=None, **champs):
+    livreur = livreur or creer_livreur()
+    return LivraisonModel.objects.create(colis=creer_colis(), livreur=livreur, vehicule=creer_vehicule(livreur),
+                                         **champs)
+
+
+@override_settings(SEQUENCE_TAILLE_BLOC=5)
+class AllocateurSequenceTests(TransactionTestCase):
+
+    def test_allocateurs_distincts_sans_doublon(self):
+        # Deux allocateurs simulent deux processus qui se partagent la même séquence
+        premier, second = AllocateurSequence(), AllocateurSequence()
+        numeros = [allocateur_courant.suivant('test:blocs') for _ in range(12)
+                   for allocateur_courant in (premier, second)]
+        self.assertEqual(len(numeros), len(set(numeros)))
+
+    def test_reconnexion_apres_coupure(self):
+        allocateur_test = AllocateurSequence()
+        premiers = [allocateur_test.suivant('test:coupure') for _ in range(5)]
+        # Connexion coupée sous l'allocateur: la réservation suivante doit en rouvrir une
+        allocateur_test._local.connexion.connection.close()
+        suivants = [allocateur_test.suivant('test:coupure') for _ in range(5)]
+        self.assertFalse(set(premiers) & set(suivants))
+
+    def test_sequence_epuisee_au_maximum(self):
+        SequenceModel.objects.create(nom='test:maximum', valeur=9_999_997)
+        allocateur_test = AllocateurSequence()
+        self.assertEqual([allocateur_test.suivant('test:maximum', 9_999_999) for _ in range(2)],
+                         [9_999_998, 9_999_999])
+        for _ in range(2):
+            with self.assertRaises(SequenceEpuisee):
+                allocateur_test.suivant('test:maximum', 9_999_999)
+
+    def test_numero_suivi_epuise_pour_un_prefixe(self):
+        SequenceModel.objects.create(nom='numero_suivi:ABI', valeur=9_999_999)
+        with mock.patch('api.models.ColisModel.allocateur', AllocateurSequence()):
+            with self.assertRaises(SequenceEpuisee):
+                creer_colis('Abidjan')
+            # Les autres préfixes ne sont pas touchés
+            self.assertRegex(creer_colis('Bouaké').numero_suivi, r'^BOU\d{8}$')
+        self.assertEqual(ColisModel.objects.count(), 1)
+
+    @skipUnless(connection.vendor == 'postgresql', 'les processus enfants doivent partager la base de test')
+    def test_processus_multiples_sans_doublon(self):
+        with multiprocessing.get_context('fork').Pool(4) as pool:
+            lots = pool.map(_tirer_numeros, [50] * 4)
+        numeros = [numero for lot in lots for numero in lot]
+        self.assertEqual(len(numeros), 200)
+        self.assertEqual(len(numeros), len(set(numeros)))
+
+
+@override_settings(SEQUENCE_TAILLE_BLOC=50)
+class NumerotationFactureTests(TransactionTestCase):
+
+    def test_format_et_ordre(self):
+        premiere = FactureModel.objects.create(colis=creer_colis(), montant_total=1000)
+        seconde = FactureModel.objects.create(colis=creer_colis(), montant_total=1000)
+        self.assertRegex(premiere.numero_facture, r'^FACT\d{4}\d{7}$')
+        self.assertEqual(int(seconde.numero_facture[-7:]), int(premiere.numero_facture[-7:]) + 1)
+
+    def test_dizaines_de_milliers_sans_doublon(self):
+        # Quatre allocateurs (quatre workers) qui se disputent les blocs d'une même séquence
+        allocateurs = [AllocateurSequence() for _ in range(4)]
+        numeros = [allocateur_courant.suivant('numero_facture:test') for _ in range(5000)
+                   for allocateur_courant in allocateurs]
+        self.assertEqual(len(set(numeros)), 20000)
+
+    @skipUnless(connection.vendor == 'postgresql', 'les processus enfants doivent partager la base de test')
+    def test_processus_multiples_sans_doublon(self):
+        with multiprocessing.get_context('fork').Pool(4) as pool:
+            lots = pool.map(_numeros_facture, [5000] * 4)
+        numeros = [numero for lot in lots for numero in lot]
+        self.assertTrue(all(re.fullmatch(r'FACT\d{11}', numero) for numero in numeros))
+        self.assertEqual(len(set(numeros)), 20000)
+
+
+class NombreRequetesListesTests(TransactionTestCase):
+    """Le nombre de requêtes d'une liste ne doit pas dépendre du nombre de lignes de la page"""
+
+    def creer_ligne(self, url):
+        n = next(_compteur)
+        if url == '/api/users/':
+            return UserModel.objects.create(username=f'utilisateur{n}', role='OPERATEUR')
+        if url == '/api/expediteurs/':
+            return ExpediteurModel.objects.create(nom_complet=f'Expéditeur {n}', telephone=f'01{n:08d}',
+                                                  ville='Abidjan')
+        if url == '/api/destinataires/':
+            return DestinataireModel.objects.create(nom_complet=f'Destinataire {n}', telephone=f'07{n:08d}',
+                                                    ville='Abidjan')
+        if url == '/api/colis/':
+            return creer_colis(utilisateur=self.admin)
+        if url == '/api/suivis/':
+            return SuiviModel.objects.create(colis=creer_colis(), statut='EN_TRANSIT', description='Départ',
+                                             utilisateur=self.admin)
+        if url == '/api/livreurs/':
+            return creer_livreur()
+        if url == '/api/vehicules/':
+            return creer_vehicule(creer_livreur())
+        if url == '/api/livraisons/':
+            return creer_livraison()
+        if url == '/api/factures/':
+            return FactureModel.objects.create(colis=creer_colis(), montant_total=1000)
+        if url == '/api/zones-livraison/':
+            return ZoneLivraisonModel.objects.create(nom=f'Zone {n}', ville='Abidjan', quartiers='Cocody',
+                                                     tarif_base=1000, tarif_km_supplementaire=100)
+        if url == '/api/notifications/':
+            return NotificationModel.objects.create(colis=creer_colis(), type_notification='SMS',
+                                                    destinataire='0708091011', sujet='Suivi', message='Message',
+                                                    utilisateur=self.admin)
+        if url == '/api/tarifs/':
+            return TarifModel.objects.create(poids_min=n, poids_max=n + Decimal('0.99'), distance_min=0,
+                                             distance_max=10, prix=1000, type_service='STANDARD',
+                                             date_debut=datetime.date(2024, 1, 1))
+        raise ValueError(url)
+
+    def setUp(self):
+        self.admin = UserModel.objects.create(username='admin', role='ADMIN')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def compter(self, url):
+        with CaptureQueriesContext(connection) as requetes:
+            reponse = self.client.get(url)
+        self.assertEqual(reponse.status_code, 200, reponse.content)
+        return len(requetes)
+
+    def test_listes_a_nombre_de_requetes_constant(self):
+        for url in ('/api/users/', '/api/expediteurs/', '/api/destinataires/', '/api/colis/', '/api/suivis/',
+                    '/api/livreurs/', '/api/vehicules/', '/api/livraisons/', '/api/factures/',
+                    '/api/zones-livraison/', '/api/notifications/', '/api/tarifs/'):
+            with self.subTest(url=url):
+                self.creer_ligne(url)
+                self.compter(url)  # caches et index chargés au premier appel
+                avant = self.compter(url)
+                for _ in range(5):
+                    self.creer_ligne(url)
+                self.assertEqual(self.compter(url), avant)
+
+
+class PaginationTests(TransactionTestCase):
+
+    def setUp(self):
+        self.admin = UserModel.objects.create(username='admin', role='ADMIN')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    @override_settings(ALLOWED_HOSTS=['kid.example.com'])
+    def test_lien_suivant_garde_le_schema_et_l_hote_du_proxy(self):
+        creer_colis()
+        creer_colis()
+        reponse = self.client.get('/api/colis/?page_size=1', HTTP_X_FORWARDED_PROTO='https',
+                                  HTTP_X_FORWARDED_HOST='kid.example.com')
+        self.assertTrue(reponse.data['next'].startswith('https://kid.example.com/api/colis/?'), reponse.data['next'])
+        suivante = self.client.get(reponse.data['next'], HTTP_X_FORWARDED_PROTO='https',
+                                   HTTP_X_FORWARDED_HOST='kid.example.com')
+        self.assertEqual(len(suivante.data['results']), 1)
+        self.assertNotEqual(suivante.data['results'][0]['id'], reponse.data['results'][0]['id'])
+
+    def test_suivis_filtres_par_colis(self):
+        colis, autre = creer_colis(), creer_colis()
+        SuiviModel.objects.create(colis=colis, statut='EN_TRANSIT', description='Départ')
+        SuiviModel.objects.create(colis=autre, statut='EN_TRANSIT', description='Départ')
+        reponse = self.client.get(f'/api/suivis/?colis={colis.pk}')
+        self.assertEqual({suivi['colis'] for suivi in reponse.data['results']}, {colis.pk})
+
+    @skipUnless(os.getenv('BENCHMARK'), 'mesure de performance: BENCHMARK=1')
+    def test_page_1_et_page_1000(self):
+        expediteur = ExpediteurModel.objects.create(nom_complet='Expéditeur', telephone='0102030405', ville='Abidjan')
+        destinataire = DestinataireModel.objects.create(nom_complet='Destinataire', telephone='0708091011',
+                                                        ville='Abidjan', quartier='Cocody')
+        ColisModel.objects.bulk_create(
+            [ColisModel(numero_suivi=f'BENCH{n:08d}', expediteur=expediteur, destinataire=destinataire,
+                        description='Colis', poids=1) for n in range(50000)], batch_size=5000,
+        )
+        # Curseur de la page 1000 (50 lignes par page): position de la dernière ligne de la page 999
+        ordre = ColisModel.objects.order_by(*PaginationCurseur.ordering)
+        position = ordre.values_list('date_creation', flat=True)[49949]
+        pagination = PaginationCurseur()
+        pagination.base_url = 'http://testserver/api/colis/'
+        page_1000 = pagination.encode_cursor(Cursor(offset=0, reverse=False, position=str(position)))
+
+        def chronometrer(url):
+            self.client.get(url)
+            debut = time.perf_counter()
+            for _ in range(20):
+                reponse = self.client.get(url)
+            self.assertEqual(len(reponse.data['results']), 50)
+            return (time.perf_counter() - debut) / 20
+
+        def requete(lignes):
+            debut = time.perf_counter()
+            for _ in range(20):
+                list(lignes)
+            return (time.perf_counter() - debut) / 20
+
+        premiere, profonde = chronometrer('/api/colis/'), chronometrer(page_1000)
+        keyset = requete(ordre.filter(date_creation__lt=position)[:50])
+        decalage = requete(ordre[49950:50000])
+        print(f'\nColis, 50 000 lignes, API: page 1 {premiere * 1000:.1f} ms, page 1000 {profonde * 1000:.1f} ms; '
+              f'requête de la page 1000: curseur {keyset * 1000:.2f} ms, OFFSET {decalage * 1000:.2f} ms')
+
+
+class FiltresColisTests(TransactionTestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(UserModel.objects.create(username='admin', role='ADMIN'))
+
+    def numeros(self, requete):
+        reponse = self.client.get(f'/api/colis/?{requete}')
+        self.assertEqual(reponse.status_code, 200, reponse.content)
+        return sorted(colis['numero_suivi'] for colis in reponse.data['results'])
+
+    def test_numero_suivi_exact_et_prefixe(self):
+        for numero in ('KIDX0001', 'KIDX00010', 'KIDY0001'):
+            ColisModel.objects.filter(pk=creer_colis().pk).update(numero_suivi=numero)
+        # VerifierColis attend le colis exact, pas ceux dont le numéro le prolonge
+        self.assertEqual(self.numeros('numero_suivi=kidx0001'), ['KIDX0001'])
+        self.assertEqual(self.numeros('numero_suivi_prefixe=KIDX0001'), ['KIDX0001', 'KIDX00010'])
+
+    def test_filtres_combines(self):
+        cible = creer_colis(ville='Bouaké', statut='EN_TRANSIT')
+        creer_colis(ville='Bouaké', statut='LIVRE')
+        creer_colis(statut='EN_TRANSIT')
+        self.assertEqual(self.numeros('statut=EN_TRANSIT&destinataire_ville=bouaké&telephone=0708'),
+                         [cible.numero_suivi])
+        self.assertEqual(self.numeros('statut=EN_TRANSIT&statut=LIVRE&destinataire_ville=Bouaké'),
+                         sorted(ColisModel.objects.filter(destinataire__ville='Bouaké')
+                                .values_list('numero_suivi', flat=True)))
+
+    @skipUnless(os.getenv('BENCHMARK'), 'mesure de performance: BENCHMARK=1')
+    def test_filtre_serveur_contre_chargement_complet(self):
+        expediteur = ExpediteurModel.objects.create(nom_complet='Expéditeur', telephone='0102030405', ville='Abidjan')
+        villes = [DestinataireModel.objects.create(nom_complet='Destinataire', telephone='0708091011', ville=ville,
+                                                   quartier='Centre') for ville in ('Abidjan', 'Bouaké')]
+        ColisModel.objects.bulk_create(
+            [ColisModel(numero_suivi=f'FIL{n:08d}', expediteur=expediteur, destinataire=villes[n % 100 == 0],
+                        description='Colis', poids=1, statut='EN_TRANSIT' if n % 100 == 0 else 'LIVRE')
+             for n in range(5000)], batch_size=5000,
+        )
+
+        def mesurer(url, garder):
+            debut, octets, lignes = time.perf_counter(), 0, 0
+            while url:
+                reponse = self.client.get(url)
+                octets += len(reponse.content)
+                lignes += sum(1 for colis in reponse.data['results'] if garder(colis))
+                url = reponse.data['next']
+            return time.perf_counter() - debut, octets, lignes
+
+        # Toutes les pages filtrées dans le navigateur, comme avant le filtrage côté serveur
+        complet = mesurer('/api/colis/?page_size=500',
+                          lambda colis: colis['statut'] == 'EN_TRANSIT' and colis['destinataire_ville'] == 'Bouaké')
+        filtre = mesurer('/api/colis/?statut=EN_TRANSIT&destinataire_ville=Bouaké', lambda colis: True)
+        self.assertEqual(complet[2], filtre[2])
+        print(f'\nColis EN_TRANSIT à Bouaké parmi 5000: tout charger {complet[0] * 1000:.0f} ms, '
+              f'{complet[1] / 1000:.0f} ko; filtre serveur {filtre[0] * 1000:.0f} ms, {filtre[1] / 1000:.1f} ko')
+
+
+class ExportCSVTests(TransactionTestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(UserModel.objects.create(username='admin', role='ADMIN'))
+
+    def lire(self, reponse):
+        contenu = b''.join(reponse.streaming_content)
+        if reponse['Content-Type'] == 'application/gzip':
+            contenu = gzip.decompress(contenu)
+        return list(csv.reader(io.StringIO(contenu.decode('utf-8-sig'))))
+
+    def test_formules_neutralisees(self):
+        colis = creer_colis(statut='EN_TRANSIT')
+        ExpediteurModel.objects.filter(pk=colis.expediteur_id).update(
+            nom_complet='=HYPERLINK("http://exemple.test","x")', telephone='+2250102030405')
+        DestinataireModel.objects.filter(pk=colis.destinataire_id).update(nom_complet='@SUM(A1)', ville='-Abidjan')
+        entetes, ligne = self.lire(self.client.get('/api/exports/colis.csv?gzip=1'))
+        valeurs = dict(zip(entetes, ligne))
+        self.assertEqual(valeurs['expediteur'], '\'=HYPERLINK("http://exemple.test","x")')
+        self.assertEqual(valeurs['expediteur_telephone'], "'+2250102030405")
+        self.assertEqual(valeurs['destinataire'], "'@SUM(A1)")
+        self.assertEqual(valeurs['destinataire_ville'], "'-Abidjan")
+        self.assertEqual(valeurs['statut'], 'EN_TRANSIT')
+
+    def test_filtres(self):
+        creer_colis(statut='EN_TRANSIT')
+        creer_colis(statut='LIVRE')
+        lignes = self.lire(self.client.get('/api/exports/colis.csv?statut=LIVRE'))
+        self.assertEqual([ligne[1] for ligne in lignes[1:]], ['LIVRE'])
+        self.assertEqual(self.client.get('/api/exports/colis.csv?statut=INCONNU').status_code, 400)
+
+    @skipUnless(os.getenv('BENCHMARK'), 'mesure de performance: BENCHMARK=1')
+    def test_export_1_million_de_lignes(self):
+        expediteur = ExpediteurModel.objects.create(nom_complet='Expéditeur', telephone='0102030405', ville='Abidjan')
+        destinataire = DestinataireModel.objects.create(nom_complet='Destinataire', telephone='0708091011',
+                                                        ville='Abidjan', quartier='Cocody')
+        for debut in range(0, 1_000_000, 50000):
+            ColisModel.objects.bulk_create(
+                [ColisModel(numero_suivi=f'EXP{n:08d}', expediteur=expediteur, destinataire=destinataire,
+                            description='Colis', poids=1) for n in range(debut, debut + 50000)], batch_size=10000,
+            )
+        for parametres in ('', '?gzip=1'):
+            tracemalloc.start()
+            debut = time.perf_counter()
+            reponse = self.client.get(f'/api/exports/colis.csv{parametres}')
+            taille = lignes = 0
+            for morceau in reponse.streaming_content:
+                taille += len(morceau)
+                lignes += morceau.count(b'\n') if not parametres else 0
+            duree = time.perf_counter() - debut
+            pic = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            if not parametres:
+                self.assertEqual(lignes, 1_000_001)
+            print(f'\nExport colis{parametres or " (csv)"}, 1 000 000 lignes: {duree:.1f} s, '
+                  f'{taille / 1e6:.0f} Mo, pic mémoire Python {pic / 1e6:.1f} Mo')
+
+
+@skipUnless(connection.vendor == 'postgresql', 'plans EXPLAIN propres à PostgreSQL')
+class PlansIndexTests(TransactionTestCase):
+    """Les requêtes fréquentes passent par les index composites et partiels prévus pour elles.
+
+    Les tables sont remplies dans des proportions proches de la production
+    (colis surtout livrés, notifications surtout envoyées, historique de
+    tarifs inactifs) puis analysées: le planificateur choisit sur ses
+    statistiques, sans parcours séquentiel interdit.
+    """
+
+    def setUp(self):
+        expediteur = ExpediteurModel.objects.create(nom_complet='Expéditeur', telephone='0102030405', ville='Abidjan')
+        destinataire = DestinataireModel.objects.create(nom_complet='Destinataire', telephone='0708091011',
+                                                        ville='Abidjan', quartier='Cocody')
+        statuts = (['LIVRE'] * 85 + ['ANNULE'] * 5 + ['EN_TRANSIT'] * 3 + ['EN_ATTENTE'] * 4 + ['EN_LIVRAISON'] * 2
+                   + ['RETOUR'])
+        colis = ColisModel.objects.bulk_create(
+            [ColisModel(numero_suivi=f'PLAN{n:08d}', expediteur=expediteur, destinataire=destinataire,
+                        description='Colis', poids=1, statut=statuts[n % 100]) for n in range(20000)],
+            batch_size=5000,
+        )
+        self.colis = colis[0]
+        SuiviModel.objects.bulk_create(
+            [SuiviModel(colis=c, statut='EN_TRANSIT', description='Départ') for c in colis for _ in range(2)],
+            batch_size=5000,
+        )
+        NotificationModel.objects.bulk_create(
+            [NotificationModel(colis=colis[n], type_notification='SMS', destinataire='0708091011', sujet='Suivi',
+                               message='Message', statut='EN_ATTENTE' if n % 200 == 0 else 'ENVOYEE')
+             for n in range(20000)],
+            batch_size=5000,
+        )
+        livreurs = [creer_livreur() for _ in range(50)]
+        vehicules = [creer_vehicule(livreur) for livreur in livreurs]
+        # Une livraison en cours sur cent, les autres terminées
+        LivraisonModel.objects.bulk_create(
+            [LivraisonModel(colis=colis[n], livreur=livreurs[n % 50], vehicule=vehicules[n % 50],
+                            statut='EN_COURS' if n % 100 < 2 else 'TERMINEE') for n in range(5000)],
+            batch_size=5000,
+        )
+        self.livreur = livreurs[0]
+        # Historique des grilles: seule la dernière est active
+        TarifModel.objects.bulk_create(
+            [TarifModel(poids_min=n % 100, poids_max=n % 100 + Decimal('0.99'), distance_min=0, distance_max=10,
+                        prix=1000, type_service=('STANDARD', 'EXPRESS', 'URGENTE')[n % 3], actif=n >= 1900,
+                        date_debut=datetime.date(2020, 1, 1) + timedelta(days=n // 100)) for n in range(2000)],
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def test_requetes_frequentes(self):
+        cas = (
+            (ColisModel.objects.filter(statut='EN_TRANSIT').order_by('-date_creation')[:50],
+             'colis_statut_date_idx'),
+            (ColisModel.objects.exclude(statut__in=['LIVRE', 'ANNULE']).order_by('-date_creation')[:50],
+             'colis_non_livres_idx'),
+            (SuiviModel.objects.filter(colis=self.colis).order_by('-date_creation'), 'suivi_colis_date_idx'),
+            (NotificationModel.objects.filter(statut__in=['EN_ATTENTE', 'EN_COURS']).order_by('id')[:100],
+             'notif_a_envoyer_idx'),
+            (LivraisonModel.objects.filter(livreur=self.livreur, statut='EN_COURS'), 'livraison_livreur_statut_idx'),
+            (TarifModel.objects.filter(actif=True, type_service='STANDARD', poids_min__lte=2, poids_max__gte=2),
+             'tarif_service_poids_idx'),
+        )
+        for queryset, index in cas:
+            with self.subTest(index=index):
+                self.assertIn(index, queryset.explain())
+
+
+@override_settings(LIVREUR_SYNC_MARGE_SECONDES=0)
+class SynchroLivreurTests(TransactionTestCase):
+
+    def setUp(self):
+        self.utilisateur = UserModel.objects.create(username='livreur', role='LIVREUR')
+        self.livreur = creer_livreur(self.utilisateur)
+        self.livraisons = [creer_livraison(self.livreur) for _ in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.utilisateur)
+
+    def synchroniser(self, operations):
+        reponse = self.client.post('/api/livreur/livraisons/sync/', {'operations': operations}, format='json')
+        self.assertEqual(reponse.status_code, 200, reponse.content)
+        return reponse.json()['resultats']
+
+    def test_lot_rejoue_applique_une_seule_fois(self):
+        livraison = self.livraisons[0]
+        operations = [
+            {'cle': 'op-1', 'livraison': livraison.pk, 'statut': 'EN_COURS'},
+            {'cle': 'op-2', 'livraison': livraison.pk, 'statut': 'TERMINEE'},
+            {'cle': 'op-3', 'livraison': 999999, 'statut': 'EN_COURS'},
+        ]
+        premiers = self.synchroniser(operations)
+        self.assertEqual([resultat['resultat'] for resultat in premiers], ['applique', 'applique', 'rejete'])
+        suivis = SuiviModel.objects.filter(colis=livraison.colis).count()
+
+        # Réseau coupé avant la réponse: le téléphone renvoie le même lot
+        rejoues = self.synchroniser(operations)
+        self.assertTrue(all(resultat['deja_traite'] for resultat in rejoues))
+        self.assertEqual([resultat['resultat'] for resultat in rejoues], ['applique', 'applique', 'rejete'])
+        self.assertEqual(rejoues[2]['erreur'], premiers[2]['erreur'])
+        self.assertEqual(SuiviModel.objects.filter(colis=livraison.colis).count(), suivis)
+        self.assertEqual(IdempotenceModel.objects.filter(utilisateur=self.utilisateur).count(), 3)
+        livraison.refresh_from_db()
+        self.assertEqual(livraison.statut, 'TERMINEE')
+
+    def test_cle_en_double_dans_un_lot(self):
+        livraison = self.livraisons[0]
+        operation = {'cle': 'op-double', 'livraison': livraison.pk, 'statut': 'EN_COURS'}
+        resultats = self.synchroniser([operation, operation])
+        self.assertEqual([resultat['resultat'] for resultat in resultats], ['applique', 'applique'])
+        self.assertEqual(IdempotenceModel.objects.filter(cle='op-double').count(), 1)
+
+    def test_cle_enregistree_par_un_envoi_concurrent(self):
+        appliquer = synchro_livreur.appliquer_changements
+
+        def envoi_concurrent(*args, **kwargs):
+            # Le même lot, renvoyé sur une autre connexion, enregistre sa clé pendant le traitement de celui-ci
+            erreurs = appliquer(*args, **kwargs)
+            IdempotenceModel.objects.create(utilisateur=self.utilisateur, cle='op-course',
+                                            resultat={'cle': 'op-course', 'resultat': 'rejete', 'erreur': 'Concurrent'})
+            return erreurs
+
+        operations = [{'cle': 'op-course', 'livraison': self.livraisons[0].pk, 'statut': 'EN_COURS'},
+                      {'cle': 'op-seule', 'livraison': self.livraisons[1].pk, 'statut': 'EN_COURS'}]
+        with mock.patch.object(synchro_livreur, 'appliquer_changements', side_effect=envoi_concurrent):
+            resultats = self.synchroniser(operations)
+        self.assertEqual(resultats[0], {'cle': 'op-course', 'resultat': 'rejete', 'erreur': 'Concurrent',
+                                        'deja_traite': True})
+        self.assertEqual(resultats[1], {'cle': 'op-seule', 'resultat': 'applique'})
+        self.assertEqual(IdempotenceModel.objects.filter(utilisateur=self.utilisateur).count(), 2)
+
+    def test_curseur_ne_renvoie_que_les_changements(self):
+        reponse = self.client.get('/api/livreur/livraisons/').json()
+        self.assertEqual({ligne['id'] for ligne in reponse['livraisons']},
+                         {livraison.pk for livraison in self.livraisons})
+        curseur = reponse['curseur']
+        self.assertEqual(self.client.get(f'/api/livreur/livraisons/?since={curseur}').json()['livraisons'], [])
+
+        self.synchroniser([{'cle': 'op-delta', 'livraison': self.livraisons[0].pk, 'statut': 'EN_COURS'}])
+        # Changement d'adresse du destinataire: la livraison doit repartir vers le téléphone
+        destinataire = self.livraisons[1].colis.destinataire
+        destinataire.adresse_complete = 'Rue des Jardins'
+        destinataire.save()
+
+        delta = self.client.get(f'/api/livreur/livraisons/?since={curseur}').json()
+        lignes = {ligne['id']: ligne for ligne in delta['livraisons']}
+        self.assertEqual(set(lignes), {self.livraisons[0].pk, self.livraisons[1].pk})
+        self.assertEqual(lignes[self.livraisons[0].pk]['statut'], 'EN_COURS')
+        self.assertEqual(lignes[self.livraisons[1].pk]['adresse'], 'Rue des Jardins')
+        self.assertEqual(self.client.get(f"/api/livreur/livraisons/?since={delta['curseur']}").json()['livraisons'],
+                         [])
+
+    def test_curseur_invalide(self):
+        self.assertEqual(self.client.get('/api/livreur/livraisons/?since=xx').status_code, 400)
+
+
+class FluxCoupe(io.BytesIO):
+    """Corps de requête dont la connexion tombe après `limite` octets"""
+
+    def __init__(self, donnees, limite):
+        super().__init__(donnees)
+        self.limite = limite
+
+    def read(self, taille=-1):
+        if self.tell() >= self.limite:
+            raise OSError('Connexion réinitialisée')
+        return super().read(min(taille, self.limite - self.tell()))
+
+
+class TeleversementTests(TransactionTestCase):
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        reglages = override_settings(MEDIA_ROOT=media)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+        self.utilisateur = UserModel.objects.create(username='livreur', role='LIVREUR')
+        self.client = APIClient()
+        self.client.force_authenticate(self.utilisateur)
+        tampon = io.BytesIO()
+        Image.new('RGB', (400, 300), 'red').save(tampon, 'JPEG')
+        self.image = tampon.getvalue()
+
+    def ouvrir(self, **champs):
+        donnees = {'taille': len(self.image), 'type_contenu': 'image/jpeg',
+                   'empreinte': hashlib.sha256(self.image).hexdigest(), **champs}
+        reponse = self.client.post('/api/livreur/televersements/', donnees, format='json')
+        self.assertEqual(reponse.status_code, 201, reponse.content)
+        return reponse.json()['id']
+
+    def envoyer(self, identifiant, debut, morceau):
+        return self.client.patch(f'/api/livreur/televersements/{identifiant}/', morceau,
+                                 content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET=str(debut))
+
+    def test_reprise_au_decalage_recu(self):
+        identifiant = self.ouvrir()
+        moitie = len(self.image) // 2
+        self.assertEqual(self.envoyer(identifiant, 0, self.image[:moitie]).json()['recu'], moitie)
+
+        # Le téléphone a perdu le fil: mauvais décalage, le serveur indique où reprendre
+        reponse = self.envoyer(identifiant, 0, self.image[moitie:])
+        self.assertEqual(reponse.status_code, 409)
+        self.assertEqual(reponse.json()['recu'], moitie)
+        self.assertEqual(self.client.get(f'/api/livreur/televersements/{identifiant}/').json()['recu'], moitie)
+
+        reponse = self.envoyer(identifiant, moitie, self.image[moitie:])
+        self.assertEqual(reponse.json()['statut'], 'TERMINE')
+        televersement = TeleversementModel.objects.get(pk=identifiant)
+        with default_storage.open(televersement.fichier, 'rb') as fichier:
+            self.assertEqual(fichier.read(), self.image)
+        # Morceau renvoyé après la fin (réponse perdue): rien à refaire
+        self.assertEqual(self.envoyer(identifiant, moitie, self.image[moitie:]).json()['statut'], 'TERMINE')
+
+    def test_connexion_coupee_conserve_les_octets_recus(self):
+        identifiant = self.ouvrir()
+        televersement = ecrire_morceau(self.utilisateur, identifiant, 0, FluxCoupe(self.image, 1000),
+                                       len(self.image))
+        self.assertEqual(televersement.recu, 1000)
+        televersement.refresh_from_db()
+        self.assertEqual((televersement.recu, televersement.statut, televersement.en_ecriture),
+                         (1000, 'EN_COURS', None))
+        self.assertEqual(self.envoyer(identifiant, 1000, self.image[1000:]).json()['statut'], 'TERMINE')
+
+    def test_morceau_concurrent_refuse_puis_reservation_expiree_reprise(self):
+        identifiant = self.ouvrir()
+        TeleversementModel.objects.filter(pk=identifiant).update(en_ecriture=timezone.now())
+        self.assertEqual(self.envoyer(identifiant, 0, self.image[:100]).status_code, 409)
+
+        with override_settings(TELEVERSEMENT_RESERVATION_SECONDES=60):
+            TeleversementModel.objects.filter(pk=identifiant).update(
+                en_ecriture=timezone.now() - timedelta(seconds=120)
+            )
+            reponse = self.envoyer(identifiant, 0, self.image[:100])
+        self.assertEqual(reponse.status_code, 200, reponse.content)
+        self.assertEqual(reponse.json()['recu'], 100)
+        self.assertIsNone(TeleversementModel.objects.get(pk=identifiant).en_ecriture)
+
+    @override_settings(TELEVERSEMENT_RESERVATION_SECONDES=0)
+    def test_reservation_reprise_arrete_l_ecriture(self):
+        identifiant = self.ouvrir()
+        reprise = timezone.now() + timedelta(seconds=5)
+
+        class FluxBloque(io.BytesIO):
+            # Le client se bloque après le premier bloc; un autre envoi reprend la réservation expirée
+            def read(self, taille=-1):
+                if self.tell() > 0:
+                    TeleversementModel.objects.filter(pk=identifiant).update(en_ecriture=reprise)
+                return super().read(taille)
+
+        with mock.patch.object(televersements, 'TAMPON', 256), self.assertRaises(TeleversementOccupe):
+            ecrire_morceau(self.utilisateur, identifiant, 0, FluxBloque(self.image), len(self.image))
+        televersement = TeleversementModel.objects.get(pk=identifiant)
+        # Rien écrit après la perte de la réservation, qui reste au nouvel envoi
+        self.assertEqual(os.path.getsize(default_storage.path(f'{televersement.fichier}.part')), 256)
+        self.assertEqual((televersement.recu, televersement.en_ecriture), (0, reprise))
+
+    def test_empreinte_differente_repart_de_zero(self):
+        identifiant = self.ouvrir(empreinte=hashlib.sha256(b'autre fichier').hexdigest())
+        reponse = self.envoyer(identifiant, 0, self.image)
+        self.assertEqual(reponse.status_code, 400)
+        televersement = TeleversementModel.objects.get(pk=identifiant)
+        self.assertEqual((televersement.recu, televersement.statut), (0, 'EN_COURS'))
+        self.assertFalse(os.path.exists(default_storage.path(f'{televersement.fichier}.part')))
+
+
+@override_settings(ZONE_KM_INCLUS=0)
+class TarificationDistanceTests(TransactionTestCase):
+
+    def setUp(self):
+        ZoneLivraisonModel.objects.create(nom='Riviera', ville='Abidjan', quartiers='Riviera', tarif_base=1000,
+                                          tarif_km_supplementaire=100)
+        self.expediteur = ExpediteurModel.objects.create(nom_complet='Expéditeur', telephone='0102030405',
+                                                         ville='Abidjan')
+
+    def creer_colis(self, destinataire):
+        return ColisModel.objects.create(expediteur=self.expediteur, destinataire=destinataire,
+                                         description='Colis de test', poids=1)
+
+    def test_colis_identiques_meme_frais_distance(self):
+        destinataire = DestinataireModel.objects.create(nom_complet='Awa Koné', telephone='0708091011',
+                                                        ville='Abidjan', quartier='Riviera')
+        # Premier colis: destinataire encore sans coordonnées au moment de la facturation
+        premier = self.creer_colis(destinataire)
+        enregistrer([premier])
+        # Second colis: destinataire géocodé entre-temps
+        second = self.creer_colis(destinataire)
+        enregistrer([second])
+
+        destinataire.refresh_from_db()
+        self.assertIsNotNone(destinataire.latitude)
+        premiere, seconde = FactureModel.objects.get(colis=premier), FactureModel.objects.get(colis=second)
+        self.assertGreater(premiere.frais_distance, 1000)
+        self.assertEqual(premiere.frais_distance, seconde.frais_distance)
+        self.assertEqual(premiere.montant_total, seconde.montant_total)
+
+    def test_facture_reglee_non_recalculee(self):
+        destinataire = DestinataireModel.objects.create(nom_complet='Awa Koné', telephone='0708091011',
+                                                        ville='Abidjan', quartier='Riviera')
+        colis = self.creer_colis(destinataire)
+        with transaction.atomic():
+            enregistrer_colis([colis])
+        # Facture créée par le relais principal, puis réglée avant le passage du relais des événements lents
+        RelaisOutbox().traiter_lot()
+        facture = FactureModel.objects.get(colis=colis)
+        FactureModel.objects.filter(pk=facture.pk).update(montant_paye=facture.montant_total, statut='PAYEE')
+        vider_outbox()
+        facture.refresh_from_db()
+        self.assertEqual(facture.frais_distance, 1000)
+
+
+class PasserelleReprise(MemoireBackend):
+    """Passerelle lente: pendant l'envoi, un autre dispatcheur reprend les notifications (réservation expirée)"""
+
+    def envoyer(self, notification):
+        NotificationModel.objects.filter(pk=notification.pk).update(
+            jeton_reservation=uuid.uuid4(), statut='ENVOYEE', tentatives=7,
+        )
+        super().envoyer(notification)
+
+
+class DispatcheurNotificationsTests(TransactionTestCase):
+
+    def setUp(self):
+        self.colis = creer_colis()
+
+    def creer_notification(self, destinataire='0708091011', type_notification='SMS'):
+        return NotificationModel.objects.create(colis=self.colis, type_notification=type_notification,
+                                                destinataire=destinataire, sujet='Suivi', message='Votre colis')
+
+    def test_envoi_et_echec_reessaye_plus_tard(self):
+        envoyee, refusee = self.creer_notification('0101'), self.creer_notification('0202')
+        passerelle = MemoireBackend(ECHECS=['0202'])
+        dispatcheur = DispatcheurNotifications({'SMS': passerelle})
+        self.assertEqual(dispatcheur.traiter_lot(), 2)
+        self.assertEqual(passerelle.boite_envoi, [('SMS', '0101', 'Votre colis')])
+        self.assertEqual(MemoireBackend().boite_envoi, [])
+
+        envoyee.refresh_from_db()
+        refusee.refresh_from_db()
+        self.assertEqual((envoyee.statut, envoyee.tentatives, envoyee.jeton_reservation), ('ENVOYEE', 1, None))
+        self.assertEqual((refusee.statut, refusee.tentatives), ('EN_ATTENTE', 1))
+        self.assertGreater(refusee.prochaine_tentative, timezone.now())
+        self.assertIn('refusé', refusee.derniere_erreur)
+        # Rien n'est dû avant la fin de l'attente
+        self.assertEqual(dispatcheur.traiter_lot(), 0)
+
+    @override_settings(NOTIFICATION_MAX_TENTATIVES=2, NOTIFICATION_BACKOFF_SECONDES=0)
+    def test_abandon_apres_max_tentatives(self):
+        notification = self.creer_notification('0202')
+        dispatcheur = DispatcheurNotifications({'SMS': MemoireBackend(ECHECS=['0202'])})
+        dispatcheur.traiter_lot()
+        dispatcheur.traiter_lot()
+        notification.refresh_from_db()
+        self.assertEqual((notification.statut, notification.tentatives), ('ECHOUEE', 2))
+        self.assertEqual(dispatcheur.traiter_lot(), 0)
+
+    def test_sans_backend(self):
+        notification = self.creer_notification(type_notification='PUSH')
+        DispatcheurNotifications({'SMS': MemoireBackend()}).traiter_lot()
+        notification.refresh_from_db()
+        self.assertEqual(notification.derniere_erreur, 'Aucun backend pour PUSH')
+
+    @override_settings(NOTIFICATION_TIMEOUT=15, NOTIFICATION_RESERVATION_SECONDES=120)
+    def test_reservation_couvre_tout_le_lot(self):
+        dispatcheur = DispatcheurNotifications({'EMAIL': MemoireBackend(concurrence=5),
+                                                'SMS': MemoireBackend(concurrence=20)})
+        lot = [NotificationModel(type_notification='EMAIL') for _ in range(100)]
+        lot += [NotificationModel(type_notification='SMS') for _ in range(100)]
+        # 100 emails à 5 en parallèle: 20 vagues de 15 s au plus
+        self.assertEqual(dispatcheur.duree_reservation(lot), 20 * 15 + 120)
+
+    def test_reservation_perdue_n_ecrase_pas_le_resultat(self):
+        notification = self.creer_notification()
+        DispatcheurNotifications({'SMS': PasserelleReprise()}).traiter_lot()
+        notification.refresh_from_db()
+        self.assertEqual((notification.statut, notification.tentatives), ('ENVOYEE', 7))
+        self.assertIsNotNone(notification.jeton_reservation)
+
+    def test_reservation_expiree_reprise(self):
+        notification = self.creer_notification()
+        NotificationModel.objects.filter(pk=notification.pk).update(
+            statut='EN_COURS', jeton_reservation=uuid.uuid4(),
+            prochaine_tentative=timezone.now() - timedelta(seconds=1),
+        )
+        passerelle = MemoireBackend()
+        self.assertEqual(DispatcheurNotifications({'SMS': passerelle}).traiter_lot(), 1)
+        self.assertEqual(len(passerelle.boite_envoi), 1)
+        notification.refresh_from_db()
+        self.assertEqual(notification.statut, 'ENVOYEE')
+
+        # Une réservation encore valide n'est pas reprise
+        autre = self.creer_notification()
+        NotificationModel.objects.filter(pk=autre.pk).update(
+            statut='EN_COURS', jeton_reservation=uuid.uuid4(),
+            prochaine_tentative=timezone.now() + timedelta(minutes=5),
+        )
+        self.assertEqual(DispatcheurNotifications({'SMS': MemoireBackend()}).traiter_lot(), 0)
+
+
+class InvalidationCachesTests(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_suivi_public_invalide_par_statut_et_historique(self):
+        colis = creer_colis()
+        etag = obtenir_suivi_public(colis.numero_suivi)['etag']
+        self.assertIsNotNone(cache.get(cle_cache(colis.numero_suivi)))
+
+        colis.statut = 'EN_TRANSIT'
+        colis.save()
+        self.assertIsNone(cache.get(cle_cache(colis.numero_suivi)))
+        entree = obtenir_suivi_public(colis.numero_suivi)
+        self.assertEqual(entree['donnees']['statut'], 'EN_TRANSIT')
+        self.assertNotEqual(entree['etag'], etag)
+
+        SuiviModel.objects.create(colis=colis, statut='EN_TRANSIT', description='Départ du dépôt')
+        self.assertEqual(obtenir_suivi_public(colis.numero_suivi)['donnees']['historique'][-1]['description'],
+                         'Départ du dépôt')
+
+    def test_suivi_public_invalide_a_la_validation_seulement(self):
+        colis = creer_colis()
+        obtenir_suivi_public(colis.numero_suivi)
+        with transaction.atomic():
+            colis.statut = 'EN_TRANSIT'
+            colis.save()
+            # Invalidé plus tôt, une lecture concurrente remettrait l'ancien statut en cache
+            self.assertIsNotNone(cache.get(cle_cache(colis.numero_suivi)))
+        self.assertIsNone(cache.get(cle_cache(colis.numero_suivi)))
+
+    def test_index_tarifs_invalide(self):
+        tarif = TarifModel.objects.create(poids_min=0, poids_max=10, distance_min=0, distance_max=100, prix=1500,
+                                          type_service='STANDARD', date_debut=datetime.date(2020, 1, 1))
+        self.assertEqual(tarif_index.trouver_prix('STANDARD', Decimal('2')), 1500)
+        tarif.prix = 2000
+        tarif.save()
+        self.assertEqual(tarif_index.trouver_prix('STANDARD', Decimal('2')), 2000)
+        tarif.delete()
+        self.assertIsNone(tarif_index.trouver_prix('STANDARD', Decimal('2')))
+
+    def test_recherche_clients_videe(self):
+        colis = creer_colis()
+        cache_recherche.set(('awa', 20), [{'type': 'destinataire', 'id': colis.destinataire_id}])
+        colis.destinataire.telephone = '0700000000'
+        colis.destinataire.save()
+        self.assertIsNone(cache_recherche.get(('awa', 20)))
+
+
+@mock.patch.object(ScopedRateThrottle, 'THROTTLE_RATES', {'suivi_public': '3/min'})
+class ThrottleSuiviPublicTests(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.url = '/api/track/%s/' % creer_colis().numero_suivi
+        self.client = APIClient()
+
+    def test_x_forwarded_for_forge_ignore(self):
+        # nginx ajoute l'adresse réelle en dernier; les entrées précédentes viennent du client
+        for n in range(3):
+            reponse = self.client.get(self.url, HTTP_X_FORWARDED_FOR=f'10.0.0.{n}, 198.51.100.7')
+            self.assertEqual(reponse.status_code, 200)
+        reponse = self.client.get(self.url, HTTP_X_FORWARDED_FOR='10.0.0.99, 198.51.100.7')
+        self.assertEqual(reponse.status_code, 429)
+
+    def test_quota_par_client(self):
+        for _ in range(3):
+            self.client.get(self.url, HTTP_X_FORWARDED_FOR='198.51.100.7')
+        self.assertEqual(self.client.get(self.url, HTTP_X_FORWARDED_FOR='198.51.100.7').status_code, 429)
+        self.assertEqual(self.client.get(self.url, HTTP_X_FORWARDED_FOR='198.51.100.8').status_code, 200)
+
+
+# Gestionnaires de test: un expéditeur créé par événement, 'echec' dans le payload fait échouer l'appel
+appels_outbox = []
+
+
+@gestionnaire('TEST_RAPIDE')
+def _gestionnaire_rapide(evenements):
+    appels_outbox.append([evenement.payload['nom'] for evenement in evenements])
+    for evenement in evenements:
+        ExpediteurModel.objects.create(nom_complet=evenement.payload['nom'], telephone='0102030405', ville='Abidjan')
+    if any(evenement.payload.get('echec') for evenement in evenements):
+        raise ValueError('événement refusé')
+
+
+@gestionnaire('TEST_LENT', lent=True)
+def _gestionnaire_lent(evenements):
+    appels_outbox.append(connection.in_atomic_block)
+    for evenement in evenements:
+        if evenement.payload.get('reprise'):
+            # Réservation expirée pendant le traitement: un autre relais a repris et terminé l'événement
+            EvenementOutboxModel.objects.filter(pk=evenement.pk).update(
+                jeton_reservation=uuid.uuid4(), statut='TRAITE', tentatives=5,
+            )
+    # Lot réservé: un second relais n'a rien à reprendre
+    appels_outbox.append(RelaisOutbox(lents=True).traiter_lot())
+
+
+@override_settings(OUTBOX_BACKOFF_SECONDES=0)
+class RelaisOutboxTests(TransactionTestCase):
+
+    def setUp(self):
+        appels_outbox.clear()
+
+    def test_lot_en_echec_rejoue_sans_doubler_les_effets(self):
+        for nom in ('Awa', 'Bakary', 'Coulibaly'):
+            publier('TEST_RAPIDE', {'nom': nom, 'echec': nom == 'Bakary'})
+        self.assertEqual(RelaisOutbox().traiter_lot(), 3)
+        # Lot annulé puis rejoué événement par événement: chaque effet validé une seule fois
+        self.assertEqual(appels_outbox, [['Awa', 'Bakary', 'Coulibaly'], ['Awa'], ['Bakary'], ['Coulibaly']])
+        self.assertEqual(sorted(ExpediteurModel.objects.values_list('nom_complet', flat=True)), ['Awa', 'Coulibaly'])
+        self.assertEqual(dict(EvenementOutboxModel.objects.values_list('payload__nom', 'statut')),
+                         {'Awa': 'TRAITE', 'Bakary': 'EN_ATTENTE', 'Coulibaly': 'TRAITE'})
+
+        # Seul l'événement en échec est repris
+        appels_outbox.clear()
+        self.assertEqual(RelaisOutbox().traiter_lot(), 1)
+        self.assertEqual(appels_outbox, [['Bakary']])
+        self.assertEqual(ExpediteurModel.objects.count(), 2)
+        self.assertEqual(EvenementOutboxModel.objects.get(payload__nom='Bakary').tentatives, 2)
+
+    def test_relais_separes(self):
+        publier('TEST_RAPIDE', {'nom': 'Awa'})
+        publier('TEST_LENT', {})
+        self.assertEqual(RelaisOutbox().traiter_lot(), 1)
+        self.assertEqual(RelaisOutbox().traiter_lot(), 0)
+        self.assertEqual(RelaisOutbox(lents=True).traiter_lot(), 1)
+        self.assertEqual(set(EvenementOutboxModel.objects.values_list('statut', flat=True)), {'TRAITE'})
+
+    def test_evenement_lent_hors_transaction_et_reserve(self):
+        evenement = publier('TEST_LENT', {})
+        self.assertEqual(RelaisOutbox(lents=True).traiter_lot(), 1)
+        self.assertEqual(appels_outbox, [False, 0])
+        evenement.refresh_from_db()
+        self.assertEqual((evenement.statut, evenement.tentatives, evenement.jeton_reservation), ('TRAITE', 1, None))
+
+    def test_reservation_perdue_n_ecrase_pas_le_resultat(self):
+        evenement = publier('TEST_LENT', {'reprise': True})
+        RelaisOutbox(lents=True).traiter_lot()
+        evenement.refresh_from_db()
+        self.assertEqual((evenement.statut, evenement.tentatives), ('TRAITE', 5))
+
+    def test_reservation_expiree_reprise(self):
+        evenement = publier('TEST_LENT', {})
+        EvenementOutboxModel.objects.filter(pk=evenement.pk).update(
+            jeton_reservation=uuid.uuid4(), prochaine_tentative=timezone.now() - timedelta(seconds=1),
+        )
+        self.assertEqual(RelaisOutbox(lents=True).traiter_lot(), 1)
+        evenement.refresh_from_db()
+        self.assertEqual(evenement.statut, 'TRAITE')
+
+
+class GazetteerCompteur(GazetteerFournisseur):
+    """Gazetteer livré avec l'application, qui note chaque adresse demandée"""
+
+    def __init__(self):
+        super().__init__(FICHIER=settings.GEOCODAGE_FOURNISSEURS[-1]['FICHIER'])
+        self.demandes = []
+
+    def geocoder(self, ville, quartier, adresse):
+        self.demandes.append(cle_adresse(ville, quartier, adresse))
+        return super().geocoder(ville, quartier, adresse)
+
+
+class GeocodageTests(TransactionTestCase):
+
+    def setUp(self):
+        self.gazetteer = GazetteerCompteur()
+
+    def test_cle_normalisee(self):
+        self.assertEqual(cle_adresse('Abidjan', 'Cocody', 'Rue 12'), 'abidjan|cocody|rue 12')
+        self.assertEqual(cle_adresse(' ABIDJAN', 'Cocody-Angré ', 'Rue 12,'),
+                         cle_adresse('abidjan', 'cocody angre', 'rue  12'))
+        self.assertEqual(cle_adresse('Abidjan'), 'abidjan||')
+
+    def test_gazetteer_quartier_puis_ville(self):
+        self.assertEqual(self.gazetteer.geocoder('ABIDJAN', 'cocody', None), (Decimal('5.36'), Decimal('-3.97')))
+        # Quartier absent du fichier: centre de la ville
+        self.assertEqual(self.gazetteer.geocoder('Abidjan', 'Inconnu', None), (Decimal('5.3236'), Decimal('-4.0199')))
+        self.assertIsNone(self.gazetteer.geocoder('Atlantide', '', None))
+
+    def test_jamais_resolue_deux_fois(self):
+        adresses = [('Abidjan', 'Cocody', 'Rue 12'), ('ABIDJAN', 'cocody', 'rue 12,'), ('Atlantide', None, None)]
+        geocodeur = Geocodeur([self.gazetteer])
+        resultats = geocodeur.resoudre_en_masse(adresses)
+        self.assertEqual(resultats['atlantide||'], (None, None))
+        self.assertEqual(self.gazetteer.demandes, ['abidjan|cocody|rue 12', 'atlantide||'])
+
+        # Cache mémoire, réponses négatives comprises
+        with self.assertNumQueries(0):
+            geocodeur.resoudre('Abidjan', 'Cocody', 'Rue 12')
+            geocodeur.resoudre('Atlantide')
+        # Autre processus, cache mémoire vide: la table répond en une requête
+        with self.assertNumQueries(1):
+            self.assertEqual(Geocodeur([self.gazetteer]).resoudre_en_masse(adresses), resultats)
+        self.assertEqual(len(self.gazetteer.demandes), 2)
+        self.assertEqual(GeocodageModel.objects.count(), 2)
+
+    def test_nominatim_une_requete_par_intervalle(self):
+        cache.clear()
+        url = 'https://nominatim.test/search'
+        fournisseur = NominatimFournisseur(URL=url, INTERVALLE=1)
+        attentes = []
+
+        def attendre(secondes):
+            attentes.append(secondes)
+            # Intervalle écoulé: le créneau expire
+            cache.delete(f'geocodage:creneau:{url}')
+
+        with mock.patch('api.services.geocodage.urllib.request.urlopen',
+                        side_effect=lambda *args, **kwargs: io.BytesIO(b'[{"lat": "5.36", "lon": "-3.97"}]')), \
+                mock.patch('api.services.geocodage.time.sleep', side_effect=attendre):
+            self.assertEqual(fournisseur.geocoder('Abidjan', 'Cocody', 'Rue 12'), (Decimal('5.36'), Decimal('-3.97')))
+            self.assertEqual(attentes, [])
+            fournisseur.geocoder('Abidjan', 'Riviera', None)
+        self.assertEqual(len(attentes), 1)
+
+
+class RapprochementTests(TransactionTestCase):
+
+    def setUp(self):
+        colis = [creer_colis(), creer_colis()]
+        enregistrer(colis)
+        self.premiere, self.seconde = (FactureModel.objects.get(colis=c) for c in colis)
+
+    def ligne(self, numero, facture, reference, montant='300'):
+        return numero, {'numero_facture': facture.numero_facture, 'reference': reference, 'montant': montant}
+
+    def test_reimport_sans_double_paiement(self):
+        lignes = [self.ligne(2, self.premiere, 'MM-1'), self.ligne(3, self.premiere, 'MM-2')]
+        self.assertEqual(rapprocher(lignes)['rapprochees'], 2)
+        rapport = rapprocher(lignes)
+        self.assertEqual(rapport['rapprochees'], 0)
+        self.assertEqual({rejet['motif'] for rejet in rapport['non_rapprochees']}, {'Transaction déjà importée'})
+        self.premiere.refresh_from_db()
+        self.assertEqual(self.premiere.montant_paye, 600)
+
+    def test_reference_importee_entre_lecture_et_ecriture(self):
+        # Import concurrent de MM-1 (sur une autre facture) validé juste après notre lecture des références
+        PaiementReleveModel.objects.create(reference='MM-1', facture=self.seconde, montant=300,
+                                           date_paiement=timezone.now())
+        lectures = []
+        references_importees_reelles = rapprochement._references_importees
+
+        def references_importees(references):
+            lectures.append(references)
+            return set() if len(lectures) == 1 else references_importees_reelles(references)
+
+        with mock.patch.object(rapprochement, '_references_importees', side_effect=references_importees):
+            rapport = rapprocher([self.ligne(2, self.premiere, 'MM-1'), self.ligne(3, self.premiere, 'MM-2')])
+
+        # Lot annulé puis rejoué: MM-1 écartée une seule fois, MM-2 appliquée une seule fois
+        self.assertEqual(len(lectures), 2)
+        self.assertEqual(rapport['rapprochees'], 1)
+        self.assertEqual(rapport['non_rapprochees'], [{'ligne': 2, 'numero_facture': self.premiere.numero_facture,
+                                                       'motif': 'Transaction déjà importée'}])
+        self.premiere.refresh_from_db()
+        self.assertEqual(self.premiere.montant_paye, 300)
+        self.assertEqual(PaiementReleveModel.objects.filter(facture=self.premiere).count(), 1)
+
+    @skipUnless(connection.vendor == 'postgresql', 'deux transactions réellement concurrentes')
+    def test_imports_concurrents(self):
+        depart = threading.Barrier(2)
+        rapports = []
+
+        def importer(facture):
+            depart.wait()
+            try:
+                rapports.append(rapprocher([self.ligne(2, facture, 'MM-1')]))
+            finally:
+                connections.close_all()
+
+        fils = [threading.Thread(target=importer, args=(facture,)) for facture in (self.premiere, self.seconde)]
+        for fil in fils:
+            fil.start()
+        for fil in fils:
+            fil.join()
+        self.assertEqual(sorted(rapport['rapprochees'] for rapport in rapports), [0, 1])
+        self.assertEqual(PaiementReleveModel.objects.filter(reference='MM-1').count(), 1)
+
+
+class ClientsTests(TransactionTestCase):
+
+    def creer_destinataire(self, **champs):
+        donnees = {'nom_complet': 'Awa Koné', 'telephone': '07 08 09 10 11', 'ville': 'Abidjan',
+                   'quartier': 'Cocody', 'adresse_complete': 'Rue 12'}
+        return DestinataireModel.objects.create(**{**donnees, **champs})
+
+    def test_obtenir_fiche_existante(self):
+        existant = self.creer_destinataire()
+        client, cree = obtenir_ou_creer_client(DestinataireModel, {
+            'nom_complet': 'AWA KONE', 'telephone': '+225 0708091011', 'ville': 'abidjan', 'quartier': 'COCODY',
+            'adresse_complete': 'Rue 12', 'email': 'awa@example.com',
+        })
+        self.assertEqual((client.pk, cree), (existant.pk, False))
+        # Champ vide de la fiche complété
+        existant.refresh_from_db()
+        self.assertEqual(existant.email, 'awa@example.com')
+
+    def test_nouvelle_adresse_nouvelle_fiche(self):
+        existant = self.creer_destinataire()
+        for donnees in ({'quartier': 'Yopougon'}, {'nom_complet': 'Bakary Traoré'}, {'telephone': '0101010101'}):
+            client, cree = obtenir_ou_creer_client(DestinataireModel, {
+                'nom_complet': 'Awa Koné', 'telephone': '0708091011', 'ville': 'Abidjan', 'quartier': 'Cocody',
+                'adresse_complete': 'Rue 12', **donnees,
+            })
+            self.assertTrue(cree)
+            self.assertNotEqual(client.pk, existant.pk)
+
+    def test_dedupliquer(self):
+        conserve = self.creer_destinataire()
+        doublon = self.creer_destinataire(nom_complet='awa kone', telephone='+225 07 08 09 10 11',
+                                          email='awa@example.com')
+        autre_adresse = self.creer_destinataire(quartier='Yopougon')
+        expediteur = ExpediteurModel.objects.create(nom_complet='Expéditeur', telephone='0102030405', ville='Abidjan')
+        colis = [ColisModel.objects.create(expediteur=expediteur, destinataire=destinataire, description='Colis',
+                                           poids=1) for destinataire in (doublon, doublon, doublon, autre_adresse)]
+        avant = timezone.now()
+
+        self.assertEqual(dedupliquer(DestinataireModel, 'destinataire', simulation=True),
+                         {'groupes': 1, 'fusionnes': 1, 'colis_repointes': 0})
+        self.assertTrue(DestinataireModel.objects.filter(pk=doublon.pk).exists())
+
+        rapport = dedupliquer(DestinataireModel, 'destinataire', taille_lot=2)
+        self.assertEqual(rapport, {'groupes': 1, 'fusionnes': 1, 'colis_repointes': 3})
+        self.assertFalse(DestinataireModel.objects.filter(pk=doublon.pk).exists())
+        self.assertEqual(set(DestinataireModel.objects.values_list('pk', flat=True)), {conserve.pk, autre_adresse.pk})
+        # Colis repointés visibles de la synchronisation par delta
+        for colis_repointe in ColisModel.objects.filter(pk__in=[c.pk for c in colis[:3]]):
+            self.assertEqual(colis_repointe.destinataire_id, conserve.pk)
+            self.assertGreaterEqual(colis_repointe.date_modification, avant)
+        self.assertEqual(ColisModel.objects.get(pk=colis[3].pk).destinataire_id, autre_adresse.pk)
+        conserve.refresh_from_db()
+        self.assertEqual(conserve.email, 'awa@example.com')
+
+
+def prix_orm(type_service, poids, jour):
+    """Requête que l'index remplace (ancien calcul de ColisModel.calculate_tariffs, dates comprises)"""
+    tarif = TarifModel.objects.filter(
+        poids_min__lte=poids, poids_max__gte=poids, type_service=type_service, actif=True, date_debut__lte=jour,
+    ).filter(Q(date_fin__isnull=True) | Q(date_fin__gte=jour)).order_by('pk').first()
+    return tarif.prix if tarif else None
+
+
+def creer_grille_tarifs(nombre, graine=1):
+    """Grille aléatoire: intervalles qui se chevauchent, tarifs inactifs ou hors période"""
+    hasard = random.Random(graine)
+    TarifModel.objects.bulk_create([
+        TarifModel(
+            type_service=hasard.choice(['STANDARD', 'EXPRESS', 'URGENTE']),
+            poids_min=Decimal(poids_min), poids_max=Decimal(poids_min + hasard.randint(0, 20)),
+            distance_min=0, distance_max=100, prix=Decimal(hasard.randint(500, 20000)),
+            actif=hasard.random() > 0.1,
+            date_debut=datetime.date(2024, 1, 1) + timedelta(days=hasard.randint(0, 700)),
+            date_fin=(datetime.date(2024, 6, 1) + timedelta(days=hasard.randint(0, 700))
+                      if hasard.random() > 0.6 else None),
+        )
+        for poids_min in (hasard.randint(0, 50) for _ in range(nombre))
+    ])
+    return hasard
+
+
+class TarifIndexTests(TransactionTestCase):
+
+    def setUp(self):
+        tarif_index.invalider()
+
+    def test_equivalent_a_la_requete(self):
+        hasard = creer_grille_tarifs(200)
+        for _ in range(500):
+            type_service = hasard.choice(['STANDARD', 'EXPRESS', 'URGENTE', 'INCONNU'])
+            poids = Decimal(hasard.randint(0, 8000)) / 100
+            jour = datetime.date(2024, 1, 1) + timedelta(days=hasard.randint(0, 1000))
+            self.assertEqual(tarif_index.trouver_prix(type_service, poids, jour), prix_orm(type_service, poids, jour),
+                             (type_service, poids, jour))
+
+    @override_settings(INDEX_VERIFICATION_SECONDES=0)
+    def test_invalidation_vue_des_autres_processus(self):
+        tarif = TarifModel.objects.create(poids_min=0, poids_max=10, distance_min=0, distance_max=100, prix=1500,
+                                          type_service='STANDARD', date_debut=datetime.date(2020, 1, 1))
+        autre_processus = TarifIndex()
+        self.assertEqual(autre_processus.trouver_prix('STANDARD', Decimal('2')), 1500)
+        # Modification validée dans ce processus: l'index de l'autre le voit au contrôle de version suivant
+        tarif.prix = 2000
+        tarif.save()
+        self.assertEqual(autre_processus.trouver_prix('STANDARD', Decimal('2')), 2000)
+
+    def test_version_verifiee_au_plus_une_fois_par_intervalle(self):
+        TarifModel.objects.create(poids_min=0, poids_max=10, distance_min=0, distance_max=100, prix=1500,
+                                  type_service='STANDARD', date_debut=datetime.date(2020, 1, 1))
+        index = TarifIndex()
+        index.trouver_prix('STANDARD', Decimal('2'))
+        with mock.patch('api.services.index_partage.cache.get') as lecture, self.assertNumQueries(0):
+            for _ in range(1000):
+                index.trouver_prix('STANDARD', Decimal('2'))
+        lecture.assert_not_called()
+
+    @skipUnless(os.getenv('BENCHMARK'), 'mesure de performance: BENCHMARK=1')
+    def test_benchmark(self):
+        hasard = creer_grille_tarifs(500)
+        demandes = [(hasard.choice(['STANDARD', 'EXPRESS', 'URGENTE']), Decimal(hasard.randint(0, 8000)) / 100)
+                    for _ in range(2000)]
+        jour = timezone.localdate()
+        debut = time.perf_counter()
+        for type_service, poids in demandes:
+            prix_orm(type_service, poids, jour)
+        orm = time.perf_counter() - debut
+        tarif_index.trouver_prix('STANDARD', Decimal('1'))
+        debut = time.perf_counter()
+        for type_service, poids in demandes:
+            tarif_index.trouver_prix(type_service, poids, jour)
+        index = time.perf_counter() - debut
+        print(f'\nTarifs, {len(demandes)} colis: requête {orm * 1000:.1f} ms, index {index * 1000:.1f} ms '
+              f'(x{orm / index:.0f})')
+
+
+class EvenementsTests(TransactionTestCase):
+
+    def test_charge_notify_bornee(self):
+        evenement = {'type': 'suivi.cree', 'numero_suivi': 'KID00000011', 'ville': 'abidjan', 'statut': 'EN_TRANSIT',
+                     'description': 'é' * 5000, 'localisation': 'Dépôt'}
+        charge = charge_notify(evenement)
+        self.assertLessEqual(len(charge.encode()), CHARGE_MAX)
+        self.assertEqual(json.loads(charge),
+                         {cle: evenement[cle] for cle in ('type', 'numero_suivi', 'ville', 'statut')})
+        court = {**evenement, 'description': 'Départ du dépôt'}
+        self.assertEqual(json.loads(charge_notify(court)), court)
+
+    def test_description_tronquee(self):
+        suivi = SuiviModel(statut='EN_TRANSIT', description='x' * 10000)
+        self.assertEqual(len(evenement_suivi(suivi, 'KID00000011', 'abidjan')['description']), 200)
+
+    @skipUnless(connection.vendor == 'postgresql', 'NOTIFY propre à PostgreSQL')
+    def test_notify_volumineux_n_annule_pas_l_ecriture(self):
+        colis = creer_colis()
+        with transaction.atomic():
+            SuiviModel.objects.create(colis=colis, statut='EN_TRANSIT', description='x' * 20000)
+            PostgresBackend().publier([{'type': 'suivi.cree', 'description': 'é' * 20000}])
+        self.assertEqual(SuiviModel.objects.filter(colis=colis, statut='EN_TRANSIT').count(), 1)
+
+    def test_charge_5000_abonnes(self):
+        boucle = asyncio.new_event_loop()
+        self.addCleanup(boucle.close)
+        diffuseur = Diffuseur()
+        diffuseur._backend = LocalBackend()
+        villes = [f'ville{n}' for n in range(50)]
+        par_ville = [diffuseur.abonner(Abonnement(boucle, villes=[villes[n % 50]], taille=1000)) for n in range(4000)]
+        par_numero = [diffuseur.abonner(Abonnement(boucle, numeros=[f'KID{n:08d}'], taille=1000)) for n in range(900)]
+        tous = [diffuseur.abonner(Abonnement(boucle, taille=1000)) for _ in range(100)]
+        self.assertEqual(diffuseur.nombre_abonnes(), 5000)
+
+        evenements = [{'type': COLIS_STATUT, 'ville': villes[n % 50], 'numero_suivi': f'KID{n:08d}', 'statut': 'LIVRE'}
+                      for n in range(500)]
+        with mock.patch.object(boucle, 'call_soon_threadsafe', wraps=boucle.call_soon_threadsafe) as reveils:
+            debut = time.perf_counter()
+            for evenement in evenements:
+                diffuseur.diffuser(evenement)
+            diffusion = time.perf_counter() - debut
+            boucle.run_until_complete(asyncio.sleep(0))
+            depot = time.perf_counter() - debut - diffusion
+        # Un seul réveil de la boucle par événement, quel que soit le nombre d'abonnés concernés
+        self.assertEqual(reveils.call_count, len(evenements))
+        self.assertTrue(all(abonnement.file.qsize() == 10 for abonnement in par_ville))
+        self.assertTrue(all(abonnement.file.qsize() == (1 if n < 500 else 0)
+                            for n, abonnement in enumerate(par_numero)))
+        self.assertTrue(all(abonnement.file.qsize() == 500 and not abonnement.ferme for abonnement in tous))
+        if os.getenv('BENCHMARK'):
+            print(f'\n5000 abonnés, {len(evenements)} événements: diffusion {diffusion * 1000:.1f} ms, '
+                  f'dépôt dans les files {depot * 1000:.1f} ms')
+
+
+class PositionsTests(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.livreur = creer_livreur()
+
+    def points(self, nombre, depuis):
+        return [{'latitude': 5.3 + n / 10000, 'longitude': -4.0,
+                 'horodatage': (depuis + timedelta(seconds=n)).isoformat()} for n in range(nombre)]
+
+    def test_lot_en_retard_ne_recule_pas(self):
+        maintenant = timezone.now()
+        positions.enregistrer_positions(self.livreur.pk, self.points(3, maintenant - timedelta(minutes=1)))
+        positions.enregistrer_positions(self.livreur.pk, self.points(3, maintenant - timedelta(hours=1)))
+        self.assertEqual(positions.derniere_position(self.livreur.pk)['horodatage'],
+                         maintenant - timedelta(minutes=1) + timedelta(seconds=2))
+
+    def test_lots_concurrents_ne_reculent_pas(self):
+        maintenant = timezone.now()
+        ancien = {'latitude': 1, 'longitude': 1, 'horodatage': maintenant - timedelta(minutes=5)}
+        recent = {'latitude': 2, 'longitude': 2, 'horodatage': maintenant}
+        lire = cache.get
+        concurrent = threading.Thread(target=positions._memoriser, args=(self.livreur.pk, recent))
+
+        def lire_pendant_un_lot(cle, *args):
+            # Le lot récent arrive entre la lecture et l'écriture du lot ancien
+            valeur = lire(cle, *args)
+            if cle == positions.cle_cache(self.livreur.pk) and not concurrent.is_alive():
+                concurrent.start()
+                concurrent.join(0.1)
+            return valeur
+
+        with mock.patch.object(cache, 'get', side_effect=lire_pendant_un_lot):
+            positions._memoriser(self.livreur.pk, ancien)
+            concurrent.join()
+        self.assertEqual(cache.get(positions.cle_cache(self.livreur.pk))['horodatage'], recent['horodatage'])
+
+    def test_verrou_indisponible_retombe_sur_la_table(self):
+        positions.enregistrer_positions(self.livreur.pk, self.points(1, timezone.now() - timedelta(minutes=2)))
+        cache.add(f'{positions.cle_cache(self.livreur.pk)}:verrou', 1, 60)
+        with mock.patch.object(positions, 'VERROU_ATTENTE', 0.05):
+            positions.enregistrer_positions(self.livreur.pk, self.points(2, timezone.now() - timedelta(minutes=1)))
+        self.assertIsNone(cache.get(positions.cle_cache(self.livreur.pk)))
+        self.assertEqual(positions.derniere_position(self.livreur.pk)['horodatage'],
+                         PositionLivreurModel.objects.latest('horodatage').horodatage)
+
+    def test_suppression_livreur_efface_ses_positions(self):
+        positions.enregistrer_positions(self.livreur.pk, self.points(50, timezone.now() - timedelta(minutes=1)))
+        autre = creer_livreur()
+        positions.enregistrer_positions(autre.pk, self.points(5, timezone.now() - timedelta(minutes=1)))
+        with CaptureQueriesContext(connection) as requetes:
+            self.livreur.delete()
+        # Une seule requête pour les positions, sans les charger
+        self.assertFalse([r for r in requetes.captured_queries if r['sql'].startswith('SELECT')
+                          and PositionLivreurModel._meta.db_table in r['sql']])
+        self.assertEqual(PositionLivreurModel.objects.count(), 5)
+
+    @skipUnless(os.getenv('BENCHMARK'), 'mesure de performance: BENCHMARK=1')
+    def test_debit_ingestion(self):
+        depuis = timezone.now() - timedelta(hours=6)
+        lots = [self.points(100, depuis + timedelta(seconds=100 * n)) for n in range(200)]
+        debut = time.perf_counter()
+        for lot in lots:
+            positions.enregistrer_positions(self.livreur.pk, lot)
+        duree = time.perf_counter() - debut
+        self.assertEqual(PositionLivreurModel.objects.count(), 20000)
+        print(f'\nPositions, {len(lots)} lots de 100 points: {duree * 1000:.0f} ms ({20000 / duree:.0f} points/s)')
+
+
+class AffectationTests(TransactionTestCase):
+
+    def livreur(self, zone='Cocody', capacite=100, volume=1):
+        livreur = creer_livreur()
+        LivreurModel.objects.filter(pk=livreur.pk).update(zone_intervention=zone)
+        vehicule = creer_vehicule(livreur)
+        VehiculeModel.objects.filter(pk=vehicule.pk).update(capacite_charge=capacite, volume_utile=volume)
+        return livreur
+
+    def test_colis_au_livreur_le_moins_charge_de_sa_zone(self):
+        premier, second = self.livreur(), self.livreur()
+        self.livreur(zone='Yopougon')
+        colis = [creer_colis() for _ in range(4)]
+        affectations, non_affectes = Affectateur().affecter()
+        self.assertEqual(non_affectes, [])
+        self.assertEqual(sorted(livraison.colis_id for livraison in affectations), [c.pk for c in colis])
+        par_livreur = {premier.pk: 0, second.pk: 0}
+        for livraison in LivraisonModel.objects.all():
+            par_livreur[livraison.livreur_id] += 1
+        self.assertEqual(par_livreur, {premier.pk: 2, second.pk: 2})
+
+    def test_priorite_puis_capacite(self):
+        self.livreur(capacite=10)
+        normal = creer_colis(priorite='NORMALE')
+        ColisModel.objects.filter(pk=normal.pk).update(poids=5)
+        urgent = creer_colis(priorite='URGENTE')
+        ColisModel.objects.filter(pk=urgent.pk).update(poids=8)
+        affectations, non_affectes = Affectateur().affecter()
+        self.assertEqual([livraison.colis_id for livraison in affectations], [urgent.pk])
+        self.assertEqual([c.pk for c in non_affectes], [normal.pk])
+
+    def test_charge_deja_embarquee_et_volume(self):
+        livreur = self.livreur(capacite=100, volume=Decimal('0.5'))
+        embarque = creer_colis()
+        ColisModel.objects.filter(pk=embarque.pk).update(poids=95)
+        LivraisonModel.objects.create(colis=embarque, livreur=livreur, vehicule=livreur.vehicules.get())
+        lourd, encombrant, leger = creer_colis(), creer_colis(longueur=100, largeur=100, hauteur=100), creer_colis()
+        ColisModel.objects.filter(pk=lourd.pk).update(poids=10)
+        affectations, non_affectes = Affectateur().affecter([lourd.pk, encombrant.pk, leger.pk])
+        self.assertEqual([livraison.colis_id for livraison in affectations], [leger.pk])
+        self.assertEqual({c.pk for c in non_affectes}, {lourd.pk, encombrant.pk})
+
+    def test_simulation_n_ecrit_rien(self):
+        self.livreur()
+        creer_colis()
+        affectations, _ = Affectateur().affecter(simulation=True)
+        self.assertEqual(len(affectations), 1)
+        self.assertFalse(LivraisonModel.objects.exists())
+
+    def test_nombre_de_requetes_constant(self):
+        for _ in range(3):
+            self.livreur()
+
+        def compter(nombre):
+            colis = [creer_colis() for _ in range(nombre)]
+            with CaptureQueriesContext(connection) as requetes:
+                affectations, _ = Affectateur().affecter([c.pk for c in colis])
+            self.assertEqual(len(affectations), nombre)
+            return len(requetes)
+
+        self.assertEqual(compter(2), compter(30))
+
+    @skipUnless(connection.vendor == 'postgresql', 'verrous de lignes propres à PostgreSQL')
+    def test_fiche_livreur_verrouillee_ne_bloque_pas(self):
+        livreur = self.livreur()
+        creer_colis()
+        verrouille, liberer = threading.Event(), threading.Event()
+
+        def editer_fiche():
+            try:
+                with transaction.atomic():
+                    LivreurModel.objects.select_for_update().get(pk=livreur.pk)
+                    verrouille.set()
+                    liberer.wait(10)
+            finally:
+                connections.close_all()
+
+        edition = threading.Thread(target=editer_fiche)
+        edition.start()
+        verrouille.wait(10)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SET lock_timeout = '2s'")
+            affectations, _ = Affectateur().affecter()
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute('RESET lock_timeout')
+            liberer.set()
+            edition.join()
+        self.assertEqual(len(affectations), 1)
+
+    @skipUnless(os.getenv('BENCHMARK'), 'mesure de performance: BENCHMARK=1')
+    def test_debit_affectation(self):
+        quartiers = [f'Quartier {n}' for n in range(20)]
+        for n in range(200):
+            self.livreur(zone=f'Abidjan, {quartiers[n % 20]}', capacite=1000, volume=10)
+        expediteur = ExpediteurModel.objects.create(nom_complet='Expéditeur', telephone='0102030405', ville='Abidjan')
+        destinataires = DestinataireModel.objects.bulk_create(
+            [DestinataireModel(nom_complet=f'Destinataire {n}', telephone=f'07{n:08d}', ville='Abidjan',
+                               quartier=quartiers[n % 20]) for n in range(200)]
+        )
+        ColisModel.objects.bulk_create(
+            [ColisModel(numero_suivi=f'AFF{n:08d}', expediteur=expediteur, destinataire=destinataires[n % 200],
+                        description='Colis', poids=Decimal(1 + n % 20), priorite=list(ORDRE_PRIORITE)[n % 3])
+             for n in range(5000)]
+        )
+        debut = time.perf_counter()
+        affectations, non_affectes = Affectateur().affecter(limite=5000)
+        duree = time.perf_counter() - debut
+        self.assertEqual(len(affectations) + len(non_affectes), 5000)
+        print(f'\nAffectation, 5000 colis et 200 livreurs: {duree * 1000:.0f} ms '
+              f'({len(affectations)} affectés, {len(non_affectes)} sans livreur)')
+
+
+class TourneeTests(TransactionTestCase):
+
+    def arrets(self, nombre, graine):
+        aleatoire = random.Random(graine)
+        # Arrêts dispersés sur une quinzaine de kilomètres autour d'Abidjan
+        return [(n, 5.30 + aleatoire.uniform(-0.07, 0.07), -4.00 + aleatoire.uniform(-0.07, 0.07))
+                for n in range(nombre)]
+
+    def test_jamais_plus_long_que_le_plus_proche_voisin(self):
+        for graine, nombre in itertools.product(range(10), (3, 8, 25, 60)):
+            arrets = self.arrets(nombre, graine)
+            distances = matrice_distances([5.30] + [a[1] for a in arrets], [-4.00] + [a[2] for a in arrets])
+            for retour in (True, False):
+                with self.subTest(graine=graine, nombre=nombre, retour=retour):
+                    matrice = distances.copy()
+                    if not retour:
+                        matrice[:, 0] = 0
+                    ordre = optimiser(matrice, budget=5)
+                    self.assertEqual(int(ordre[0]), 0)
+                    self.assertEqual(sorted(ordre.tolist()), list(range(nombre + 1)))
+                    self.assertLessEqual(longueur(matrice, ordre),
+                                         longueur(matrice, plus_proche_voisin(matrice)) + 1e-9)
+
+    def test_planifier_part_du_depot(self):
+        arrets = self.arrets(30, 1)
+        for retour in (True, False):
+            etapes, total = planifier((5.30, -4.00), arrets, retour=retour)
+            self.assertEqual(sorted(cle for cle, _ in etapes), list(range(30)))
+            premiere = matrice_distances([5.30, arrets[etapes[0][0]][1]], [-4.00, arrets[etapes[0][0]][2]])[0, 1]
+            self.assertAlmostEqual(etapes[0][1], premiere)
+            if not retour:
+                self.assertAlmostEqual(total, sum(distance for _, distance in etapes))
+
+    @skipUnless(os.getenv('BENCHMARK'), 'mesure de performance: BENCHMARK=1')
+    def test_taille_des_tournees(self):
+        for nombre in (50, 200, 1000):
+            arrets = self.arrets(nombre, nombre)
+            distances = matrice_distances([5.30] + [a[1] for a in arrets], [-4.00] + [a[2] for a in arrets])
+            debut = time.perf_counter()
+            voisin = longueur(distances, plus_proche_voisin(distances))
+            glouton = time.perf_counter() - debut
+            debut = time.perf_counter()
+            ordre = optimiser(distances, budget=2.0)
+            duree = time.perf_counter() - debut
+            print(f'\nTournée de {nombre} arrêts: plus proche voisin {voisin:.1f} km en {glouton * 1000:.0f} ms, '
+                  f'2-opt/Or-opt {longueur(distances, ordre):.1f} km en {duree * 1000:.0f} ms')
+
+
+class RechercheClientsTests(TransactionTestCase):
+
+    def setUp(self):
+        cache_recherche.vider()
+        self.client = APIClient()
+        self.client.force_authenticate(UserModel.objects.create(username='admin', role='ADMIN'))
+
+    def test_normaliser_telephone(self):
+        for saisie, attendu in (('+225 07 08-09 10 11', '0708091011'), ('00225 0708091011', '0708091011'),
+                                ('2250708091011', '0708091011'), ('07.08.09.10.11', '0708091011'),
+                                ('2250', '2250'), ('', ''), (None, '')):
+            with self.subTest(saisie=saisie):
+                self.assertEqual(normaliser_telephone(saisie), attendu)
+
+    def test_numero_complet_quel_que_soit_le_format(self):
+        expediteur = ExpediteurModel.objects.create(nom_complet='Awa Koné', telephone='07 08 09 10 11',
+                                                    ville='Abidjan')
+        DestinataireModel.objects.create(nom_complet='Awa Koné', telephone='+225 0708091011', ville='Abidjan')
+        ExpediteurModel.objects.create(nom_complet='Autre', telephone='0101010101', ville='Abidjan')
+        reponse = self.client.get('/api/search/customers/', {'q': '00225 07-08-09-10-11'})
+        self.assertEqual(reponse.status_code, 200)
+        trouves = [(ligne['type'], ligne['id']) for ligne in reponse.data['results']]
+        self.assertEqual(sorted(type_client for type_client, _ in trouves), ['destinataire', 'expediteur'])
+        self.assertIn(('expediteur', expediteur.pk), trouves)
+        self.assertEqual(self.client.get('/api/search/customers/', {'q': 'ab'}).status_code, 400)
+
+    def test_cache_vide_a_l_ecriture_d_un_client(self):
+        ExpediteurModel.objects.create(nom_complet='Awa Koné', telephone='0708091011', ville='Abidjan')
+        self.assertEqual(len(rechercher_clients('0708091011')), 1)
+        with CaptureQueriesContext(connection) as requetes:
+            rechercher_clients('0708091011')
+        self.assertEqual(len(requetes), 0)
+        DestinataireModel.objects.create(nom_complet='Awa Koné', telephone='0708091011', ville='Abidjan')
+        self.assertEqual(len(rechercher_clients('0708091011')), 2)
+
+    def test_lru_evince_le_moins_recemment_lu(self):
+        lru = CacheLRU(taille=2, ttl=60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertEqual((lru.get('a'), lru.get('b'), lru.get('c')), (1, None, 3))
+        with mock.patch('api.services.lru.time.monotonic', return_value=time.monotonic() + 61):
+            self.assertIsNone(lru.get('a'))
+
+    @skipUnless(connection.vendor == 'postgresql', 'similarité trigramme propre à PostgreSQL (pg_trgm)')
+    def test_recherche_approchee(self):
+        cible = DestinataireModel.objects.create(nom_complet='Kouassi Jean Marc', telephone='0708091011',
+                                                 ville='Abidjan', quartier='Riviera Palmeraie')
+        DestinataireModel.objects.create(nom_complet='Bakary Traoré', telephone='0101010101', ville='Bouaké',
+                                         quartier='Commerce')
+        for q in ('kouasi', 'KOUASSI jean', 'palmeraie', '08091'):
+            with self.subTest(q=q):
+                resultats = rechercher_clients(q)
+                self.assertEqual([ligne['id'] for ligne in resultats][:1], [cible.pk])
+                self.assertNotIn('Bakary Traoré', [ligne['nom_complet'] for ligne in resultats])
+
+    @skipUnless(os.getenv('BENCHMARK'), 'mesure de performance: BENCHMARK=1')
+    def test_latence_recherche(self):
+        noms = ['Kouassi', 'Koné', 'Traoré', 'Yao', 'Bamba', 'Ouattara', 'Diallo', 'Coulibaly']
+        for modele in (ExpediteurModel, DestinataireModel):
+            modele.objects.bulk_create(
+                [modele(nom_complet=f'{noms[n % 8]} {noms[n // 8 % 8]} {n}', telephone=f'07{n:08d}',
+                        telephone_normalise=f'07{n:08d}', ville='Abidjan', quartier=f'Quartier {n % 50}')
+                 for n in range(20000)], batch_size=5000,
+            )
+        requetes = ['07000012345', '+225 07 00 01 99 99'] + (['kouasi yao', 'quartier 12', '0001234']
+                                                             if connection.vendor == 'postgresql' else [])
+
+        def chronometrer(vider):
+            debut = time.perf_counter()
+            for _ in range(20):
+                for q in requetes:
+                    if vider:
+                        cache_recherche.vider()
+                    self.assertEqual(self.client.get('/api/search/customers/', {'q': q}).status_code, 200)
+            return (time.perf_counter() - debut) / (20 * len(requetes))
+
+        base, cache_lru = chronometrer(True), chronometrer(False)
+        lru = CacheLRU(taille=2048, ttl=60)
+        debut = time.perf_counter()
+        for n in range(100000):
+            lru.set(n % 4096, n)
+            lru.get((n * 7) % 4096)
+        operations = 200000 / (time.perf_counter() - debut)
+        print(f'\nRecherche clients, 40 000 fiches: requête {base * 1000:.1f} ms, depuis le cache LRU '
+              f'{cache_lru * 1000:.2f} ms; LRU {operations / 1e6:.2f} M opérations/s')
+
+
+class ColisEnMasseTests(TransactionTestCase):
+    """POST /api/colis/bulk/: rapport d'erreurs par ligne et nombre de requêtes fixe"""
+
+    def setUp(self):
+        self.admin = UserModel.objects.create(username='admin', role='ADMIN')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.expediteur = ExpediteurModel.objects.create(nom_complet='Expéditeur', telephone='0102030405',
+                                                         ville='Abidjan')
+        self.destinataire = DestinataireModel.objects.create(nom_complet='Destinataire', telephone='0708091011',
+                                                             ville='Abidjan', quartier='Cocody')
+
+    def ligne(self, **champs):
+        return {'expediteur_id': self.expediteur.pk, 'destinataire_id': self.destinataire.pk,
+                'description': 'Colis en lot', 'poids': '1.50', **champs}
+
+    def envoyer(self, lignes):
+        return self.client.post('/api/colis/bulk/', {'colis': lignes}, format='json')
+
+    def test_erreurs_rapportees_par_ligne(self):
+        reponse = self.envoyer([
+            self.ligne(),
+            self.ligne(description=''),
+            self.ligne(expediteur_id=999999),
+            self.ligne(destinataire_id=999999, poids='-1'),
+            self.ligne(priorite='EXPRESS'),
+        ])
+        self.assertEqual(reponse.status_code, 201, reponse.content)
+        self.assertEqual(len(reponse.data['crees']), 2)
+        self.assertEqual([erreur['index'] for erreur in reponse.data['erreurs']], [1, 2, 3])
+        erreurs = {erreur['index']: erreur['erreurs'] for erreur in reponse.data['erreurs']}
+        self.assertIn('description', erreurs[1])
+        self.assertEqual(set(erreurs[2]), {'expediteur_id'})
+        self.assertIn('poids', erreurs[3])
+        # Les lignes valides sont enregistrées malgré les erreurs, avec leurs événements d'outbox
+        numeros = [colis['numero_suivi'] for colis in reponse.data['crees']]
+        self.assertEqual(ColisModel.objects.filter(numero_suivi__in=numeros).count(), 2)
+        self.assertEqual(EvenementOutboxModel.objects.filter(type_evenement='COLIS_ENREGISTRE').count(), 2)
+        vider_outbox()
+        self.assertEqual(FactureModel.objects.filter(colis__numero_suivi__in=numeros).count(), 2)
+
+    def test_lot_invalide_refuse(self):
+        self.assertEqual(self.envoyer([]).status_code, 400)
+        self.assertEqual(self.client.post('/api/colis/bulk/', {'colis': 'x'}, format='json').status_code, 400)
+        with override_settings(COLIS_BULK_MAX=3):
+            self.assertEqual(self.envoyer([self.ligne()] * 4).status_code, 400)
+        self.assertFalse(ColisModel.objects.exists())
+
+    def test_nombre_de_requetes_constant(self):
+        # Index des zones chargé au premier appel; les numéros de suivi sont réservés par blocs
+        # sur la connexion de l'allocateur, hors de celle comptée ici
+        self.envoyer([self.ligne()])
+
+        def compter(nombre):
+            with CaptureQueriesContext(connection) as requetes:
+                reponse = self.envoyer([self.ligne() for _ in range(nombre)])
+            self.assertEqual(len(reponse.data['crees']), nombre)
+            return len(requetes)
+
+        # 40 lignes: sous la limite de 999 paramètres de sqlite, qui découperait l'INSERT
+        self.assertEqual(compter(40), compter(2))
+
+
+def photo_jpeg(couleur='red', taille=(400, 300), orientation=None):
+    """JPEG portant des métadonnées EXIF (appareil, position GPS) comme celles d'un téléphone"""
+    exif = Image.Exif()
+    exif[0x010F] = 'Téléphone du livreur'
+    exif[0x8825] = {1: 'N', 2: (5.0, 20.0, 0.0)}
+    if orientation:
+        exif[0x0112] = orientation
+    tampon = io.BytesIO()
+    Image.new('RGB', taille, couleur).save(tampon, 'JPEG', exif=exif.tobytes())
+    return tampon.getvalue()
+
+
+@override_settings(PHOTOS_PROCESSUS=1, PHOTOS_AFFICHAGE_PX=200, PHOTOS_MINIATURE_PX=50)
+class PhotosTests(TransactionTestCase):
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        reglages = override_settings(MEDIA_ROOT=self.media)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+        self.addCleanup(photos._reinitialiser)
+
+    def livraison_avec_photo(self, contenu):
+        nom = default_storage.save(f'livraisons/photo{next(_compteur)}.jpg', io.BytesIO(contenu))
+        return creer_livraison(photo_livraison=nom)
+
+    def traiter(self, livraisons):
+        with transaction.atomic():
+            photos.demander_traitement([livraison.pk for livraison in livraisons])
+        vider_outbox()
+        for livraison in livraisons:
+            livraison.refresh_from_db()
+
+    def test_exif_retire_et_orientation_appliquee(self):
+        chemin = os.path.join(self.media, 'original.jpg')
+        with open(chemin, 'wb') as fichier:
+            fichier.write(photo_jpeg(orientation=6))
+        with Image.open(chemin) as original:
+            self.assertTrue(original.getexif().get_ifd(0x8825))
+
+        affichage, miniature = images.traiter_image(chemin, self.media, 200, 50, 80)
+        for nom, cote in ((affichage, 200), (miniature, 50)):
+            with Image.open(os.path.join(self.media, nom)) as rendu:
+                self.assertEqual(rendu.format, 'WEBP')
+                self.assertNotIn('exif', rendu.info)
+                self.assertEqual(len(rendu.getexif()), 0)
+                # Orientation 6 (rotation de 90°): le rendu est en portrait, sans balise à interpréter
+                self.assertEqual(rendu.size, (cote * 3 // 4, cote))
+
+    def test_rendus_nommes_par_contenu(self):
+        chemin = os.path.join(self.media, 'original.jpg')
+        with open(chemin, 'wb') as fichier:
+            fichier.write(photo_jpeg())
+        rendus = images.traiter_image(chemin, self.media, 200, 50, 80)
+        self.assertEqual(rendus, images.noms(hashlib.sha256(photo_jpeg()).hexdigest()))
+        # Rendus déjà présents: l'original n'est pas décodé de nouveau
+        with mock.patch.object(images.Image, 'open') as ouvrir:
+            self.assertEqual(images.traiter_image(chemin, self.media, 200, 50, 80), rendus)
+        ouvrir.assert_not_called()
+
+    def test_photos_identiques_partagent_leurs_rendus(self):
+        premiere, seconde = self.livraison_avec_photo(photo_jpeg()), self.livraison_avec_photo(photo_jpeg())
+        autre = self.livraison_avec_photo(photo_jpeg('blue'))
+        originaux = [livraison.photo_livraison.name for livraison in (premiere, seconde, autre)]
+        self.traiter([premiere, seconde, autre])
+
+        self.assertEqual((premiere.photo_livraison.name, premiere.photo_miniature.name),
+                         (seconde.photo_livraison.name, seconde.photo_miniature.name))
+        self.assertNotEqual(premiere.photo_livraison.name, autre.photo_livraison.name)
+        self.assertTrue(premiere.photo_livraison.name.endswith('.webp'))
+        self.assertEqual(len(os.listdir(os.path.dirname(default_storage.path(premiere.photo_livraison.name)))), 1)
+        # Originaux (avec leurs EXIF) effacés une fois les rendus enregistrés
+        self.assertFalse(any(default_storage.exists(nom) for nom in originaux))
+        self.assertFalse(photos.a_traiter().exists())
+
+    def test_photo_illisible_conservee(self):
+        illisible = self.livraison_avec_photo(b'pas une image')
+        lisible = self.livraison_avec_photo(photo_jpeg())
+        nom = illisible.photo_livraison.name
+        with self.assertLogs('api.services.photos', 'ERROR'):
+            self.traiter([illisible, lisible])
+        self.assertEqual((illisible.photo_livraison.name, illisible.photo_miniature.name), (nom, ''))
+        self.assertTrue(default_storage.exists(nom))
+        self.assertTrue(lisible.photo_miniature.name)
+
+    def test_liste_sans_original_ni_signature(self):
+        livraison = self.livraison_avec_photo(photo_jpeg())
+        livraison.signature_destinataire = 'data:image/png;base64,' + 'A' * 5000
+        livraison.save()
+        self.traiter([livraison])
+        client = APIClient()
+        client.force_authenticate(UserModel.objects.create(username='admin', role='ADMIN'))
+
+        ligne = client.get('/api/livraisons/').data['results'][0]
+        self.assertTrue(ligne['photo_miniature'].endswith(livraison.photo_miniature.name))
+        self.assertNotIn('photo_livraison', ligne)
+        self.assertNotIn('signature_destinataire', ligne)
+        detail = client.get(f'/api/livraisons/{livraison.pk}/').data
+        self.assertTrue(detail['photo_livraison'].endswith(livraison.photo_livraison.name))
+        self.assertEqual(detail['signature_destinataire'], livraison.signature_destinataire)
@@ -20,6 +20,9 @@ router.register(r'factures', views.FactureViewSet)
 router.register(r'zones-livraison', views.ZoneLivraisonViewSet)
 router.register(r'notifications', views.NotificationViewSet)
 router.register(r'tarifs', views.TarifViewSet)
+router.register(r'stats', views.StatistiquesViewSet, basename='stats')
+router.register(r'livreur/livraisons', views.LivreurLivraisonViewSet, basename='livreur-livraisons')
+router.register(r'livreur/televersements', views.TeleversementViewSet, basename='livreur-televersements')
 
 urlpatterns = [
     # Authentication
@@ -31,6 +34,20 @@ urlpatterns = [
     path('health/readiness/', views.readiness_check, name='readiness_check'),
     path('health/liveness/', views.liveness_check, name='liveness_check'),
     
+    # Suivi public des colis (sans authentification)
+    path('track/<str:numero_suivi>/', views.SuiviPublicView.as_view(), name='suivi_public'),
+
+    # Recherche approchée des expéditeurs et destinataires
+    path('search/customers/', views.RechercheClientsView.as_view(), name='recherche_clients'),
+
+    # Exports CSV en flux
+    path('exports/colis.csv', views.ExportColisView.as_view(), name='export_colis'),
+    path('exports/factures.csv', views.ExportFacturesView.as_view(), name='export_factures'),
+
+    # Flux temps réel (SSE) des statuts de colis, servi par le service ASGI
+    path('events/', views.flux_evenements, name='flux_evenements'),
+    path('events/ticket/', views.TicketEvenementsView.as_view(), name='ticket_evenements'),
+
     # API routes
     path('', include(router.urls)),
 ]
@@ -7,12 +7,25 @@ from django.utils import timezone
 from api.models import ColisModel
 from api.serializers import ColisListSerializer, ColisDetailSerializer
 from api.permissions import IsAdminOrOperateurUser # Import the custom permission
-from api.models import FactureModel, SuiviModel, NotificationModel, UserModel # Import necessary models
+from api.views.mixins import QuerysetOptimiseMixin
+from api.pagination import PaginationCurseur
+from api.filters import ColisFilter
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.filters import OrderingFilter
+from api.models import ExpediteurModel, DestinataireModel, NotificationModel # Import necessary models
+from api.services.colis_intake import enregistrer_colis
+from django.conf import settings
 from django.db import transaction # Import transaction to ensure atomicity
 
-class ColisViewSet(viewsets.ModelViewSet):
+class ColisViewSet(QuerysetOptimiseMixin, viewsets.ModelViewSet):
     queryset = ColisModel.objects.all()
+    select_related_par_action = {'*': ('expediteur', 'destinataire', 'utilisateur')}
 
+    pagination_class = PaginationCurseur
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_class = ColisFilter
+    ordering_fields = ['date_creation']
+    ordering = PaginationCurseur.ordering
     permission_classes = [IsAdminOrOperateurUser] # Apply the custom permission
 
     def get_serializer_class(self):
@@ -39,7 +52,7 @@ class ColisViewSet(viewsets.ModelViewSet):
             destinataire=colis.destinataire.telephone,
             sujet='Colis livré',
             message=f'Votre colis {colis.numero_suivi} a été remis avec succès.',
-            statut='LIVRE'
+            statut='EN_ATTENTE'
         )
         return Response({'detail': 'Colis livré avec succès.'}, status=status.HTTP_200_OK)
 
@@ -48,43 +61,62 @@ class ColisViewSet(viewsets.ModelViewSet):
             # 1. Save the ColisModel instance
             colis_instance = serializer.save(utilisateur=self.request.user) # Associate with current user
 
-            # 2. Create FactureModel entry
-            facture_instance = FactureModel.objects.create(
-                colis=colis_instance,
-                # The save method of FactureModel will calculate tariffs automatically
-                # based on the colis_instance characteristics.
-                montant_base=0.00, # Placeholder, will be calculated by FactureModel.save()
-                montant_total=0.00, # Placeholder, will be calculated by FactureModel.save()
-            )
-            # Explicitly call save to trigger tariff calculation if not triggered by create
-            # (create often calls save, but being explicit ensures it)
-            facture_instance.save()
+            # 2. Publish a single outbox event: the FactureModel, the initial SuiviModel
+            # entry and the SMS NotificationModel entries are created by relay_outbox
+            enregistrer_colis([colis_instance])
 
-            # 3. Create initial SuiviModel entry
-            SuiviModel.objects.create(
-                colis=colis_instance,
-                statut='COLIS_RECEPTIONNE',
-                description='Colis réceptionné à l\'agence Cocody',
-                utilisateur=self.request.user,
-                localisation='Agence Cocody'
-            )
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def creer_en_masse(self, request):
+        """Enregistre un lot de colis avec un nombre fixe de requêtes, quelle que soit sa taille"""
+        lignes = request.data.get('colis') if isinstance(request.data, dict) else request.data
+        if not isinstance(lignes, list) or not lignes:
+            return Response({'detail': 'Une liste de colis est attendue.'}, status=status.HTTP_400_BAD_REQUEST)
+        taille_max = getattr(settings, 'COLIS_BULK_MAX', 500)
+        if len(lignes) > taille_max:
+            return Response({'detail': f'Lot limité à {taille_max} colis.'}, status=status.HTTP_400_BAD_REQUEST)
 
-            # 4. Create SMS NotificationModel for sender
-            NotificationModel.objects.create(
-                colis=colis_instance,
-                type_notification='SMS',
-                destinataire=colis_instance.expediteur.telephone,
-                sujet='Confirmation d\'enregistrement de colis',
-                message=f'Votre colis {colis_instance.numero_suivi} a été enregistré avec succès. Suivi: {colis_instance.get_absolute_url() if hasattr(colis_instance, 'get_absolute_url') else 'URL non disponible'}',
-                statut='EN_ATTENTE'
-            )
+        # 1. Validation de chaque ligne, sans accès à la base
+        erreurs = []
+        valides = []
+        for index, ligne in enumerate(lignes):
+            serializer = ColisDetailSerializer(data=ligne)
+            if serializer.is_valid():
+                valides.append((index, serializer.validated_data))
+            else:
+                erreurs.append({'index': index, 'erreurs': serializer.errors})
 
-            # 5. Create SMS NotificationModel for recipient
-            NotificationModel.objects.create(
-                colis=colis_instance,
-                type_notification='SMS',
-                destinataire=colis_instance.destinataire.telephone,
-                sujet='Notification de colis en attente',
-                message=f'Un colis ({colis_instance.numero_suivi}) vous est destiné. Statut actuel: En attente. Suivi: {colis_instance.get_absolute_url() if hasattr(colis_instance, 'get_absolute_url') else 'URL non disponible'}',
-                statut='EN_ATTENTE'
-            )
+        # 2. Résolution des expéditeurs et destinataires en une requête chacun
+        expediteurs = ExpediteurModel.objects.in_bulk({data['expediteur_id'] for _, data in valides})
+        destinataires = DestinataireModel.objects.in_bulk({data['destinataire_id'] for _, data in valides})
+
+        colis_list = []
+        for index, data in valides:
+            expediteur = expediteurs.get(data['expediteur_id'])
+            destinataire = destinataires.get(data['destinataire_id'])
+            erreurs_ligne = {}
+            if expediteur is None:
+                erreurs_ligne['expediteur_id'] = ['Expéditeur introuvable.']
+            if destinataire is None:
+                erreurs_ligne['destinataire_id'] = ['Destinataire introuvable.']
+            if erreurs_ligne:
+                erreurs.append({'index': index, 'erreurs': erreurs_ligne})
+                continue
+            colis = ColisModel(**{**data, 'utilisateur': request.user})
+            colis.expediteur = expediteur
+            colis.destinataire = destinataire
+            colis_list.append(colis)
+
+        # 3. Création des colis et de leurs événements d'outbox dans une seule transaction
+        for colis in colis_list:
+            colis.numero_suivi = colis.generer_numero_suivi()
+            colis.planifier_livraison()
+        if colis_list:
+            with transaction.atomic():
+                ColisModel.objects.bulk_create(colis_list)
+                enregistrer_colis(colis_list)
+
+        erreurs.sort(key=lambda erreur: erreur['index'])
+        return Response(
+            {'crees': ColisListSerializer(colis_list, many=True).data, 'erreurs': erreurs},
+            status=status.HTTP_201_CREATED if colis_list else status.HTTP_400_BAD_REQUEST
+        )
@@ -0,0 +1,82 @@
+"""Flux SSE des changements de statut des colis"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from api.models import UserModel
+from api.permissions import IsAdminOrOperateurUser
+from api.services.evenements import Abonnement, consommer_ticket, diffuseur, emettre_ticket
+
+
+class TicketEvenementsView(APIView):
+    """POST /api/events/ticket/: ticket à usage unique pour ouvrir /api/events/?ticket=..."""
+
+    permission_classes = [IsAdminOrOperateurUser]
+
+    def post(self, request):
+        return Response(
+            {'ticket': emettre_ticket(request.user), 'expire_dans': settings.EVENEMENTS_TICKET_TTL},
+            status=status.HTTP_201_CREATED,
+        )
+
+
+def _utilisateur_du_ticket(ticket):
+    utilisateur_id = consommer_ticket(ticket)
+    if utilisateur_id is None:
+        return None
+    return UserModel.objects.filter(pk=utilisateur_id, is_active=True).first()
+
+
+async def _authentifier(request):
+    """Utilisateur du ticket ?ticket= (EventSource ne pouvant pas envoyer d'en-tête), ou None"""
+    return await sync_to_async(_utilisateur_du_ticket)(request.GET.get('ticket'))
+
+
+async def flux_evenements(request):
+    """Changements de statut des colis et nouvelles étapes de suivi, poussés au fil de l'eau.
+
+    Ouverture avec ?ticket=, obtenu juste avant par POST /api/events/ticket/.
+    Filtres: ?ville=Abidjan&ville=Bouaké et/ou ?numero_suivi=ABI...; sans
+    filtre, tous les colis. Servi uniquement par le service ASGI (uvicorn):
+    un worker WSGI garderait un thread bloqué par client.
+    """
+    if 'wsgi.version' in request.META:
+        return JsonResponse({'detail': 'Flux disponible uniquement via le serveur ASGI.'}, status=501)
+    utilisateur = await _authentifier(request)
+    if utilisateur is None:
+        return JsonResponse({'detail': 'Authentification requise.'}, status=401)
+    if utilisateur.role not in ('ADMIN', 'OPERATEUR'):
+        return JsonResponse({'detail': 'Accès refusé.'}, status=403)
+
+    abonnement = Abonnement(
+        asyncio.get_running_loop(),
+        villes=request.GET.getlist('ville'),
+        numeros=request.GET.getlist('numero_suivi'),
+        taille=settings.EVENEMENTS_FILE_TAILLE,
+    )
+
+    async def flux():
+        diffuseur.abonner(abonnement)
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    evenement = await abonnement.suivant(settings.EVENEMENTS_HEARTBEAT_SECONDES)
+                except TimeoutError:
+                    yield ': ping\n\n'  # garde la connexion ouverte à travers les proxys
+                    continue
+                if evenement is None:
+                    break
+                yield f"id: {evenement['id']}\nevent: {evenement['type']}\ndata: {json.dumps(evenement, default=str)}\n\n"
+        finally:
+            diffuseur.desabonner(abonnement)
+
+    response = StreamingHttpResponse(flux(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,116 @@
+"""Exports CSV en flux des colis et des factures"""
+import csv
+import zlib
+
+from django.http import StreamingHttpResponse
+from rest_framework import generics
+from api.filters import ColisFilter, FactureFilter
+from api.models import ColisModel, FactureModel
+from api.permissions import IsAdminOrOperateurUser
+
+TAILLE_LOT = 2000
+# Premiers caractères qu'un tableur interprète comme une formule (injection CSV)
+DEBUTS_FORMULE = ('=', '+', '-', '@', '\t', '\r')
+
+
+class _Tampon:
+    """Pseudo-fichier pour csv.writer: write() retourne la ligne au lieu de la stocker"""
+
+    def write(self, valeur):
+        return valeur
+
+
+def _neutraliser(valeur):
+    """Préfixe d'une apostrophe le texte qu'Excel ou LibreOffice exécuterait comme une formule"""
+    if isinstance(valeur, str) and valeur.startswith(DEBUTS_FORMULE):
+        return "'" + valeur
+    return valeur
+
+
+def _lignes_csv(entetes, lignes):
+    writer = csv.writer(_Tampon())
+    yield '\ufeff' + writer.writerow(entetes)  # BOM: Excel lit l'UTF-8 correctement
+    for ligne in lignes:
+        yield writer.writerow([_neutraliser(valeur) for valeur in ligne])
+
+
+def _compresser(morceaux):
+    compresseur = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: format gzip
+    for morceau in morceaux:
+        donnees = compresseur.compress(morceau.encode('utf-8'))
+        if donnees:
+            yield donnees
+    yield compresseur.flush()
+
+
+class ExportCSVView(generics.GenericAPIView):
+    """Export CSV filtré, produit ligne à ligne depuis un curseur côté serveur.
+
+    La mémoire reste constante quel que soit le nombre de lignes. ?gzip=1
+    compresse le flux à la volée. Les sous-classes déclarent queryset,
+    filterset_class, nom_fichier et colonnes; des filtres invalides
+    répondent 400 (DjangoFilterBackend).
+    """
+
+    permission_classes = [IsAdminOrOperateurUser]
+    nom_fichier = None
+    colonnes = ()  # (entête, champ values_list)
+
+    def get(self, request):
+        lignes = self.filter_queryset(self.get_queryset()).order_by('id').values_list(
+            *(champ for _, champ in self.colonnes)
+        )
+        flux = _lignes_csv([entete for entete, _ in self.colonnes], lignes.iterator(chunk_size=TAILLE_LOT))
+        nom_fichier = self.nom_fichier
+        if request.query_params.get('gzip') in ('1', 'true'):
+            response = StreamingHttpResponse(_compresser(flux), content_type='application/gzip')
+            nom_fichier += '.gz'
+        else:
+            response = StreamingHttpResponse(flux, content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{nom_fichier}"'
+        return response
+
+
+class ExportColisView(ExportCSVView):
+    queryset = ColisModel.objects.all()
+    filterset_class = ColisFilter
+    nom_fichier = 'colis.csv'
+    colonnes = (
+        ('numero_suivi', 'numero_suivi'),
+        ('statut', 'statut'),
+        ('priorite', 'priorite'),
+        ('type_colis', 'type_colis'),
+        ('poids', 'poids'),
+        ('valeur_declaree', 'valeur_declaree'),
+        ('frais_envoi', 'frais_envoi'),
+        ('expediteur', 'expediteur__nom_complet'),
+        ('expediteur_telephone', 'expediteur__telephone'),
+        ('expediteur_ville', 'expediteur__ville'),
+        ('destinataire', 'destinataire__nom_complet'),
+        ('destinataire_telephone', 'destinataire__telephone'),
+        ('destinataire_ville', 'destinataire__ville'),
+        ('date_creation', 'date_creation'),
+        ('date_livraison_prevue', 'date_livraison_prevue'),
+        ('date_livraison_reelle', 'date_livraison_reelle'),
+    )
+
+
+class ExportFacturesView(ExportCSVView):
+    queryset = FactureModel.objects.all()
+    filterset_class = FactureFilter
+    nom_fichier = 'factures.csv'
+    colonnes = (
+        ('numero_facture', 'numero_facture'),
+        ('numero_suivi', 'colis__numero_suivi'),
+        ('montant_base', 'montant_base'),
+        ('frais_distance', 'frais_distance'),
+        ('frais_poids', 'frais_poids'),
+        ('frais_assurance', 'frais_assurance'),
+        ('frais_express', 'frais_express'),
+        ('montant_total', 'montant_total'),
+        ('montant_paye', 'montant_paye'),
+        ('statut', 'statut'),
+        ('mode_paiement', 'mode_paiement'),
+        ('date_emission', 'date_emission'),
+        ('date_paiement', 'date_paiement'),
+    )
@@ -1,10 +1,33 @@
 """Vue pour FactureModel"""
-from rest_framework import viewsets
+import io
+
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
 from api.models import FactureModel
 from api.serializers import FactureSerializer
 from api.permissions import IsAdminOrOperateurUser # Import the custom permission
+from api.views.mixins import QuerysetOptimiseMixin
+from api.pagination import PaginationCurseurFacture
+from api.services.rapprochement import lire_releve, rapprocher
 
-class FactureViewSet(viewsets.ModelViewSet):
+class FactureViewSet(QuerysetOptimiseMixin, viewsets.ModelViewSet):
     queryset = FactureModel.objects.all()
+    select_related_par_action = {'*': ('colis',)}
     serializer_class = FactureSerializer
+    pagination_class = PaginationCurseurFacture
     permission_classes = [IsAdminOrOperateurUser] # Apply the custom permission
+
+    @action(detail=False, methods=['post'], url_path='rapprochement', parser_classes=[MultiPartParser])
+    def rapprochement(self, request):
+        """Applique un relevé de paiements CSV (champ `fichier`); ?simulation=1 n'enregistre rien"""
+        fichier = request.FILES.get('fichier')
+        if fichier is None:
+            return Response({'detail': 'Le champ fichier est requis.'}, status=status.HTTP_400_BAD_REQUEST)
+        flux = io.TextIOWrapper(fichier.file, encoding='utf-8-sig', newline='')
+        try:
+            rapport = rapprocher(lire_releve(flux), simulation=request.query_params.get('simulation') in ('1', 'true'))
+        except UnicodeDecodeError:
+            return Response({'detail': 'Le relevé doit être encodé en UTF-8.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(rapport)
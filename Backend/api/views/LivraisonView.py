@@ -1,10 +1,52 @@
 """Vue pour LivraisonModel"""
-from rest_framework import viewsets
+from django.conf import settings
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from api.models import LivraisonModel
-from api.serializers import LivraisonSerializer
+from api.serializers import LivraisonListSerializer, LivraisonSerializer
 from api.permissions import IsAdminOrOperateurUser # Import the custom permission
+from api.views.mixins import QuerysetOptimiseMixin
+from api.pagination import PaginationCurseurLivraison
+from api.services.affectation import Affectateur
 
-class LivraisonViewSet(viewsets.ModelViewSet):
+class LivraisonViewSet(QuerysetOptimiseMixin, viewsets.ModelViewSet):
     queryset = LivraisonModel.objects.all()
+    select_related_par_action = {'*': ('colis', 'livreur__utilisateur', 'vehicule')}
     serializer_class = LivraisonSerializer
+    pagination_class = PaginationCurseurLivraison
     permission_classes = [IsAdminOrOperateurUser] # Apply the custom permission
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            # Signatures non lues par les listes
+            queryset = queryset.defer('signature_compressee')
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return LivraisonListSerializer
+        return LivraisonSerializer
+
+    @action(detail=False, methods=['post'], url_path='auto-assign')
+    def affecter_automatiquement(self, request):
+        """Affecte les colis en attente (tous, ou la liste `colis`) aux livreurs disponibles"""
+        colis_ids = request.data.get('colis')
+        if colis_ids is not None and (
+            not isinstance(colis_ids, list) or not all(isinstance(pk, int) for pk in colis_ids)
+        ):
+            return Response({'detail': 'colis doit être une liste d\'identifiants.'}, status=status.HTTP_400_BAD_REQUEST)
+        simulation = request.data.get('simulation') in (True, 'true', '1')
+
+        affectations, non_affectes = Affectateur().affecter(
+            colis_ids, limite=settings.AFFECTATION_MAX_COLIS, simulation=simulation
+        )
+        return Response({
+            'affectations': [
+                {'id': livraison.pk, 'colis': livraison.colis_id, 'numero_suivi': livraison.colis.numero_suivi,
+                 'livreur': livraison.livreur_id, 'vehicule': livraison.vehicule_id}
+                for livraison in affectations
+            ],
+            'non_affectes': [{'colis': colis.pk, 'numero_suivi': colis.numero_suivi} for colis in non_affectes],
+        }, status=status.HTTP_200_OK if simulation else status.HTTP_201_CREATED)
@@ -0,0 +1,61 @@
+"""Vue des livraisons du livreur connecté (application mobile)"""
+from django.conf import settings
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from api.models import LivreurModel
+from api.permissions import IsLivreurUser
+from api.services.synchro_livreur import CurseurInvalide, actives, changements, synchroniser
+
+
+class LivreurLivraisonViewSet(viewsets.ViewSet):
+    """Synchronisation incrémentale: GET ?since=<curseur> ne renvoie que les livraisons modifiées
+    depuis le curseur; POST sync/ applique les changements faits hors ligne."""
+
+    permission_classes = [IsLivreurUser]
+
+    def _livreur_id(self, request):
+        return LivreurModel.objects.filter(utilisateur=request.user).values_list('id', flat=True).first()
+
+    def list(self, request):
+        livreur_id = self._livreur_id(request)
+        if livreur_id is None:
+            return Response({'detail': 'Aucun profil livreur.'}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            lignes, curseur, plus = changements(livreur_id, request.query_params.get('since'))
+        except CurseurInvalide as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'livraisons': lignes, 'curseur': curseur, 'plus': plus, 'actives': actives(livreur_id)})
+
+    def _appliquer(self, request, statut=None):
+        livreur_id = self._livreur_id(request)
+        if livreur_id is None:
+            return Response({'detail': 'Aucun profil livreur.'}, status=status.HTTP_403_FORBIDDEN)
+        operations = request.data.get('operations') if isinstance(request.data, dict) else request.data
+        if not isinstance(operations, list) or not operations:
+            return Response({'detail': 'Une liste d\'opérations est attendue.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(operations) > settings.LIVREUR_SYNC_LOT_MAX:
+            return Response({'detail': f'Lot limité à {settings.LIVREUR_SYNC_LOT_MAX} opérations.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        for index, operation in enumerate(operations):
+            if not isinstance(operation, dict) or not isinstance(operation.get('cle'), str) \
+                    or not 0 < len(operation['cle']) <= 100:
+                return Response({'detail': f'Opération {index}: clé d\'idempotence (cle) requise.'},
+                                status=status.HTTP_400_BAD_REQUEST)
+        if statut is not None:
+            operations = [{**operation, 'statut': statut} for operation in operations]
+        return Response({'resultats': synchroniser(request.user, livreur_id, operations)})
+
+    @action(detail=False, methods=['post'], url_path='sync')
+    def synchroniser(self, request):
+        """Lot d'opérations {cle, livraison, statut, horodatage, motif_echec, commentaire, latitude, longitude,
+        signature, photo}"""
+        return self._appliquer(request)
+
+    @action(detail=False, methods=['post'], url_path='confirmer')
+    def confirmer(self, request):
+        """Lot de livraisons effectuées, avec leur preuve: {cle, livraison, horodatage, signature, photo, ...}.
+
+        `photo` est l'identifiant d'un téléversement terminé (/api/livreur/televersements/).
+        """
+        return self._appliquer(request, statut='TERMINEE')
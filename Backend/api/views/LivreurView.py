@@ -1,10 +1,78 @@
 """Vue pour LivreurModel"""
-from rest_framework import viewsets
+from django.conf import settings
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from api.models import LivreurModel
 from api.serializers import LivreurSerializer
-from api.permissions import IsAdminUser # Import the custom permission
+from api.permissions import IsAdminUser, IsLivreurUser # Import the custom permission
+from api.views.mixins import QuerysetOptimiseMixin
+from api.services.affectation import LIVRAISONS_ACTIVES
+from api.services.positions import derniere_position, enregistrer_positions
+from api.services.tournee import planifier
 
-class LivreurViewSet(viewsets.ModelViewSet):
+class LivreurViewSet(QuerysetOptimiseMixin, viewsets.ModelViewSet):
     queryset = LivreurModel.objects.all()
+    select_related_par_action = {'*': ('utilisateur',), 'tournee': ()}
     serializer_class = LivreurSerializer
     permission_classes = [IsAdminUser] # Apply the custom permission
+
+    @action(detail=True, methods=['get'], url_path='tournee')
+    def tournee(self, request, pk=None):
+        """Ordre de passage des livraisons en cours du livreur; ?retour=1 pour revenir au dépôt"""
+        livreur = self.get_object()
+        livraisons = list(
+            livreur.livraisons.filter(statut__in=LIVRAISONS_ACTIVES)
+            .values('id', 'colis__numero_suivi', 'latitude_livraison', 'longitude_livraison',
+                    'colis__destinataire__latitude', 'colis__destinataire__longitude')
+        )
+        for l in livraisons:
+            # À défaut de position relevée, l'adresse géocodée du destinataire
+            if l['latitude_livraison'] is None or l['longitude_livraison'] is None:
+                l['latitude_livraison'] = l['colis__destinataire__latitude']
+                l['longitude_livraison'] = l['colis__destinataire__longitude']
+        localisees = {l['id']: l for l in livraisons if l['latitude_livraison'] is not None
+                      and l['longitude_livraison'] is not None}
+        etapes, distance_totale = planifier(
+            (settings.TOURNEE_DEPOT_LATITUDE, settings.TOURNEE_DEPOT_LONGITUDE),
+            [(pk, l['latitude_livraison'], l['longitude_livraison']) for pk, l in localisees.items()],
+            retour=request.query_params.get('retour') in ('1', 'true'),
+            budget=settings.TOURNEE_BUDGET_SECONDES,
+        )
+        return Response({
+            'livreur': livreur.pk,
+            'distance_totale': round(distance_totale, 3),
+            'arrets': [
+                {'ordre': rang, 'livraison': pk, 'numero_suivi': localisees[pk]['colis__numero_suivi'],
+                 'latitude': localisees[pk]['latitude_livraison'], 'longitude': localisees[pk]['longitude_livraison'],
+                 'distance': round(distance, 3)}
+                for rang, (pk, distance) in enumerate(etapes, start=1)
+            ],
+            'sans_coordonnees': [
+                {'livraison': l['id'], 'numero_suivi': l['colis__numero_suivi']}
+                for l in livraisons if l['id'] not in localisees
+            ],
+        })
+
+    @action(detail=False, methods=['post'], url_path='positions', permission_classes=[IsLivreurUser])
+    def envoyer_positions(self, request):
+        """Lot de points GPS du livreur connecté: {positions: [{latitude, longitude, horodatage, precision, vitesse}]}"""
+        points = request.data.get('positions') if isinstance(request.data, dict) else request.data
+        if not isinstance(points, list) or not points:
+            return Response({'detail': 'Une liste de positions est attendue.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(points) > settings.POSITIONS_LOT_MAX:
+            return Response({'detail': f'Lot limité à {settings.POSITIONS_LOT_MAX} positions.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        livreur_id = LivreurModel.objects.filter(utilisateur=request.user).values_list('id', flat=True).first()
+        if livreur_id is None:
+            return Response({'detail': 'Aucun profil livreur.'}, status=status.HTTP_403_FORBIDDEN)
+        enregistres, rejets = enregistrer_positions(livreur_id, points)
+        return Response({'enregistres': enregistres, 'rejets': rejets}, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'], url_path='position')
+    def position(self, request, pk=None):
+        """Dernière position connue du livreur (cache, sans requête dans le cas courant)"""
+        position = derniere_position(int(pk)) if pk.isdigit() else None
+        if position is None:
+            return Response({'detail': 'Aucune position connue.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(position)
@@ -3,8 +3,12 @@ from rest_framework import viewsets
 from api.models import NotificationModel
 from api.serializers import NotificationSerializer
 from api.permissions import IsAdminOrOperateurUser # Import the custom permission
+from api.views.mixins import QuerysetOptimiseMixin
+from api.pagination import PaginationCurseurNotification
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(QuerysetOptimiseMixin, viewsets.ModelViewSet):
     queryset = NotificationModel.objects.all()
+    select_related_par_action = {'*': ('colis',)}
     serializer_class = NotificationSerializer
+    pagination_class = PaginationCurseurNotification
     permission_classes = [IsAdminOrOperateurUser] # Apply the custom permission
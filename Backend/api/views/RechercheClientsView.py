@@ -0,0 +1,22 @@
+"""Vue de recherche des clients (expéditeurs et destinataires)"""
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from api.permissions import IsAdminOrOperateurUser
+from api.services.recherche_clients import rechercher_clients
+
+
+class RechercheClientsView(APIView):
+    """GET /api/search/customers/?q=...&limite=20"""
+
+    permission_classes = [IsAdminOrOperateurUser]
+
+    def get(self, request):
+        q = request.query_params.get('q', '').strip()
+        if len(q) < 3:
+            return Response({'detail': 'Au moins 3 caractères sont requis.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limite = min(int(request.query_params.get('limite', 20)), 100)
+        except ValueError:
+            return Response({'detail': 'limite doit être un entier.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'results': rechercher_clients(q, limite)})
@@ -0,0 +1,81 @@
+"""Vues des statistiques du tableau de bord"""
+from datetime import date, timedelta
+
+from django.db.models import Sum
+from django.utils import timezone
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from api.models import StatColisJourModel, StatLivraisonJourModel, StatRevenuJourModel
+from api.permissions import IsAdminOrOperateurUser
+
+
+class StatistiquesViewSet(viewsets.ViewSet):
+    """Lectures des agrégats journaliers maintenus par rollup_stats.
+
+    Toutes les routes acceptent ?du=AAAA-MM-JJ&au=AAAA-MM-JJ (30 derniers jours par défaut).
+    """
+
+    permission_classes = [IsAdminOrOperateurUser]
+
+    def _periode(self, request):
+        au = date.fromisoformat(request.query_params['au']) if 'au' in request.query_params else timezone.localdate()
+        du = date.fromisoformat(request.query_params['du']) if 'du' in request.query_params else au - timedelta(days=29)
+        return du, au
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        try:
+            self.du, self.au = self._periode(request)
+        except ValueError:
+            self.du = self.au = None
+
+    def _periode_invalide(self):
+        return Response({'detail': 'du et au doivent être au format AAAA-MM-JJ.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    def list(self, request):
+        """Synthèse de la période"""
+        if self.du is None:
+            return self._periode_invalide()
+        colis = StatColisJourModel.objects.filter(jour__range=(self.du, self.au))
+        revenus = StatRevenuJourModel.objects.filter(jour__range=(self.du, self.au)).aggregate(
+            montant_total=Sum('montant_total'), montant_paye=Sum('montant_paye'), nombre_factures=Sum('nombre_factures')
+        )
+        livraisons = StatLivraisonJourModel.objects.filter(jour__range=(self.du, self.au)).aggregate(
+            nombre=Sum('nombre'), terminees=Sum('terminees'), echouees=Sum('echouees')
+        )
+        return Response({
+            'du': self.du,
+            'au': self.au,
+            'colis_par_statut': dict(colis.values('statut').annotate(total=Sum('nombre')).values_list('statut', 'total')),
+            'revenus': revenus,
+            'livraisons': livraisons,
+        })
+
+    @action(detail=False, methods=['get'])
+    def colis(self, request):
+        """Colis par jour, statut et ville (?ville= pour filtrer)"""
+        if self.du is None:
+            return self._periode_invalide()
+        lignes = StatColisJourModel.objects.filter(jour__range=(self.du, self.au))
+        if 'ville' in request.query_params:
+            lignes = lignes.filter(ville=request.query_params['ville'])
+        return Response(lignes.values('jour', 'statut', 'ville', 'nombre'))
+
+    @action(detail=False, methods=['get'])
+    def revenus(self, request):
+        """Montants par jour et mode de paiement"""
+        if self.du is None:
+            return self._periode_invalide()
+        lignes = StatRevenuJourModel.objects.filter(jour__range=(self.du, self.au))
+        return Response(lignes.values('jour', 'mode_paiement', 'nombre_factures', 'montant_total', 'montant_paye'))
+
+    @action(detail=False, methods=['get'])
+    def livraisons(self, request):
+        """Livraisons par jour et par livreur (?livreur= pour filtrer)"""
+        if self.du is None:
+            return self._periode_invalide()
+        lignes = StatLivraisonJourModel.objects.filter(jour__range=(self.du, self.au))
+        if 'livreur' in request.query_params:
+            lignes = lignes.filter(livreur_id=request.query_params['livreur'])
+        return Response(lignes.values('jour', 'livreur_id', 'livreur__matricule', 'nombre', 'terminees', 'echouees'))
@@ -0,0 +1,29 @@
+"""Vue publique de suivi d'un colis par numéro de suivi"""
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.throttling import ScopedRateThrottle
+from rest_framework.views import APIView
+from api.services.suivi_public import obtenir_suivi_public
+
+
+class SuiviPublicView(APIView):
+    """Statut et historique d'un colis, sans authentification.
+
+    Les réponses sont lues depuis le cache et portent un ETag: un client qui
+    renvoie If-None-Match reçoit un 304 sans corps.
+    """
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'suivi_public'
+
+    def get(self, request, numero_suivi):
+        entree = obtenir_suivi_public(numero_suivi.strip().upper())
+        headers = {'ETag': entree['etag'], 'Cache-Control': 'no-cache'}
+        if entree['donnees'] is None:
+            return Response({'detail': 'Colis introuvable.'}, status=status.HTTP_404_NOT_FOUND)
+        if entree['etag'] in request.headers.get('If-None-Match', ''):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(entree['donnees'], headers=headers)
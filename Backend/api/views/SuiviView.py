@@ -3,8 +3,13 @@ from rest_framework import viewsets
 from api.models import SuiviModel
 from api.serializers import SuiviSerializer
 from api.permissions import IsAdminOrOperateurUser # Import the custom permission
+from api.views.mixins import QuerysetOptimiseMixin
+from api.pagination import PaginationCurseur
 
-class SuiviViewSet(viewsets.ModelViewSet):
+class SuiviViewSet(QuerysetOptimiseMixin, viewsets.ModelViewSet):
     queryset = SuiviModel.objects.all()
+    select_related_par_action = {'*': ('utilisateur',)}
     serializer_class = SuiviSerializer
+    pagination_class = PaginationCurseur
+    filterset_fields = ['colis']  # Historique d'un colis: ?colis=<id>
     permission_classes = [IsAdminOrOperateurUser] # Apply the custom permission
@@ -0,0 +1,57 @@
+"""Vue des téléversements reprenables (photos de livraison)"""
+from django.core.exceptions import ValidationError
+from rest_framework import status, viewsets
+from rest_framework.response import Response
+from api.models import TeleversementModel
+from api.permissions import IsLivreurUser
+from api.services.televersements import (
+    DecalageInvalide, TeleversementInvalide, TeleversementOccupe, creer, ecrire_morceau,
+)
+
+
+def _etat(televersement):
+    return {'id': televersement.pk, 'taille': televersement.taille, 'recu': televersement.recu,
+            'statut': televersement.statut}
+
+
+class TeleversementViewSet(viewsets.ViewSet):
+    """POST {taille, type_contenu, empreinte} ouvre un téléversement; PATCH envoie un morceau brut à
+    partir de l'octet indiqué par l'en-tête Upload-Offset; GET indique où reprendre."""
+
+    permission_classes = [IsLivreurUser]
+
+    def create(self, request):
+        try:
+            televersement = creer(request.user, request.data.get('taille'), request.data.get('type_contenu'),
+                                  request.data.get('empreinte'))
+        except TeleversementInvalide as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(_etat(televersement), status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, pk=None):
+        try:
+            televersement = TeleversementModel.objects.get(pk=pk, utilisateur=request.user)
+        except (TeleversementModel.DoesNotExist, ValidationError):
+            return Response({'detail': 'Téléversement introuvable.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(_etat(televersement))
+
+    def partial_update(self, request, pk=None):
+        try:
+            debut = int(request.META['HTTP_UPLOAD_OFFSET'])
+            longueur = int(request.META['CONTENT_LENGTH'])
+        except (KeyError, ValueError):
+            return Response({'detail': 'En-têtes Upload-Offset et Content-Length requis.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            # Le corps est lu par blocs depuis la requête, jamais chargé en entier
+            televersement = ecrire_morceau(request.user, pk, debut, request.stream, longueur)
+        except (TeleversementModel.DoesNotExist, ValidationError):
+            return Response({'detail': 'Téléversement introuvable.'}, status=status.HTTP_404_NOT_FOUND)
+        except DecalageInvalide as e:
+            return Response({'detail': str(e), 'recu': e.recu}, status=status.HTTP_409_CONFLICT)
+        except TeleversementOccupe as e:
+            return Response({'detail': str(e)}, status=status.HTTP_409_CONFLICT)
+        except TeleversementInvalide as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(_etat(televersement))
+
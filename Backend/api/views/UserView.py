@@ -7,4 +7,5 @@ from api.permissions import IsAdminUser # Import the custom permission
 class UserViewSet(viewsets.ModelViewSet):
     queryset = UserModel.objects.all()
     serializer_class = UserSerializer
+    filterset_fields = ['role']
     permission_classes = [IsAdminUser] # Apply the custom permission
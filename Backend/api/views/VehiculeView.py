@@ -3,8 +3,10 @@ from rest_framework import viewsets
 from api.models import VehiculeModel
 from api.serializers import VehiculeSerializer
 from api.permissions import IsAdminUser # Import the custom permission
+from api.views.mixins import QuerysetOptimiseMixin
 
-class VehiculeViewSet(viewsets.ModelViewSet):
+class VehiculeViewSet(QuerysetOptimiseMixin, viewsets.ModelViewSet):
     queryset = VehiculeModel.objects.all()
+    select_related_par_action = {'*': ('livreur_attribue__utilisateur',)}
     serializer_class = VehiculeSerializer
     permission_classes = [IsAdminUser] # Apply the custom permission
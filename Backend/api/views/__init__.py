@@ -11,6 +11,13 @@ from .FactureView import FactureViewSet
 from .ZoneLivraisonView import ZoneLivraisonViewSet
 from .NotificationView import NotificationViewSet
 from .TarifView import TarifViewSet
+from .SuiviPublicView import SuiviPublicView
+from .RechercheClientsView import RechercheClientsView
+from .StatistiquesView import StatistiquesViewSet
+from .ExportView import ExportColisView, ExportFacturesView
+from .EvenementsView import TicketEvenementsView, flux_evenements
+from .LivreurLivraisonView import LivreurLivraisonViewSet
+from .TeleversementView import TeleversementViewSet
 from .HealthView import health_check, readiness_check, liveness_check
 
 __all__ = [
@@ -26,6 +33,15 @@ __all__ = [
     'ZoneLivraisonViewSet',
     'NotificationViewSet',
     'TarifViewSet',
+    'SuiviPublicView',
+    'RechercheClientsView',
+    'StatistiquesViewSet',
+    'ExportColisView',
+    'ExportFacturesView',
+    'TicketEvenementsView',
+    'flux_evenements',
+    'LivreurLivraisonViewSet',
+    'TeleversementViewSet',
     'health_check',
     'readiness_check',
     'liveness_check',
@@ -0,0 +1,29 @@
+"""Mixins partagés par les ViewSets"""
+
+
+class QuerysetOptimiseMixin:
+    """Charge les relations lues par les serializers selon l'action en cours.
+
+    select_related_par_action et prefetch_related_par_action associent un nom
+    d'action ('list', 'retrieve', action personnalisée...) aux relations à
+    charger; la clé '*' vaut pour toutes les actions sans entrée propre. Le
+    nombre de requêtes d'une liste reste ainsi constant quelle que soit la
+    taille de la page.
+    """
+
+    select_related_par_action = {}
+    prefetch_related_par_action = {}
+
+    def _relations(self, correspondance):
+        action = getattr(self, 'action', None)
+        return correspondance.get(action, correspondance.get('*', ()))
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        select_related = self._relations(self.select_related_par_action)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        prefetch_related = self._relations(self.prefetch_related_par_action)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
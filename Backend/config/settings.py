@@ -1,4 +1,5 @@
 import os
+import warnings
 from pathlib import Path
 from datetime import timedelta
 from dotenv import load_dotenv
@@ -20,6 +21,11 @@ DEBUG = os.getenv('DEBUG', 'True') == 'True'
 
 ALLOWED_HOSTS = []
 
+# Derrière nginx (nginx/conf.d): le schéma et l'hôte d'origine viennent des en-têtes du proxy, sans quoi
+# les URL absolues (liens `next` de la pagination) sortent en http:// sur le nom du conteneur
+SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+USE_X_FORWARDED_HOST = True
+
 
 # Application definition
 
@@ -30,6 +36,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
 
     'api',
@@ -123,11 +130,30 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Fichiers envoyés (photos de livraison), volume media_volume en production
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.getenv('MEDIA_ROOT', str(BASE_DIR / 'media'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache partagé entre les workers si REDIS_URL est défini, local au processus sinon. En production un
+# cache local ne verrait pas les invalidations des autres processus (relais, workers gunicorn) : tous les
+# manifestes de déploiement fournissent Redis, une installation mono-processus peut s'en passer
+REDIS_URL = os.getenv('REDIS_URL')
+if not REDIS_URL and not DEBUG:
+    warnings.warn('REDIS_URL absent : cache local au processus, à réserver aux déploiements mono-processus')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 # Custom User Model
 AUTH_USER_MODEL = 'api.UserModel'
 
@@ -140,6 +166,14 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.PaginationStandard',
+    'PAGE_SIZE': 50,
+    # Un seul proxy (nginx/conf.d) devant Django : l'IP cliente est la dernière entrée de X-Forwarded-For,
+    # les entrées précédentes sont fournies par le client et ne doivent pas servir au throttling
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', '1')),
+    'DEFAULT_THROTTLE_RATES': {
+        'suivi_public': os.getenv('SUIVI_PUBLIC_THROTTLE', '60/min'),
+    },
 }
 
 SIMPLE_JWT = {
@@ -176,3 +210,118 @@ CORS_ALLOWED_ORIGINS = [
     "http://127.0.0.1:3000",
     "http://localhost:5173", # Add your Vite development server origin here
 ]
+
+# Index en mémoire (grille tarifaire, zones): délai maximal (secondes) avant qu'un processus voie
+# l'invalidation publiée par un autre dans le cache partagé
+INDEX_VERIFICATION_SECONDES = float(os.getenv('INDEX_VERIFICATION_SECONDES', '1'))
+# Durée de vie de l'index de la grille tarifaire, si sa version partagée était évincée du cache
+TARIF_INDEX_TTL = int(os.getenv('TARIF_INDEX_TTL', '300'))
+
+# Nombre maximal de colis par appel à POST /api/colis/bulk/
+COLIS_BULK_MAX = int(os.getenv('COLIS_BULK_MAX', '500'))
+
+# Taille des blocs de numéros (suivi, factures) réservés par processus
+SEQUENCE_TAILLE_BLOC = int(os.getenv('SEQUENCE_TAILLE_BLOC', '100'))
+
+# Durées de cache (secondes) du suivi public: colis connus / numéros inconnus
+SUIVI_PUBLIC_CACHE_TTL = int(os.getenv('SUIVI_PUBLIC_CACHE_TTL', '3600'))
+SUIVI_PUBLIC_CACHE_TTL_INCONNU = int(os.getenv('SUIVI_PUBLIC_CACHE_TTL_INCONNU', '30'))
+
+# Envoi des notifications (commande dispatch_notifications)
+SMS_GATEWAY_URL = os.getenv('SMS_GATEWAY_URL')
+PUSH_GATEWAY_URL = os.getenv('PUSH_GATEWAY_URL')
+NOTIFICATION_BACKENDS = {
+    'SMS': {
+        'BACKEND': 'api.services.notifications.HttpBackend', 'URL': SMS_GATEWAY_URL, 'CONCURRENCE': 20,
+    } if SMS_GATEWAY_URL else {'BACKEND': 'api.services.notifications.JournalBackend'},
+    'EMAIL': {'BACKEND': 'api.services.notifications.EmailBackend', 'CONCURRENCE': 5},
+    'PUSH': {
+        'BACKEND': 'api.services.notifications.HttpBackend', 'URL': PUSH_GATEWAY_URL, 'CONCURRENCE': 50,
+    } if PUSH_GATEWAY_URL else {'BACKEND': 'api.services.notifications.JournalBackend'},
+}
+NOTIFICATION_TIMEOUT = int(os.getenv('NOTIFICATION_TIMEOUT', '15'))
+# Marge ajoutée à la durée de réservation d'un lot (vagues d'envoi x NOTIFICATION_TIMEOUT); au-delà
+# (dispatcheur arrêté), les notifications EN_COURS sont reprises
+NOTIFICATION_RESERVATION_SECONDES = int(os.getenv('NOTIFICATION_RESERVATION_SECONDES', '120'))
+NOTIFICATION_MAX_TENTATIVES = int(os.getenv('NOTIFICATION_MAX_TENTATIVES', '5'))
+NOTIFICATION_BACKOFF_SECONDES = int(os.getenv('NOTIFICATION_BACKOFF_SECONDES', '30'))
+
+# Nombre d'essais d'un événement d'outbox avant de le marquer ECHOUE
+OUTBOX_MAX_TENTATIVES = int(os.getenv('OUTBOX_MAX_TENTATIVES', '10'))
+# Attente avant de reprendre un événement en échec: base, doublée à chaque essai, plafonnée
+OUTBOX_BACKOFF_SECONDES = int(os.getenv('OUTBOX_BACKOFF_SECONDES', '15'))
+OUTBOX_BACKOFF_MAX_SECONDES = int(os.getenv('OUTBOX_BACKOFF_MAX_SECONDES', '3600'))
+# Durée pendant laquelle un lot d'événements lents (géocodage, photos) reste réservé à son relais;
+# au-delà, un autre relais peut le reprendre: réduire --lot de relay_outbox --lents si un lot dure plus
+OUTBOX_RESERVATION_SECONDES = int(os.getenv('OUTBOX_RESERVATION_SECONDES', '600'))
+
+# Cache en mémoire des recherches de clients (/api/search/customers/)
+RECHERCHE_CLIENTS_CACHE_TAILLE = int(os.getenv('RECHERCHE_CLIENTS_CACHE_TAILLE', '2048'))
+RECHERCHE_CLIENTS_CACHE_TTL = int(os.getenv('RECHERCHE_CLIENTS_CACHE_TTL', '60'))
+
+# Similarité minimale (0 à 1) entre deux noms pour fusionner des clients de même téléphone
+CLIENTS_SEUIL_SIMILARITE_NOM = float(os.getenv('CLIENTS_SEUIL_SIMILARITE_NOM', '0.8'))
+
+# Nombre maximal de colis traités par appel à /api/livraisons/auto-assign/
+AFFECTATION_MAX_COLIS = int(os.getenv('AFFECTATION_MAX_COLIS', '5000'))
+
+# Planification des tournées (/api/livreurs/<id>/tournee/): dépôt de départ et temps de calcul maximal
+TOURNEE_DEPOT_LATITUDE = float(os.getenv('TOURNEE_DEPOT_LATITUDE', '5.3599'))
+TOURNEE_DEPOT_LONGITUDE = float(os.getenv('TOURNEE_DEPOT_LONGITUDE', '-3.9874'))
+TOURNEE_BUDGET_SECONDES = float(os.getenv('TOURNEE_BUDGET_SECONDES', '1.0'))
+
+# Géocodage des adresses: fournisseurs consultés dans l'ordre, puis cache mémoire devant la table geocodage.
+# Nominatim (adresse précise) d'abord, une requête par INTERVALLE secondes au plus (1/s pour le service public);
+# le gazetteer (centre du quartier) en secours
+GEOCODAGE_NOMINATIM_URL = os.getenv('GEOCODAGE_NOMINATIM_URL')
+GEOCODAGE_FOURNISSEURS = ([
+    {'FOURNISSEUR': 'api.services.geocodage.NominatimFournisseur', 'URL': GEOCODAGE_NOMINATIM_URL,
+     'PAYS': "Côte d'Ivoire", 'TIMEOUT': 5, 'INTERVALLE': int(os.getenv('GEOCODAGE_NOMINATIM_INTERVALLE', '1'))},
+] if GEOCODAGE_NOMINATIM_URL else []) + [
+    {'FOURNISSEUR': 'api.services.geocodage.GazetteerFournisseur',
+     'FICHIER': os.getenv('GEOCODAGE_GAZETTEER', str(BASE_DIR / 'api' / 'data' / 'gazetteer_ci.csv'))},
+]
+GEOCODAGE_CACHE_TAILLE = int(os.getenv('GEOCODAGE_CACHE_TAILLE', '10000'))
+GEOCODAGE_CACHE_TTL = int(os.getenv('GEOCODAGE_CACHE_TTL', '3600'))
+
+# Zones de livraison: durée de vie de l'index en mémoire (filet, voir INDEX_VERIFICATION_SECONDES)
+# et distance (km) depuis le dépôt comprise dans tarif_base
+ZONE_INDEX_TTL = int(os.getenv('ZONE_INDEX_TTL', '300'))
+ZONE_KM_INCLUS = float(os.getenv('ZONE_KM_INCLUS', '5'))
+
+# Flux temps réel /api/events/ (service ASGI): transport entre processus, battement de cœur, file par abonné
+EVENEMENTS_BACKEND = os.getenv('EVENEMENTS_BACKEND', 'api.services.evenements.PostgresBackend')
+EVENEMENTS_HEARTBEAT_SECONDES = int(os.getenv('EVENEMENTS_HEARTBEAT_SECONDES', '15'))
+EVENEMENTS_FILE_TAILLE = int(os.getenv('EVENEMENTS_FILE_TAILLE', '100'))
+# Durée de validité (secondes) d'un ticket d'ouverture du flux, à usage unique
+EVENEMENTS_TICKET_TTL = int(os.getenv('EVENEMENTS_TICKET_TTL', '30'))
+
+# Positions GPS des livreurs: taille maximale d'un envoi, durée de la dernière position en cache,
+# conservation et sous-échantillonnage (commande maintenir_positions)
+POSITIONS_LOT_MAX = int(os.getenv('POSITIONS_LOT_MAX', '500'))
+POSITIONS_CACHE_TTL = int(os.getenv('POSITIONS_CACHE_TTL', '86400'))
+POSITIONS_RETENTION_JOURS = int(os.getenv('POSITIONS_RETENTION_JOURS', '90'))
+POSITIONS_SOUS_ECHANTILLONNAGE_JOURS = int(os.getenv('POSITIONS_SOUS_ECHANTILLONNAGE_JOURS', '7'))
+
+# Synchronisation mobile des livreurs (/api/livreur/livraisons/)
+LIVREUR_SYNC_TAILLE = int(os.getenv('LIVREUR_SYNC_TAILLE', '200'))
+LIVREUR_SYNC_JOURS = int(os.getenv('LIVREUR_SYNC_JOURS', '7'))
+LIVREUR_SYNC_MARGE_SECONDES = int(os.getenv('LIVREUR_SYNC_MARGE_SECONDES', '2'))
+LIVREUR_SYNC_LOT_MAX = int(os.getenv('LIVREUR_SYNC_LOT_MAX', '200'))
+IDEMPOTENCE_RETENTION_HEURES = int(os.getenv('IDEMPOTENCE_RETENTION_HEURES', '72'))
+
+# Preuves de livraison: téléversements reprenables et signatures
+TELEVERSEMENT_TAILLE_MAX = int(os.getenv('TELEVERSEMENT_TAILLE_MAX', str(15 * 1024 * 1024)))
+# Doit rester sous client_max_body_size de nginx
+TELEVERSEMENT_MORCEAU_MAX = int(os.getenv('TELEVERSEMENT_MORCEAU_MAX', str(4 * 1024 * 1024)))
+# Durée après laquelle la réservation d'un morceau abandonné (requête tuée) peut être reprise; au-delà
+# du --timeout de gunicorn
+TELEVERSEMENT_RESERVATION_SECONDES = int(os.getenv('TELEVERSEMENT_RESERVATION_SECONDES', '180'))
+TELEVERSEMENT_RETENTION_HEURES = int(os.getenv('TELEVERSEMENT_RETENTION_HEURES', '48'))
+LIVRAISON_SIGNATURE_MAX = int(os.getenv('LIVRAISON_SIGNATURE_MAX', '100000'))
+
+# Rendus des photos de livraison (relais de l'outbox)
+PHOTOS_PROCESSUS = int(os.getenv('PHOTOS_PROCESSUS', '2'))
+PHOTOS_AFFICHAGE_PX = int(os.getenv('PHOTOS_AFFICHAGE_PX', '1600'))
+PHOTOS_MINIATURE_PX = int(os.getenv('PHOTOS_MINIATURE_PX', '320'))
+PHOTOS_QUALITE_WEBP = int(os.getenv('PHOTOS_QUALITE_WEBP', '80'))
@@ -1,12 +1,12 @@
 import React, { useState, useEffect } from "react";
 import { useNavigate, Link } from "react-router-dom";
-import { getAllColis } from "../services/colisService";
-import { getAllLivreurs } from "../services/livreurService";
-import { getAllUsers } from "../services/userService";
-import { getAllVehicules } from "../services/vehiculeService";
+import { getColisPage } from "../services/colisService";
+import { getLivreursPage } from "../services/livreurService";
+import { getUsersPage } from "../services/userService";
+import { getVehiculesPage } from "../services/vehiculeService";
 import { createLivraison } from "../services/livraisonService";
-import { getAllExpediteurs } from "../services/expediteurService";
-import { getAllDestinataires } from "../services/destinataireService";
+import { getExpediteursPage } from "../services/expediteurService";
+import { getDestinatairesPage } from "../services/destinataireService";
 import Input from "./ui/Input";
 import Button from "./ui/Button";
 import Card from "./ui/Card";
@@ -298,29 +298,30 @@ function CreateDeliveryForm() {
     const fetchData = async () => {
       setLoading(true);
       try {
+        // Une page par liste, filtrée par l'API: seuls les colis à livrer, le nombre
+        // d'utilisateurs LIVREUR (count), et 500 entrées au plus par liste déroulante
         const [
-          colisData,
-          livreursData,
-          usersData,
-          vehiculesData,
-          expediteursData,
-          destinatairesData,
+          { results: colisData },
+          { results: livreursData },
+          { count: livreurUsersCount },
+          { results: vehiculesData },
+          { results: expediteursData },
+          { results: destinatairesData },
         ] = await Promise.all([
-          getAllColis(),
-          getAllLivreurs(),
-          getAllUsers(),
-          getAllVehicules(),
-          getAllExpediteurs(),
-          getAllDestinataires(),
+          getColisPage({ params: { statut: ["EN_ATTENTE", "EN_TRANSIT"], page_size: 500 } }),
+          getLivreursPage({ params: { limit: 500 } }),
+          getUsersPage({ params: { role: "LIVREUR", limit: 1 } }),
+          getVehiculesPage({ params: { limit: 500 } }),
+          getExpediteursPage({ params: { limit: 500 } }),
+          getDestinatairesPage({ params: { limit: 500 } }),
         ]);
-        const livreurUsers = usersData.filter((u) => u.role === "LIVREUR");
         console.debug(
           "[CreateDeliveryForm] Loaded colis:",
           colisData.length,
           "livreurs:",
           livreursData.length,
           "users LIVREUR:",
-          livreurUsers.length,
+          livreurUsersCount,
           "vehicules:",
           vehiculesData.length
         );
@@ -329,7 +330,7 @@ function CreateDeliveryForm() {
         setVehicules(vehiculesData);
         setExpediteurs(expediteursData);
         setDestinataires(destinatairesData);
-        setLivreurUsersCount(livreurUsers.length);
+        setLivreurUsersCount(livreurUsersCount);
       } catch (err) {
         console.error("Error loading data:", err);
         setError(`Erreur lors du chargement des données: ${err.message}`);
@@ -15,10 +15,11 @@ function VerifierColis() {
     try {
       const response = await fetch(`/api/colis/?numero_suivi=${numero}`);
       const data = await response.json();
-      if (!response.ok || !data.length) {
+      const colis = data.results ?? data;
+      if (!response.ok || !colis.length) {
         throw new Error("Colis non trouvé.");
       }
-      setResult(data[0]);
+      setResult(colis[0]);
     } catch (err) {
       setError(err.message);
     } finally {
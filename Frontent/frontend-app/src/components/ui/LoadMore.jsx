@@ -0,0 +1,15 @@
+import React from "react";
+import Button from "./Button";
+
+// Bouton "Charger plus" affiché sous une liste paginée (voir hooks/usePagination)
+export default function LoadMore({ hasMore, loading, error, onClick, className = "" }) {
+  if (!hasMore) return null;
+  return (
+    <div className={`flex flex-col items-center gap-2 p-4 ${className}`}>
+      {error && <p className="text-sm text-red-600">{error}</p>}
+      <Button variant="ghost" onClick={onClick} disabled={loading}>
+        {loading ? "Chargement..." : "Charger plus"}
+      </Button>
+    </div>
+  );
+}
@@ -0,0 +1,51 @@
+import { useCallback, useRef, useState } from 'react';
+
+/**
+ * Hook de pagination "Charger plus" pour les listes de l'API
+ * @param {Function} fetchPage - Service *Page: ({ pageUrl, params }) => Promise<{ results, next }>
+ * @returns {Object} - { items, setItems, hasMore, loadingMore, loadMoreError, reload, loadMore }
+ *
+ * reload() charge la première page et relance les erreurs (chaque page garde son
+ * propre message); loadMore() ajoute la page suivante à la suite.
+ */
+export const usePagination = (fetchPage) => {
+  const [items, setItems] = useState([]);
+  const [next, setNext] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [loadMoreError, setLoadMoreError] = useState(null);
+  // Ignore une page suivante arrivée après un rechargement
+  const generation = useRef(0);
+
+  const reload = useCallback(async (params = {}) => {
+    const courant = ++generation.current;
+    setLoadMoreError(null);
+    const page = await fetchPage({ params });
+    if (courant === generation.current) {
+      setItems(page.results);
+      setNext(page.next);
+    }
+    return page;
+  }, [fetchPage]);
+
+  const loadMore = useCallback(async () => {
+    if (!next || loadingMore) return;
+    const courant = generation.current;
+    setLoadingMore(true);
+    setLoadMoreError(null);
+    try {
+      const page = await fetchPage({ pageUrl: next });
+      if (courant === generation.current) {
+        setItems((precedents) => [...precedents, ...page.results]);
+        setNext(page.next);
+      }
+    } catch (err) {
+      setLoadMoreError(err.userMessage || err.message || 'Erreur lors du chargement de la page suivante.');
+    } finally {
+      setLoadingMore(false);
+    }
+  }, [fetchPage, next, loadingMore]);
+
+  return { items, setItems, hasMore: Boolean(next), loadingMore, loadMoreError, reload, loadMore };
+};
+
+export default usePagination;
@@ -1,7 +1,7 @@
 import React, { useEffect, useState } from "react";
 import { useParams, useNavigate } from "react-router-dom";
 import { getColisById } from "../services/colisService";
-import { getAllSuivis } from "../services/suiviService";
+import { getSuivisPage } from "../services/suiviService";
 import LoadingSpinner from "../components/LoadingSpinner";
 import {
   Package,
@@ -39,9 +39,10 @@ function ColisSuivi() {
       const colisData = await getColisById(id);
       setColis(colisData);
 
-      // Récupérer tous les suivis et filtrer par colis
-      const allSuivis = await getAllSuivis();
-      const colisSuivis = allSuivis.filter((s) => s.colis === parseInt(id));
+      // Historique du colis seul, filtré par l'API (quelques suivis par colis: une page suffit)
+      const { results: colisSuivis } = await getSuivisPage({
+        params: { colis: id, page_size: 500 },
+      });
       setSuivis(colisSuivis);
     } catch (error) {
       handleError(error, {
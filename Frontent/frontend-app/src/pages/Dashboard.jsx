@@ -1,6 +1,6 @@
 import React, { useEffect, useState } from "react";
 import KpiCard from "../components/KpiCard";
-import { getAllColis } from "../services/colisService";
+import { getColisPage } from "../services/colisService";
 import LoadingSpinner from "../components/LoadingSpinner";
 import Button from "../components/ui/Button";
 import {
@@ -22,6 +22,8 @@ import Card from "../components/ui/Card";
 import LivraisonColis from "../components/LivraisonColis";
 import { useAuth } from "../contexts/AuthContext";
 
+const DASHBOARD_PAGE_SIZE = 500; // max_page_size de l'API
+
 function Dashboard() {
   const { user } = useAuth();
   const [stats, setStats] = useState(null);
@@ -44,13 +46,13 @@ function Dashboard() {
     try {
       setLoading(true);
       setError(null);
-      const data = await getAllColis();
-
-      // Filtrage opérateur : ne garder que ses colis
-      let filteredData = data;
+      // Indicateurs calculés sur les 500 derniers colis (une page, plus récents d'abord) plutôt que
+      // sur toute la table; l'opérateur ne reçoit que ses colis (filtre utilisateur de l'API)
+      const params = { page_size: DASHBOARD_PAGE_SIZE };
       if (user?.role === "OPERATEUR") {
-        filteredData = data.filter((d) => d.utilisateur_id === user.id);
+        params.utilisateur = user.id;
       }
+      const { results: filteredData } = await getColisPage({ params });
 
       // compute basic KPIs from filteredData
       const total = filteredData.length;
@@ -159,7 +161,7 @@ function Dashboard() {
 
         {/* VERSION SIMPLIFIÉE - KPIs essentiels uniquement */}
         <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-3 gap-3 sm:gap-4">
-          <KpiCard title="Total colis" value={stats.total} />
+          <KpiCard title={`Colis (${DASHBOARD_PAGE_SIZE} derniers)`} value={stats.total} />
           <KpiCard
             title="En attente"
             value={stats.total - stats.enTransit}
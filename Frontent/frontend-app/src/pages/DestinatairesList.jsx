@@ -2,15 +2,19 @@
 import React, { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
 import { UserX, Plus, Edit2, Trash2, Search, Phone, MapPin } from 'lucide-react';
-import { getAllDestinataires, deleteDestinataire } from '../services/destinataireService';
+import { getDestinatairesPage, deleteDestinataire } from '../services/destinataireService';
+import { usePagination } from '../hooks/usePagination';
 import LoadingSpinner from '../components/LoadingSpinner';
 import Card from '../components/ui/Card';
 import Button from '../components/ui/Button';
 import Input from '../components/ui/Input';
+import LoadMore from '../components/ui/LoadMore';
 import { useAuth } from '../contexts/AuthContext';
 
 function DestinatairesList() {
-  const [destinataires, setDestinataires] = useState([]);
+  // Pages chargées à la demande: la recherche porte sur les pages chargées
+  const { items: destinataires, hasMore, loadingMore, loadMoreError, reload, loadMore } =
+    usePagination(getDestinatairesPage);
   const [filteredDestinataires, setFilteredDestinataires] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
@@ -27,9 +31,7 @@ function DestinatairesList() {
 
   const fetchDestinataires = async () => {
     try {
-      const data = await getAllDestinataires();
-      setDestinataires(data);
-      setFilteredDestinataires(data);
+      await reload();
     } catch (err) {
       setError(err.message || 'Erreur lors du chargement des destinataires.');
     } finally {
@@ -183,6 +185,7 @@ function DestinatairesList() {
               </tbody>
             </table>
           </div>
+          <LoadMore hasMore={hasMore} loading={loadingMore} error={loadMoreError} onClick={loadMore} />
         </Card>
       </div>
     </div>
@@ -1,15 +1,18 @@
 import React, { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
 import { FileText, Plus, Edit2, Trash2, Search, Download } from 'lucide-react';
-import { getAllFactures, deleteFacture } from '../services/factureService';
+import { getFacturesPage, deleteFacture } from '../services/factureService';
+import { usePagination } from '../hooks/usePagination';
 import LoadingSpinner from '../components/LoadingSpinner';
 import Card from '../components/ui/Card';
 import Button from '../components/ui/Button';
 import Input from '../components/ui/Input';
+import LoadMore from '../components/ui/LoadMore';
 import { useAuth } from '../contexts/AuthContext';
 
 function FacturesList() {
-  const [factures, setFactures] = useState([]);
+  // Pages de 50 factures chargées à la demande: les filtres portent sur les pages chargées
+  const { items: factures, hasMore, loadingMore, loadMoreError, reload, loadMore } = usePagination(getFacturesPage);
   const [filteredFactures, setFilteredFactures] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
@@ -27,9 +30,7 @@ function FacturesList() {
 
   const fetchFactures = async () => {
     try {
-      const data = await getAllFactures();
-      setFactures(data);
-      setFilteredFactures(data);
+      await reload();
     } catch (err) {
       setError(err.message || 'Erreur lors du chargement des factures.');
     } finally {
@@ -234,6 +235,7 @@ function FacturesList() {
               </tbody>
             </table>
           </div>
+          <LoadMore hasMore={hasMore} loading={loadingMore} error={loadMoreError} onClick={loadMore} />
         </Card>
       </div>
     </div>
@@ -13,16 +13,20 @@ import {
   XCircle,
   X,
 } from "lucide-react";
-import { getAllLivraisons } from "../services/livraisonService";
+import { getLivraisonsPage } from "../services/livraisonService";
+import { usePagination } from "../hooks/usePagination";
 import LoadingSpinner from "../components/LoadingSpinner";
 import Card from "../components/ui/Card";
 import Button from "../components/ui/Button";
 import Input from "../components/ui/Input";
+import LoadMore from "../components/ui/LoadMore";
 import { useAuth } from "../contexts/AuthContext";
 import { useReactToPrint } from "react-to-print";
 
 function LivraisonsList() {
-  const [livraisons, setLivraisons] = useState([]);
+  // Pages chargées à la demande: les filtres portent sur les pages chargées
+  const { items: livraisons, hasMore, loadingMore, loadMoreError, reload, loadMore } =
+    usePagination(getLivraisonsPage);
   const [filteredLivraisons, setFilteredLivraisons] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
@@ -63,9 +67,7 @@ function LivraisonsList() {
 
   const fetchLivraisons = async () => {
     try {
-      const data = await getAllLivraisons();
-      setLivraisons(data);
-      setFilteredLivraisons(data);
+      await reload();
     } catch (err) {
       setError(err.message || "Erreur lors du chargement des livraisons.");
     } finally {
@@ -435,6 +437,7 @@ function LivraisonsList() {
               </tbody>
             </table>
           </div>
+          <LoadMore hasMore={hasMore} loading={loadingMore} error={loadMoreError} onClick={loadMore} />
         </Card>
       </div>
 
@@ -15,7 +15,7 @@ import {
   getLivreurById,
   updateLivreur,
 } from "../services/livreurService";
-import { getAllUsers } from "../services/userService";
+import { getUsersPage } from "../services/userService";
 import LoadingSpinner from "../components/LoadingSpinner";
 import Input from "../components/ui/Input";
 import Button from "../components/ui/Button";
@@ -62,9 +62,10 @@ function LivreurForm() {
   const fetchUsers = async () => {
     setLoadingUsers(true);
     try {
-      const allUsers = await getAllUsers();
-      // Filtrer uniquement les utilisateurs avec le rôle LIVREUR
-      const livreurUsers = allUsers.filter((u) => u.role === "LIVREUR");
+      // Uniquement les utilisateurs avec le rôle LIVREUR, filtrés par l'API
+      const { results: livreurUsers } = await getUsersPage({
+        params: { role: "LIVREUR", limit: 500 },
+      });
       setUsers(livreurUsers);
     } catch (err) {
       console.error("Error fetching users:", err);
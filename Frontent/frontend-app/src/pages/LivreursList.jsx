@@ -11,15 +11,19 @@ import {
   Phone,
   MapPin,
 } from "lucide-react";
-import { getAllLivreurs, deleteLivreur } from "../services/livreurService";
+import { getLivreursPage, deleteLivreur } from "../services/livreurService";
+import { usePagination } from "../hooks/usePagination";
 import Card from "../components/ui/Card";
 import Button from "../components/ui/Button";
 import Input from "../components/ui/Input";
+import LoadMore from "../components/ui/LoadMore";
 import LoadingSpinner from "../components/LoadingSpinner";
 import { useAuth } from "../contexts/AuthContext";
 
 function LivreursList() {
-  const [livreurs, setLivreurs] = useState([]);
+  // Pages chargées à la demande: les filtres portent sur les pages chargées
+  const { items: livreurs, setItems: setLivreurs, hasMore, loadingMore, loadMoreError, reload, loadMore } =
+    usePagination(getLivreursPage);
   const [filteredLivreurs, setFilteredLivreurs] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
@@ -42,8 +46,7 @@ function LivreursList() {
     setLoading(true);
     setError(null);
     try {
-      const data = await getAllLivreurs();
-      setLivreurs(data);
+      await reload();
     } catch (err) {
       console.error("Error fetching livreurs:", err);
       if (
@@ -329,6 +332,7 @@ function LivreursList() {
               </tbody>
             </table>
           </div>
+          <LoadMore hasMore={hasMore} loading={loadingMore} error={loadMoreError} onClick={loadMore} />
         </Card>
       </div>
     </div>
@@ -9,13 +9,15 @@ import {
   AlertCircle,
   RefreshCw,
 } from "lucide-react";
-import { getAllColis, deleteColis } from "../services/colisService";
+import { getColisPage, deleteColis } from "../services/colisService";
 import { useErrorHandler } from "../hooks/useErrorHandler";
+import { usePagination } from "../hooks/usePagination";
 import { useToast } from "../contexts/ToastContext";
 import LoadingSpinner from "../components/LoadingSpinner";
 import Card from "../components/ui/Card";
 import Button from "../components/ui/Button";
 import Input from "../components/ui/Input";
+import LoadMore from "../components/ui/LoadMore";
 import { useAuth } from "../contexts/AuthContext";
 import ColisStatusUpdate from "./ColisStatusUpdate";
 
@@ -56,7 +58,8 @@ function ParcelsList() {
     link.click();
     document.body.removeChild(link);
   };
-  const [parcels, setParcels] = useState([]);
+  // Pages de 50 colis chargées à la demande: la recherche porte sur les pages chargées
+  const { items: parcels, hasMore, loadingMore, loadMoreError, reload, loadMore } = usePagination(getColisPage);
   const [filteredParcels, setFilteredParcels] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
@@ -81,14 +84,10 @@ function ParcelsList() {
     setLoading(true);
     setError(null);
     try {
-      const data = await getAllColis();
-      setParcels(data);
-      // Calcul du nombre de colis réellement affichés après filtrage rôle
-      let filteredCount = data.length;
-      if (user?.role === "OPERATEUR") {
-        filteredCount = data.filter((p) => p.utilisateur_id === user.id).length;
-      }
-      toast.success(`${filteredCount} colis chargé(s)`, "Chargement réussi");
+      // L'opérateur ne voit que ses colis: filtré côté API pour que chaque page en soit remplie
+      const params = user?.role === "OPERATEUR" ? { utilisateur: user.id } : {};
+      const page = await reload(params);
+      toast.success(`${page.results.length} colis chargé(s)`, "Chargement réussi");
     } catch (err) {
       const enrichedError = handleError(err, {
         context: "Chargement des colis",
@@ -451,6 +450,7 @@ function ParcelsList() {
               </tbody>
             </table>
           </div>
+          <LoadMore hasMore={hasMore} loading={loadingMore} error={loadMoreError} onClick={loadMore} />
         </Card>
       </div>
     </div>
@@ -2,15 +2,18 @@
 import React, { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
 import { UserCheck, Plus, Edit2, Trash2, Search, Phone, MapPin } from 'lucide-react';
-import { getAllExpediteurs, deleteExpediteur } from '../services/expediteurService';
+import { getExpediteursPage, deleteExpediteur } from '../services/expediteurService';
+import { usePagination } from '../hooks/usePagination';
 import LoadingSpinner from '../components/LoadingSpinner';
 import Card from '../components/ui/Card';
 import Button from '../components/ui/Button';
 import Input from '../components/ui/Input';
+import LoadMore from '../components/ui/LoadMore';
 import { useAuth } from '../contexts/AuthContext';
 
 function SendersList() {
-  const [senders, setSenders] = useState([]);
+  // Pages chargées à la demande: la recherche porte sur les pages chargées
+  const { items: senders, hasMore, loadingMore, loadMoreError, reload, loadMore } = usePagination(getExpediteursPage);
   const [filteredSenders, setFilteredSenders] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
@@ -27,9 +30,7 @@ function SendersList() {
 
   const fetchSenders = async () => {
     try {
-      const data = await getAllExpediteurs();
-      setSenders(data);
-      setFilteredSenders(data);
+      await reload();
     } catch (err) {
       setError(err.message || 'Erreur lors du chargement des expéditeurs.');
     } finally {
@@ -183,6 +184,7 @@ function SendersList() {
               </tbody>
             </table>
           </div>
+          <LoadMore hasMore={hasMore} loading={loadingMore} error={loadMoreError} onClick={loadMore} />
         </Card>
       </div>
     </div>
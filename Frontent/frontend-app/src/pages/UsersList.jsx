@@ -1,15 +1,18 @@
 import React, { useEffect, useState } from "react";
 import { Link } from "react-router-dom";
 import { Users, Plus, Edit2, Trash2, Search, Shield } from "lucide-react";
-import { getAllUsers, deleteUser } from "../services/userService";
+import { getUsersPage, deleteUser } from "../services/userService";
+import { usePagination } from "../hooks/usePagination";
 import LoadingSpinner from "../components/LoadingSpinner";
 import Card from "../components/ui/Card";
 import Button from "../components/ui/Button";
 import Input from "../components/ui/Input";
+import LoadMore from "../components/ui/LoadMore";
 import { useAuth } from "../contexts/AuthContext";
 
 function UsersList() {
-  const [users, setUsers] = useState([]);
+  // Pages chargées à la demande: les filtres portent sur les pages chargées
+  const { items: users, hasMore, loadingMore, loadMoreError, reload, loadMore } = usePagination(getUsersPage);
   const [filteredUsers, setFilteredUsers] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
@@ -27,9 +30,7 @@ function UsersList() {
 
   const fetchUsers = async () => {
     try {
-      const data = await getAllUsers();
-      setUsers(data);
-      setFilteredUsers(data);
+      await reload();
     } catch (err) {
       setError(err.message || "Erreur lors du chargement des utilisateurs.");
     } finally {
@@ -245,6 +246,7 @@ function UsersList() {
               </tbody>
             </table>
           </div>
+          <LoadMore hasMore={hasMore} loading={loadingMore} error={loadMoreError} onClick={loadMore} />
         </Card>
       </div>
     </div>
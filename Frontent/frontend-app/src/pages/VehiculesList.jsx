@@ -1,15 +1,18 @@
 import React, { useState, useEffect } from "react";
 import { Link } from "react-router-dom";
 import { Truck, Plus, Edit2, Trash2, Search, AlertCircle } from "lucide-react";
-import { getAllVehicules, deleteVehicule } from "../services/vehiculeService";
+import { getVehiculesPage, deleteVehicule } from "../services/vehiculeService";
+import { usePagination } from "../hooks/usePagination";
 import Card from "../components/ui/Card";
 import Button from "../components/ui/Button";
 import Input from "../components/ui/Input";
+import LoadMore from "../components/ui/LoadMore";
 import LoadingSpinner from "../components/LoadingSpinner";
 import { useAuth } from "../contexts/AuthContext";
 
 function VehiculesList() {
-  const [vehicules, setVehicules] = useState([]);
+  // Pages chargées à la demande: les filtres portent sur les pages chargées
+  const { items: vehicules, hasMore, loadingMore, loadMoreError, reload, loadMore } = usePagination(getVehiculesPage);
   const [filteredVehicules, setFilteredVehicules] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
@@ -31,9 +34,7 @@ function VehiculesList() {
   const fetchVehicules = async () => {
     setLoading(true);
     try {
-      const data = await getAllVehicules();
-      setVehicules(data);
-      setFilteredVehicules(data);
+      await reload();
     } catch (err) {
       console.error("Error fetching vehicules:", err);
       setError("Erreur lors du chargement des véhicules");
@@ -275,6 +276,7 @@ function VehiculesList() {
               </tbody>
             </table>
           </div>
+          <LoadMore hasMore={hasMore} loading={loadingMore} error={loadMoreError} onClick={loadMore} />
         </Card>
       </div>
     </div>
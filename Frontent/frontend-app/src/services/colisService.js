@@ -1,17 +1,17 @@
 
 import { apiClient } from './auth'; // Import apiClient from auth.js
+import { getPage } from './pagination';
 import { extractErrorMessage } from '../utils/errorHandler';
 
 const API_BASE_URL = '/colis/'; // Base endpoint for this model, ensuring trailing slash
 
-// Fetch all Colis
-export const getAllColis = async () => {
+// Fetch one page of Colis: { results, next, previous, count }
+export const getColisPage = async (options = {}) => {
   try {
-    const response = await apiClient.get(API_BASE_URL);
-    return response.data;
+    return await getPage(API_BASE_URL, options); // options: { pageUrl, params }
   } catch (error) {
     const errorInfo = extractErrorMessage(error);
-    console.error('[getAllColis] Error:', errorInfo);
+    console.error('[getColisPage] Error:', errorInfo);
     // Enrichir l'erreur avant de la relancer
     error.userMessage = errorInfo.message;
     error.userDetails = errorInfo.details;
@@ -1,15 +1,15 @@
 
 import { apiClient } from './auth'; // Import apiClient from auth.js
+import { getPage } from './pagination';
 
 const API_BASE_URL = '/destinataires/'; // Base endpoint for this model, ensuring trailing slash
 
-// Fetch all Destinataires
-export const getAllDestinataires = async () => {
+// Fetch one page of Destinataires: { results, next, previous, count }
+export const getDestinatairesPage = async (options = {}) => {
   try {
-    const response = await apiClient.get(API_BASE_URL);
-    return response.data;
+    return await getPage(API_BASE_URL, options); // options: { pageUrl, params }
   } catch (error) {
-    console.error('Error fetching all Destinataires:', error);
+    console.error('Error fetching Destinataires page:', error);
     throw error;
   }
 };
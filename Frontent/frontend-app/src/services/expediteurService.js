@@ -1,15 +1,15 @@
 
 import { apiClient } from './auth'; // Import apiClient from auth.js
+import { getPage } from './pagination';
 
 const API_BASE_URL = '/expediteurs/'; // Base endpoint for this model, ensuring trailing slash
 
-// Fetch all Expediteurs
-export const getAllExpediteurs = async () => {
+// Fetch one page of Expediteurs: { results, next, previous, count }
+export const getExpediteursPage = async (options = {}) => {
   try {
-    const response = await apiClient.get(API_BASE_URL);
-    return response.data;
+    return await getPage(API_BASE_URL, options); // options: { pageUrl, params }
   } catch (error) {
-    console.error('Error fetching all Expediteurs:', error);
+    console.error('Error fetching Expediteurs page:', error);
     throw error;
   }
 };
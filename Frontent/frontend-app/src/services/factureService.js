@@ -1,15 +1,15 @@
 
 import { apiClient } from './auth'; // Import apiClient from auth.js
+import { getPage } from './pagination';
 
 const API_BASE_URL = '/factures/'; // Base endpoint for this model, ensuring trailing slash
 
-// Fetch all Factures
-export const getAllFactures = async () => {
+// Fetch one page of Factures: { results, next, previous, count }
+export const getFacturesPage = async (options = {}) => {
   try {
-    const response = await apiClient.get(API_BASE_URL);
-    return response.data;
+    return await getPage(API_BASE_URL, options); // options: { pageUrl, params }
   } catch (error) {
-    console.error('Error fetching all Factures:', error);
+    console.error('Error fetching Factures page:', error);
     throw error;
   }
 };
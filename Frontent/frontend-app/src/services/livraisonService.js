@@ -1,15 +1,15 @@
 
 import { apiClient } from './auth'; // Import apiClient from auth.js
+import { getPage } from './pagination';
 
 const API_BASE_URL = '/livraisons/'; // Base endpoint for this model, ensuring trailing slash
 
-// Fetch all Livraisons
-export const getAllLivraisons = async () => {
+// Fetch one page of Livraisons: { results, next, previous, count }
+export const getLivraisonsPage = async (options = {}) => {
   try {
-    const response = await apiClient.get(API_BASE_URL);
-    return response.data;
+    return await getPage(API_BASE_URL, options); // options: { pageUrl, params }
   } catch (error) {
-    console.error('Error fetching all Livraisons:', error);
+    console.error('Error fetching Livraisons page:', error);
     throw error;
   }
 };
@@ -1,15 +1,15 @@
 
 import { apiClient } from './auth'; // Import apiClient from auth.js
+import { getPage } from './pagination';
 
 const API_BASE_URL = '/livreurs/'; // Base endpoint for this model, ensuring trailing slash
 
-// Fetch all Livreurs
-export const getAllLivreurs = async () => {
+// Fetch one page of Livreurs: { results, next, previous, count }
+export const getLivreursPage = async (options = {}) => {
   try {
-    const response = await apiClient.get(API_BASE_URL);
-    return response.data;
+    return await getPage(API_BASE_URL, options); // options: { pageUrl, params }
   } catch (error) {
-    console.error('Error fetching all Livreurs:', error);
+    console.error('Error fetching Livreurs page:', error);
     throw error;
   }
 };
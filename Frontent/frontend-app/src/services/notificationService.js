@@ -1,15 +1,15 @@
 
 import { apiClient } from './auth'; // Import apiClient from auth.js
+import { getPage } from './pagination';
 
 const API_BASE_URL = '/notifications/'; // Base endpoint for this model, ensuring trailing slash
 
-// Fetch all Notifications
-export const getAllNotifications = async () => {
+// Fetch one page of Notifications: { results, next, previous, count }
+export const getNotificationsPage = async (options = {}) => {
   try {
-    const response = await apiClient.get(API_BASE_URL);
-    return response.data;
+    return await getPage(API_BASE_URL, options); // options: { pageUrl, params }
   } catch (error) {
-    console.error('Error fetching all Notifications:', error);
+    console.error('Error fetching Notifications page:', error);
     throw error;
   }
 };
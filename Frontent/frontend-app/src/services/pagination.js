@@ -0,0 +1,23 @@
+import { apiClient } from './auth';
+
+// Fetch a single page of a paginated collection and return { results, next, previous, count }.
+// `pageUrl` is the `next`/`previous` link of a previous page: it already carries the cursor
+// (or offset) and the filters, so `params` only apply to the first page.
+// Non-paginated responses (plain arrays) are wrapped as a single page.
+export const getPage = async (url, { pageUrl = null, params = {} } = {}) => {
+  // indexes: null -> ?statut=A&statut=B (django-filter), et non statut[]=A
+  const response = pageUrl
+    ? await apiClient.get(pageUrl)
+    : await apiClient.get(url, { params, paramsSerializer: { indexes: null } });
+  const data = response.data;
+  if (!Array.isArray(data?.results)) {
+    const results = Array.isArray(data) ? data : [];
+    return { results, next: null, previous: null, count: results.length };
+  }
+  return {
+    results: data.results,
+    next: data.next || null,
+    previous: data.previous || null,
+    count: data.count ?? null, // Absent en pagination par curseur
+  };
+};
@@ -1,17 +1,17 @@
 
 import { apiClient } from './auth'; // Import apiClient from auth.js
+import { getPage } from './pagination';
 import { extractErrorMessage } from '../utils/errorHandler';
 
 const API_BASE_URL = '/suivis/'; // Base endpoint for this model, ensuring trailing slash
 
-// Fetch all Suivis
-export const getAllSuivis = async () => {
+// Fetch one page of Suivis: { results, next, previous, count }
+export const getSuivisPage = async (options = {}) => {
   try {
-    const response = await apiClient.get(API_BASE_URL);
-    return response.data;
+    return await getPage(API_BASE_URL, options); // options: { pageUrl, params }
   } catch (error) {
     const errorInfo = extractErrorMessage(error);
-    console.error('[getAllSuivis] Error:', errorInfo);
+    console.error('[getSuivisPage] Error:', errorInfo);
     error.userMessage = errorInfo.message;
     error.userDetails = errorInfo.details;
     throw error;
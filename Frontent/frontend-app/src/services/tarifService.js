@@ -1,15 +1,15 @@
 
 import { apiClient } from './auth'; // Import apiClient from auth.js
+import { getPage } from './pagination';
 
 const API_BASE_URL = '/tarifs/'; // Base endpoint for this model, ensuring trailing slash
 
-// Fetch all Tarifs
-export const getAllTarifs = async () => {
+// Fetch one page of Tarifs: { results, next, previous, count }
+export const getTarifsPage = async (options = {}) => {
   try {
-    const response = await apiClient.get(API_BASE_URL);
-    return response.data;
+    return await getPage(API_BASE_URL, options); // options: { pageUrl, params }
   } catch (error) {
-    console.error('Error fetching all Tarifs:', error);
+    console.error('Error fetching Tarifs page:', error);
     throw error;
   }
 };
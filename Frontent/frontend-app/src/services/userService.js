@@ -10,16 +10,16 @@ export const getAllAgentLogs = async () => {
 };
 
 import { apiClient } from './auth'; // Import apiClient from auth.js
+import { getPage } from './pagination';
 
 const API_BASE_URL = '/users/'; // Base endpoint for this model, ensuring trailing slash
 
-// Fetch all Users
-export const getAllUsers = async () => {
+// Fetch one page of Users: { results, next, previous, count }
+export const getUsersPage = async (options = {}) => {
   try {
-    const response = await apiClient.get(API_BASE_URL);
-    return response.data;
+    return await getPage(API_BASE_URL, options); // options: { pageUrl, params }
   } catch (error) {
-    console.error('Error fetching all Users:', error);
+    console.error('Error fetching Users page:', error);
     throw error;
   }
 };
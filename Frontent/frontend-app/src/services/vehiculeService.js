@@ -1,15 +1,15 @@
 
 import { apiClient } from './auth'; // Import apiClient from auth.js
+import { getPage } from './pagination';
 
 const API_BASE_URL = '/vehicules/'; // Base endpoint for this model, ensuring trailing slash
 
-// Fetch all Vehicules
-export const getAllVehicules = async () => {
+// Fetch one page of Vehicules: { results, next, previous, count }
+export const getVehiculesPage = async (options = {}) => {
   try {
-    const response = await apiClient.get(API_BASE_URL);
-    return response.data;
+    return await getPage(API_BASE_URL, options); // options: { pageUrl, params }
   } catch (error) {
-    console.error('Error fetching all Vehicules:', error);
+    console.error('Error fetching Vehicules page:', error);
     throw error;
   }
 };
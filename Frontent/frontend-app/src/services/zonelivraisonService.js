@@ -1,15 +1,15 @@
 
 import { apiClient } from './auth'; // Import apiClient from auth.js
+import { getPage } from './pagination';
 
 const API_BASE_URL = '/zones-livraison/'; // Base endpoint for this model, ensuring trailing slash
 
-// Fetch all ZoneLivraisons
-export const getAllZoneLivraisons = async () => {
+// Fetch one page of ZoneLivraisons: { results, next, previous, count }
+export const getZoneLivraisonsPage = async (options = {}) => {
   try {
-    const response = await apiClient.get(API_BASE_URL);
-    return response.data;
+    return await getPage(API_BASE_URL, options); // options: { pageUrl, params }
   } catch (error) {
-    console.error('Error fetching all ZoneLivraisons:', error);
+    console.error('Error fetching ZoneLivraisons page:', error);
     throw error;
   }
 };